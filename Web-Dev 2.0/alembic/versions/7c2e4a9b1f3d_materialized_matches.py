@@ -0,0 +1,69 @@
+"""Materialized matches: candidate, staleness columns, ranking index; match_swipes
+
+Revision ID: 7c2e4a9b1f3d
+Revises: 1dca1c5cdf6d
+Create Date: 2026-10-17 10:12:41.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e4a9b1f3d'
+down_revision: Union[str, Sequence[str], None] = '1dca1c5cdf6d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('matches') as batch_op:
+        batch_op.add_column(sa.Column('candidate_profile_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('model_version', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('scored_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('is_stale', sa.Boolean(), server_default=sa.false(), nullable=False))
+        # Hybrid scores are 0-100 with two decimals
+        batch_op.alter_column('match_score', existing_type=sa.Integer(), type_=sa.Float(), existing_nullable=False)
+        batch_op.create_foreign_key(
+            'fk_matches_candidate_profile_id', 'profiles',
+            ['candidate_profile_id'], ['id'], ondelete='CASCADE'
+        )
+        batch_op.create_unique_constraint('uq_matches_profile_candidate', ['profile_id', 'candidate_profile_id'])
+
+    # get_matches: WHERE profile_id = ? ORDER BY match_score DESC LIMIT ?
+    op.create_index(
+        'ix_matches_profile_score', 'matches',
+        ['profile_id', sa.text('match_score DESC')], unique=False
+    )
+
+    # models.MatchSwipe existed only in code; no earlier revision creates it
+    op.create_table('match_swipes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('target_profile_id', sa.Integer(), nullable=False),
+    sa.Column('liked', sa.Boolean(), nullable=False),
+    sa.Column('type', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['target_profile_id'], ['profiles.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_match_swipes_id'), 'match_swipes', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_match_swipes_id'), table_name='match_swipes')
+    op.drop_table('match_swipes')
+    op.drop_index('ix_matches_profile_score', table_name='matches')
+    with op.batch_alter_table('matches') as batch_op:
+        batch_op.drop_constraint('uq_matches_profile_candidate', type_='unique')
+        batch_op.drop_constraint('fk_matches_candidate_profile_id', type_='foreignkey')
+        batch_op.alter_column('match_score', existing_type=sa.Float(), type_=sa.Integer(), existing_nullable=False)
+        batch_op.drop_column('is_stale')
+        batch_op.drop_column('scored_at')
+        batch_op.drop_column('model_version')
+        batch_op.drop_column('candidate_profile_id')
@@ -0,0 +1,36 @@
+"""Insert-candidate queue for the scoring worker
+
+Revision ID: a6d2e9c4b8f1
+Revises: f1a8c3d5e7b2
+Create Date: 2026-10-17 22:17:48.630912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d2e9c4b8f1'
+down_revision: Union[str, Sequence[str], None] = 'f1a8c3d5e7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('profiles') as batch_op:
+        batch_op.add_column(sa.Column('candidate_pending', sa.Boolean(), server_default=sa.false(), nullable=False))
+    # Partial: the queue is usually empty, so the index stays tiny
+    op.create_index(
+        'ix_profiles_candidate_pending', 'profiles', ['id'], unique=False,
+        postgresql_where=sa.text('candidate_pending'), sqlite_where=sa.text('candidate_pending'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_profiles_candidate_pending', table_name='profiles')
+    with op.batch_alter_table('profiles') as batch_op:
+        batch_op.drop_column('candidate_pending')
@@ -0,0 +1,42 @@
+"""Trigram GIN indexes for profile name / interests search
+
+Revision ID: c9a1f27d4e58
+Revises: b54d0e8a6c21
+Create Date: 2026-10-17 15:02:19.804117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9a1f27d4e58'
+down_revision: Union[str, Sequence[str], None] = 'b54d0e8a6c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite (dev/tests) uses the FTS5 shadow table from utils/search.py instead
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Lets ILIKE '%term%' in GET /match/ use an index instead of a full scan
+    op.create_index(
+        'ix_profiles_full_name_trgm', 'profiles', ['full_name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_profiles_interests_trgm', 'profiles', ['interests'], unique=False,
+        postgresql_using='gin', postgresql_ops={'interests': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_profiles_interests_trgm', table_name='profiles')
+    op.drop_index('ix_profiles_full_name_trgm', table_name='profiles')
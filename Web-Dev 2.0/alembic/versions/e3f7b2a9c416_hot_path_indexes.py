@@ -0,0 +1,54 @@
+"""Hot-path indexes for the profile / match / swipe queries
+
+Revision ID: e3f7b2a9c416
+Revises: c9a1f27d4e58
+Create Date: 2026-10-17 18:40:07.512934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f7b2a9c416'
+down_revision: Union[str, Sequence[str], None] = 'c9a1f27d4e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns) -- mirrored by the Index() declarations in models.py.
+# profiles.interests is served by the trigram indexes of c9a1f27d4e58: a btree
+# cannot answer ILIKE '%term%'.
+INDEXES = [
+    # _rank_candidates / score_profile: WHERE role = ?; profiles_needing_scoring: ORDER BY id
+    ('ix_profiles_role_id', 'profiles', ['role', 'id']),
+    # mark_profile_changed: WHERE candidate_profile_id = ?; FK cascade from profiles
+    ('ix_matches_candidate_profile_id', 'matches', ['candidate_profile_id']),
+    # FK cascades from users, User.matches_as_investor / matches_as_entrepreneur
+    ('ix_matches_investor_id', 'matches', ['investor_id']),
+    ('ix_matches_entrepreneur_id', 'matches', ['entrepreneur_id']),
+    # swipe existence checks per (user, target)
+    ('ix_match_swipes_user_target', 'match_swipes', ['user_id', 'target_profile_id']),
+    # FK cascade from profiles
+    ('ix_match_swipes_target_profile_id', 'match_swipes', ['target_profile_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Postgres builds them CONCURRENTLY (no write lock on live tables), which
+    # cannot run inside the migration transaction. IF NOT EXISTS: databases
+    # created by main.py's create_all already have them.
+    concurrently = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True,
+                            postgresql_concurrently=concurrently)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    concurrently = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=concurrently)
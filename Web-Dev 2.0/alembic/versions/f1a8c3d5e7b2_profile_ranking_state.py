@@ -0,0 +1,40 @@
+"""Per-profile ranking state for the scoring worker
+
+Revision ID: f1a8c3d5e7b2
+Revises: e3f7b2a9c416
+Create Date: 2026-10-17 21:05:33.104527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a8c3d5e7b2'
+down_revision: Union[str, Sequence[str], None] = 'e3f7b2a9c416'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('profiles') as batch_op:
+        batch_op.add_column(sa.Column('ranked_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('ranking_version', sa.String(length=32), nullable=True))
+
+    # Rankings already materialized keep their age and version; profiles
+    # without rows are scored once more and then recorded
+    op.execute(
+        "UPDATE profiles SET "
+        "ranked_at = (SELECT MIN(scored_at) FROM matches WHERE matches.profile_id = profiles.id), "
+        "ranking_version = (SELECT MIN(model_version) FROM matches WHERE matches.profile_id = profiles.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('profiles') as batch_op:
+        batch_op.drop_column('ranking_version')
+        batch_op.drop_column('ranked_at')
@@ -0,0 +1,34 @@
+# gunicorn.conf.py
+# Multi-worker serving with ONE physical copy of the AI engine.
+#
+#   gunicorn -c gunicorn.conf.py main:app
+#
+# The engine is loaded in the master before the workers are forked, so its
+# tensors (SentenceTransformer + graph table) are shared copy-on-write pages.
+# With FOUNDMATCH_MMAP_WEIGHTS=true the graph table is additionally mapped
+# from disk, so it stays shared even for workers that are restarted later.
+import gc
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+# Each worker runs its own inference threads; keep torch from using every core per worker
+os.environ.setdefault("OMP_NUM_THREADS", str(max((os.cpu_count() or 1) // workers, 1)))
+
+
+def on_starting(server):
+    # Runs in the master, before main:app is imported (preload) and before fork
+    from utils.match import get_ai_engine
+
+    if get_ai_engine() is None:
+        server.log.warning("AI engine failed to preload; workers will retry lazily after the backoff")
+    # Objects alive now are never collected; keeps the GC from writing to
+    # (and so un-sharing) their pages in every worker
+    gc.freeze()
@@ -1,29 +1,73 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
 
 # DB/models
-from database import engine
+from database import DB_ASYNC, async_engine, engine, SessionLocal
 import models
 
-# Routers
-from routers.auth import router as auth_router
-from routers.profile import router as profile_router
-from routers.projects import router as projects_router
-from routers.match import router as match_router
+# Routers: DB_ASYNC=true serves the same API from async routes on the async engine
+if DB_ASYNC:
+    from routers.auth_async import router as auth_router
+    from routers.profile_async import router as profile_router
+    from routers.projects_async import router as projects_router
+    from routers.match_async import router as match_router
+else:
+    from routers.auth import router as auth_router
+    from routers.profile import router as profile_router
+    from routers.projects import router as projects_router
+    from routers.match import router as match_router
+from utils.match import ai_readiness, start_ai_preload
+from utils.scoring_worker import ScoringWorker
+from utils.search import ensure_search_index
+from utils.inference import inference_executor
+from utils.auth import password_executor
+from utils.swipes import swipe_buffer
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry as metrics_registry
 
 # Load environment variables
 load_dotenv()
 
 # Create DB tables (Dev mode)
 models.Base.metadata.create_all(bind=engine)
+# SQLite (dev/tests): FTS5 shadow table for the /match/ search filters
+ensure_search_index(engine)
+
+# Load + warm the AI engine at startup (background thread) instead of on the
+# first /match request. Set AI_PRELOAD=false to keep the old lazy behaviour.
+AI_PRELOAD = os.getenv("AI_PRELOAD", "true").lower() == "true"
+
+# Materialize rankings into `matches` from this process. Enable it in one
+# process only, or run `python -m utils.scoring_worker` separately.
+MATCH_SCORING_WORKER = os.getenv("MATCH_SCORING_WORKER", "false").lower() == "true"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if AI_PRELOAD:
+        start_ai_preload()
+    scoring_worker = None
+    if MATCH_SCORING_WORKER:
+        scoring_worker = ScoringWorker(SessionLocal)
+        scoring_worker.start()
+    yield
+    if scoring_worker is not None:
+        scoring_worker.stop()
+    # Queued swipes are written before the database goes away
+    swipe_buffer.stop()
+    inference_executor.shutdown()
+    password_executor.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 # Build FastAPI app
 app = FastAPI(
     title="FoundMatch API",
     version="1.0.0",
     description="Investor ⇄ Entrepreneur matchmaking service powered by Hybrid AI",
+    lifespan=lifespan,
 )
 
 # CORS Configuration
@@ -53,4 +97,23 @@ def read_root():
 
 @app.get("/health", tags=["Root"])
 def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/ready", tags=["Root"])
+def readiness_check():
+    """
+    Readiness probe: 200 only once the AI engine is loaded and warmed up
+    (steady p99). /health stays a pure liveness check.
+    """
+    state = ai_readiness()
+    if not AI_PRELOAD and state["status"] == "not_started":
+        # Lazy mode: nothing to wait for
+        return {"status": "ready", "ai": state}
+    if state["status"] != "ready":
+        return JSONResponse(status_code=503, content={"status": state["status"], "ai": state})
+    return {"status": "ready", "ai": state}
+
+@app.get("/metrics", tags=["Root"], response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint (DB pool counters, histograms and gauges; per process)."""
+    return PlainTextResponse(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey, Float, Index, UniqueConstraint, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -19,6 +19,10 @@ if IS_SQLITE:
         impl = SQLITE_BLOB
         cache_ok = True
 
+        def __init__(self, *args, as_uuid=True, **kwargs):
+            # Same signature as PG_UUID; values are always uuid.UUID here
+            super().__init__(*args, **kwargs)
+
         def process_bind_param(self, value, dialect):
             if value is None:
                 return None
@@ -76,8 +80,28 @@ class Profile(Base):
     role = Column(String(20), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Scoring worker bookkeeping: when this profile's own ranking was last
+    # materialized and by which model version. Kept on the profile, not only on
+    # its matches rows, so a ranking with no rows still counts as done.
+    ranked_at = Column(DateTime(timezone=True), nullable=True)
+    ranking_version = Column(String(32), nullable=True)
+    # New or changed: still to be entered into the other side's rankings
+    candidate_pending = Column(Boolean, nullable=False, default=False)
+
     user = relationship("User", back_populates="profile")
-    matches = relationship("Match", back_populates="profile", cascade="all, delete")
+    matches = relationship(
+        "Match", back_populates="profile",
+        foreign_keys="Match.profile_id", cascade="all, delete"
+    )
+
+
+# Candidate scans (role = ?) and the scoring worker's id-ordered batches
+Index("ix_profiles_role_id", Profile.role, Profile.id)
+# The scoring worker's insert-candidate queue: only pending profiles are indexed
+Index(
+    "ix_profiles_candidate_pending", Profile.id,
+    postgresql_where=Profile.candidate_pending, sqlite_where=Profile.candidate_pending,
+)
 
 
 class Project(Base):
@@ -99,7 +123,14 @@ class Project(Base):
 
 
 class Match(Base):
+    """
+    Materialized ranking: one row per (viewer profile, candidate profile),
+    top-N per viewer, written by utils/scoring_worker.py.
+    """
     __tablename__ = "matches"
+    __table_args__ = (
+        UniqueConstraint("profile_id", "candidate_profile_id", name="uq_matches_profile_candidate"),
+    )
 
     id = Column(Integer, primary_key=True)
     profile_id = Column(
@@ -107,6 +138,11 @@ class Match(Base):
         ForeignKey("profiles.id", ondelete="CASCADE"),
         nullable=False
     )
+    candidate_profile_id = Column(
+        Integer,
+        ForeignKey("profiles.id", ondelete="CASCADE"),
+        nullable=True
+    )
     entrepreneur_id = Column(
         GUID(as_uuid=True),
         ForeignKey("users.id", ondelete="CASCADE"),
@@ -117,10 +153,17 @@ class Match(Base):
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False
     )
-    match_score = Column(Integer, nullable=False)
+    match_score = Column(Float, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    profile = relationship("Profile", back_populates="matches")
+    # Staleness tracking: a row is served only while it is not flagged stale
+    # and was scored by the model version currently loaded.
+    model_version = Column(String(32), nullable=True)
+    scored_at = Column(DateTime(timezone=True), nullable=True)
+    is_stale = Column(Boolean, nullable=False, default=False)
+
+    profile = relationship("Profile", back_populates="matches", foreign_keys=[profile_id])
+    candidate = relationship("Profile", foreign_keys=[candidate_profile_id])
     entrepreneur = relationship(
         "User", back_populates="matches_as_entrepreneur",
         foreign_keys=[entrepreneur_id]
@@ -130,15 +173,54 @@ class Match(Base):
         foreign_keys=[investor_id]
     )
 
-    class MatchSwipe(Base):
-     __tablename__ = "match_swipes"
+
+# get_matches reads a viewer's ranking straight off this index
+Index("ix_matches_profile_score", Match.profile_id, Match.match_score.desc())
+# mark_profile_changed (rankings a profile appears in) and the ON DELETE CASCADEs
+Index("ix_matches_candidate_profile_id", Match.candidate_profile_id)
+Index("ix_matches_investor_id", Match.investor_id)
+Index("ix_matches_entrepreneur_id", Match.entrepreneur_id)
+
+
+class MatchSwipe(Base):
+    __tablename__ = "match_swipes"
+
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)     # who swiped
-    target_profile_id = Column(Integer, ForeignKey("profiles.id"), nullable=False)
+    user_id = Column(GUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)     # who swiped
+    target_profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False)
     liked = Column(Boolean, nullable=False)
     type = Column(String(20), default="swipe")  # swipe | super
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+# "Has this user swiped this profile" lookups; the second one serves the profile FK cascade
+Index("ix_match_swipes_user_target", MatchSwipe.user_id, MatchSwipe.target_profile_id)
+Index("ix_match_swipes_target_profile_id", MatchSwipe.target_profile_id)
+
+
+class ProfileEmbedding(Base):
+    """Text vector of a profile's matching text, written on create/update (utils/embeddings.py)."""
+    __tablename__ = "profile_embeddings"
+
+    profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), primary_key=True)
+    model_version = Column(String(64), nullable=False)  # encoder/backend that produced `vector`
+    text_hash = Column(String(40), nullable=False)       # sha1 of the embedded text
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)         # float32, little-endian
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ProjectEmbedding(Base):
+    """Text vector of a project's title + description."""
+    __tablename__ = "project_embeddings"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    model_version = Column(String(64), nullable=False)
+    text_hash = Column(String(40), nullable=False)
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 # Ensure tables exist
 Base.metadata.create_all(bind=engine)
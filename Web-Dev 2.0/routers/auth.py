@@ -10,14 +10,17 @@ from sqlalchemy.orm import Session
 import models
 import schemas
 from database import get_db
+from utils.inference import InferenceOverloaded
 
 # utils from utils/auth.py (replace path if needed)
 from utils.auth import (
+    check_login_password,
     get_password_hash,
-    verify_password,
+    password_executor,
     create_access_token,
-    decode_access_token,
-    get_current_user as utils_get_current_user,  # optional reuse
+    get_current_user,  # the one dependency for protected routes, re-exported for other routers
+    resolve_user,
+    revoke_token,
 )
 
 #router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -40,6 +43,34 @@ COOKIE_PATH = "/"
 COOKIE_HTTPONLY = True
 
 
+def _overloaded(e: InferenceOverloaded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, retry later",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def _hash_password_call(fn, *args):
+    """
+    bcrypt on this threadpool thread, admitted against the password executor's
+    worker slots: with all of them busy the request gets 503 + Retry-After at
+    once rather than holding its thread while it waits for a slot.
+    """
+    try:
+        return password_executor.call_here(fn, *args)
+    except InferenceOverloaded as e:
+        raise _overloaded(e)
+
+
+async def _run_password_hashing(fn, *args):
+    """_hash_password_call for the async routers (routers/auth_async.py)."""
+    try:
+        return await password_executor.run(fn, *args)
+    except InferenceOverloaded as e:
+        raise _overloaded(e)
+
+
 # -----------------------
 # Signup
 # -----------------------
@@ -47,17 +78,12 @@ COOKIE_HTTPONLY = True
 def signup(user_in: schemas.UserCreate, db: Session = Depends(get_db)) -> Any:
     """
     Create a new user. Request model: schemas.UserCreate (email, password, optional is_investor)
+    Runs in the threadpool like the other sync routes; bcrypt runs on that
+    thread, bounded by the password executor (_hash_password_call).
     """
-    existing = db.query(models.User).filter(models.User.email == user_in.email).first()
-    if existing:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-
-    hashed = get_password_hash(user_in.password)
-    new_user = models.User(email=user_in.email, hashed_password=hashed, is_investor=user_in.is_investor)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    _check_email_free(db, user_in.email)
+    hashed = _hash_password_call(get_password_hash, user_in.password)
+    return _add_user(db, user_in, hashed)
 
 
 # -----------------------
@@ -72,17 +98,49 @@ def login(
     """
     Login endpoint. Accepts form-data: username (email) + password.
     Returns JSON token OR sets HttpOnly cookie (if AUTH_USE_COOKIES=true).
+    A hash made with another BCRYPT_ROUNDS is transparently replaced.
     """
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = _user_by_email(db, form_data.username)
+    valid, new_hash = _hash_password_call(check_login_password, form_data.password, user.hashed_password if user else None)
+    _logged_in(db, user, valid, new_hash)
+    return _token_response(response, user)
+
+
+# -----------------------
+# Signup / login bodies, shared with routers/auth_async.py (run there with
+# AsyncSession.run_sync); bcrypt stays between them, on the password executor
+# -----------------------
+def _user_by_email(db: Session, email: str) -> Optional[models.User]:
+    return db.query(models.User).filter(models.User.email == email).first()
+
+
+def _check_email_free(db: Session, email: str):
+    if _user_by_email(db, email):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+
+
+def _add_user(db: Session, user_in: schemas.UserCreate, hashed: str) -> models.User:
+    new_user = models.User(email=user_in.email, hashed_password=hashed, is_investor=user_in.is_investor)
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    return new_user
+
+
+def _logged_in(db: Session, user: Optional[models.User], valid: bool, new_hash: Optional[str]):
+    """401 unless the password checked out; stores a hash made with the current BCRYPT_ROUNDS."""
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-     # routers/auth.py (inside login function)
-    print("DEBUG: login attempt, username:", form_data.username)
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
 
+
+def _token_response(response: Response, user: models.User):
     expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     token = create_access_token(subject=str(user.id), expires_delta=expires)
 
@@ -108,10 +166,15 @@ def login(
 # Logout (cookie mode)
 # -----------------------
 @router.post("/logout", status_code=status.HTTP_200_OK)
-def logout(response: Response):
+def logout(request: Request, response: Response):
     """
-    Clears the auth cookie (only meaningful when using cookie auth).
+    Clears the auth cookie (only meaningful when using cookie auth) and revokes
+    the presented token: it is refused until it expires.
     """
+    scheme, _, bearer = request.headers.get("Authorization", "").partition(" ")
+    for token in (request.cookies.get(COOKIE_NAME), bearer if scheme.lower() == "bearer" else None):
+        if token:
+            revoke_token(token)
     response.delete_cookie(key=COOKIE_NAME, path=COOKIE_PATH)
     return {"ok": True}
 
@@ -124,26 +187,7 @@ def get_current_user_from_token(token: str, db: Session) -> Optional[models.User
     Decode token and return user instance (or None).
     Useful for routes that want to accept a raw token param (UI convenience).
     """
-    user_id = decode_access_token(token)
-    if not user_id:
-        return None
-    try:
-        # SQLAlchemy 1.4+ supports db.get
-        user = db.get(models.User, user_id)  # type: ignore
-    except Exception:
-        user = db.query(models.User).filter(models.User.id == user_id).first()
-    return user
-
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
-    """
-    FastAPI dependency for protected routes using Bearer token in Authorization header.
-    Example: current_user: User = Depends(get_current_user)
-    """
-    user = get_current_user_from_token(token, db)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
-    return user
+    return resolve_user(token, db)
 
 
 # -----------------------
@@ -0,0 +1,69 @@
+# routers/auth_async.py
+# /auth routes on the async engine (DB_ASYNC=true); same API as routers/auth.py,
+# whose handler bodies run here on the request's AsyncSession (run_sync).
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+import schemas
+from database import get_async_db
+from routers.auth import (
+    _add_user,
+    _check_email_free,
+    _logged_in,
+    _run_password_hashing,
+    _token_response,
+    _user_by_email,
+    logout,
+)
+from utils.auth import (
+    check_login_password,
+    get_current_user_async,
+    get_password_hash,
+    resolve_user_async,
+)
+
+router = APIRouter(tags=["Auth"])
+
+
+@router.post("/signup", response_model=schemas.UserOut, status_code=status.HTTP_201_CREATED)
+async def signup(user_in: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)) -> Any:
+    await db.run_sync(_check_email_free, user_in.email)
+    hashed = await _run_password_hashing(get_password_hash, user_in.password)
+    return await db.run_sync(_add_user, user_in, hashed)
+
+
+@router.post("/login", response_model=schemas.Token)
+async def login(
+    response: Response,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+) -> Any:
+    user = await db.run_sync(_user_by_email, form_data.username)
+    valid, new_hash = await _run_password_hashing(check_login_password, form_data.password, user.hashed_password if user else None)
+    await db.run_sync(_logged_in, user, valid, new_hash)
+    return _token_response(response, user)
+
+
+router.post("/logout", status_code=status.HTTP_200_OK)(logout)
+
+
+@router.get("/me", response_model=schemas.UserOut, summary="Get current user (use Authorize → Bearer <token>)")
+async def get_me(current_user: models.User = Depends(get_current_user_async)) -> Any:
+    return current_user
+
+
+@router.get(
+    "/user",
+    response_model=schemas.UserOut,
+    summary="Get user by pasting raw JWT token in query",
+    description="Paste raw JWT into `token` query param (useful in the UI if you don't want to open Authorize modal).",
+)
+async def get_user_by_token(token: str = Query(..., description="Your raw JWT token"), db: AsyncSession = Depends(get_async_db)) -> Any:
+    user = await resolve_user_async(token, db)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return user
@@ -1,5 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+from sqlalchemy import case, func, insert, or_, select
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from typing import Optional
@@ -11,7 +15,33 @@ import models
 import schemas
 
 # Import our new Centralized AI Loader
-from utils.match import get_ai_engine
+from utils.match import current_model_version, get_ai_engine
+from utils.embeddings import profile_vector_plan, score_planned, store_vectors
+from utils.search import apply_text_filters
+from utils import scoring_worker
+from utils.match_cache import etag_matches, match_cache
+from utils.inference import INFERENCE_OVERLOAD_STATUS, InferenceOverloaded, inference_executor
+from utils.swipes import (
+    SWIPE_BULK_MAX,
+    SWIPE_WRITE_BEHIND,
+    SwipeBufferFull,
+    exclude_swiped,
+    existing_targets_stmt,
+    swipe_buffer,
+    swipe_rows,
+    swiped_ids,
+    swiped_ids_stmt,
+)
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    Cursor,
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    ranking_cache,
+    ranks_after,
+)
 
 
 router = APIRouter(tags=["Match"])
@@ -22,6 +52,9 @@ class SwipeIn(BaseModel):
     liked: bool
     type: str = "swipe"
 
+class SwipesIn(BaseModel):
+    swipes: List[SwipeIn] = Field(..., min_length=1, max_length=SWIPE_BULK_MAX)
+
 class AI_MatchRequest(BaseModel):
     investor_id: int
     startup_pitch: str
@@ -30,11 +63,8 @@ class AI_MatchRequest(BaseModel):
 
 # --- ENDPOINTS ---
 
-@router.post("/score")
-async def get_ai_match_score(req: AI_MatchRequest):
-    """
-    Returns a match percentage (0-100%) using the Central AI Engine.
-    """
+def _score_request(req: AI_MatchRequest):
+    # Runs on the inference executor, never on the event loop
     # 1. Get the Engine (Auto-initializes if needed)
     ai_engine = get_ai_engine()
     
@@ -42,12 +72,28 @@ async def get_ai_match_score(req: AI_MatchRequest):
         raise HTTPException(status_code=500, detail="AI System Offline or Failed to Load")
         
     # 2. Predict
-    score = ai_engine.predict_match_score(
+    return ai_engine.predict_match_score(
         investor_text=req.investor_thesis,
         startup_text=req.startup_pitch,
         investor_id=req.investor_id,
         startup_id=req.startup_id
     )
+
+@router.post("/score")
+async def get_ai_match_score(req: AI_MatchRequest):
+    """
+    Returns a match percentage (0-100%) using the Central AI Engine.
+    Inference runs on a bounded executor; when it is full the request is
+    rejected with 429 (INFERENCE_OVERLOAD_STATUS) and a Retry-After header.
+    """
+    try:
+        score = await inference_executor.run(_score_request, req)
+    except InferenceOverloaded as e:
+        raise HTTPException(
+            status_code=INFERENCE_OVERLOAD_STATUS,
+            detail="AI scoring is at capacity, retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     
     # 3. Format Response
     if score > 85: rec = "Perfect Match"
@@ -63,85 +109,211 @@ async def get_ai_match_score(req: AI_MatchRequest):
 
 @router.post("/swipe", status_code=status.HTTP_200_OK)
 def swipe_target(payload: SwipeIn, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    # ensure target exists
-    target = db.query(models.Profile).filter(models.Profile.id == payload.target_id).first()
-    if not target:
-        raise HTTPException(status_code=404, detail="Target profile not found")
+    """
+    Records one swipe. With SWIPE_WRITE_BEHIND (default) the row is queued on
+    the swipe buffer and `id` is null; POST /match/swipes takes a whole burst.
+    """
+    return _swipe(db, current_user.id, payload)
 
-    swipe = models.MatchSwipe(
-        user_id=current_user.id,
-        target_profile_id=payload.target_id,
-        liked=payload.liked,
-        type=payload.type
-    )
-    db.add(swipe)
+@router.post("/swipes", status_code=status.HTTP_200_OK)
+def swipe_targets(payload: SwipesIn, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """
+    Records a burst of swipes with one existence query and one write.
+    Swipes on profiles that no longer exist are skipped and listed in
+    `missing_target_ids`.
+    """
+    return _swipe_burst(db, current_user.id, payload)
+
+
+def _record_swipes(db: Session, rows) -> Optional[List[int]]:
+    """Queues `rows` on the swipe buffer (ids unknown: None), or writes them through."""
+    if not rows:
+        return []
+    if SWIPE_WRITE_BEHIND:
+        _queue_swipes(rows)
+        _swipes_recorded(rows)
+        return None
+    ids = db.execute(_insert_swipes_stmt(), rows).scalars().all()
     db.commit()
-    db.refresh(swipe)
-    return {"status":"ok","id":swipe.id,"target_id":payload.target_id,"liked":payload.liked,"type":payload.type}
+    _swipes_recorded(rows)
+    return ids
 
 @router.get("/", response_model=schemas.MatchList)
 def get_matches(
+    request: Request,
+    response: Response,
     search: Optional[str] = None,
     domain: Optional[str] = None,
     stage: Optional[str] = None,
     role: Optional[str] = None, # Frontend sends this, we can use or ignore
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
-) -> Dict[str, List[schemas.MatchOut]]:
+) -> Dict[str, Any]:
     """
-    Retrieve matches with OPTIONAL FILTERS (Search, Domain, Stage).
+    Retrieve matches with OPTIONAL FILTERS (Search, Domain, Stage), best first,
+    `limit` per page. Pass the returned `next_cursor` to get the next page;
+    the filters of the first request stay bound to the cursor.
+
+    Served from the materialized `matches` rows (utils/scoring_worker.py) when
+    the profile's ranking is fresh and no search/domain filter is set, then
+    continued online past its top-N; otherwise scored online. Profiles the user
+    already swiped are left out (utils/swipes.py exclude_swiped). Responses are
+    cached per user (utils/match_cache.py) and carry an ETag; a matching
+    If-None-Match gets an empty 304.
     """
     # 1. Get Current User Profile
-    profile = db.query(models.Profile).filter(models.Profile.user_id == current_user.id).first()
+    profile = _viewer_profile(db, current_user.id)
+    cache_filters = {"search": search, "domain": domain, "limit": limit, "cursor": cursor}
+    page = _cached_page(profile, current_user.id, cache_filters)
+    if page is None:
+        position = _choose_ranking(db, profile.id, cursor, search, domain)
+        if _needs_ranking(position, current_user.id, limit):
+            position = _rank_candidates(db, profile, current_user.id, position)
+        payload = _page_payload(db, profile, current_user.id, position, limit)
+        page = _cache_page(profile, current_user.id, cache_filters, payload)
+    return _page_response(request, response, *page)
+
+
+# Cursor ranking id for pages read from the materialized `matches` table
+MATERIALIZED = "db"
+# Cursor version of rankings scored without the AI engine
+DEFAULT_SCORES = "default"
+
+# --- Shared by the sync and async (routers/match_async.py) routes ---
+# Functions taking a Session are the handler bodies; the async routes run them
+# with AsyncSession.run_sync, so both stacks execute the same queries.
+
+def _swipe(db: Session, user_id, payload: SwipeIn) -> Dict[str, Any]:
+    # ensure target exists
+    if db.execute(existing_targets_stmt([payload.target_id])).first() is None:
+        raise HTTPException(status_code=404, detail="Target profile not found")
+
+    ids = _record_swipes(db, swipe_rows(user_id, [payload]))
+    return {"status":"ok","id":ids[0] if ids else None,"target_id":payload.target_id,"liked":payload.liked,"type":payload.type}
+
+
+def _swipe_burst(db: Session, user_id, payload: SwipesIn) -> Dict[str, Any]:
+    alive = set(db.execute(existing_targets_stmt(s.target_id for s in payload.swipes)).scalars())
+    accepted = [s for s in payload.swipes if s.target_id in alive]
+    _record_swipes(db, swipe_rows(user_id, accepted))
+    return _swipes_payload(payload.swipes, alive)
+
+
+def _viewer_profile(db: Session, user_id) -> models.Profile:
+    profile = db.query(models.Profile).filter(models.Profile.user_id == user_id).first()
     if profile is None:
         raise HTTPException(404, "Profile not found.")
+    return profile
 
-    # 2. Determine Opposite Role (Founders see Investors, Investors see Founders)
-    # If the frontend sends a specific role filter, we can respect it, otherwise default to opposite
-    target_role = "investor" if profile.role == "founder" else "founder"
-    
-    # 3. Build the Query
-    query = db.query(models.Profile).filter(models.Profile.role == target_role)
 
-    # --- APPLY FILTERS ---
-    if search:
-        # Search by Name (Case insensitive)
-        query = query.filter(models.Profile.full_name.ilike(f"%{search}%"))
-    
-    if domain:
-        # Simple text match for domain/interests
-        # Note: In a real app, you might split commas. Here we check if the string exists.
-        query = query.filter(models.Profile.interests.ilike(f"%{domain}%"))
+def _target_role(profile: models.Profile) -> str:
+    return "investor" if profile.role == "founder" else "founder"
 
-    # Execute Query
-    candidates = query.all()
 
-    # 4. Score & Return (Using AI Engine if available, or fallback)
-    matches = []
-    # Try to load AI engine (fail gracefully if not set up yet)
+def _cached_page(profile: models.Profile, user_id, cache_filters):
+    """(etag, payload) from the match cache; its next cursor works with or without the ranking."""
+    return match_cache.get(user_id, _target_role(profile), cache_filters, current_model_version())
+
+
+def _cache_page(profile: models.Profile, user_id, cache_filters, payload):
+    # Version read again: the first request may have loaded the engine
+    return match_cache.put(user_id, _target_role(profile), cache_filters, current_model_version(), payload), payload
+
+
+def _page_response(request: Request, response: Response, etag: str, payload):
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return payload
+
+
+def _choose_ranking(db: Session, profile_id: int, cursor: Optional[str], search, domain) -> Cursor:
+    """
+    Position of this request: the cursor's, the materialized ranking if
+    fresh, or a ranking_id of None when it must be scored online. Filtered
+    requests are always scored online: a match outside the stored top-N
+    would not be found.
+    """
+    position = _resolve_cursor(cursor, search, domain)
+    if position.ranking_id is None and not position.filters and _has_fresh_ranking(db, profile_id):
+        position = position._replace(ranking_id=MATERIALIZED)
+    return position
+
+
+def _needs_ranking(position: Cursor, user_id, limit: int) -> bool:
+    """
+    An online page this process does not hold: a first page, or a cursor whose
+    ranking another worker built, or was evicted / expired / paged past.
+    """
+    return position.ranking_id != MATERIALIZED and not ranking_cache.covers(position.ranking_id, user_id, position.offset, limit)
+
+
+def _page_payload(db: Session, profile: models.Profile, user_id, position: Cursor, limit: int):
+    """One page at `position` as the JSON-ready response body."""
+    search, domain = position.filters.get("search"), position.filters.get("domain")
+    ranking_id = position.ranking_id
+    if ranking_id == MATERIALIZED:
+        rows = db.execute(_materialized_stmt(db, profile.id, user_id, search, domain, position.offset, limit)).all()
+        scored, next_offset = _materialized_page(rows, position.offset, limit)
+        version, last = None, (scored[-1][1], scored[-1][0].id) if scored else None
+        if next_offset is None and last is not None and _materialized_is_cut(db, profile.id):
+            # Past the stored top-N: the rest is ranked online, from the row after the last one
+            ranking_id, next_offset = uuid.uuid4().hex, position.offset + len(scored)
+    else:
+        rows, next_offset, version = _ranked_page(ranking_id, user_id, position.offset, limit)
+        scored = _load_page(db.execute(_page_profiles_stmt(rows)).scalars(), rows)
+        last = (rows[-1][1], rows[-1][0]) if rows else None
+    next_cursor = None
+    if next_offset is not None:
+        next_cursor = encode_cursor(ranking_id, next_offset, position.filters, version, last)
+    return jsonable_encoder(_matches_payload(profile, scored, next_cursor))
+
+
+def _queue_swipes(rows):
     try:
-        from utils.match import get_ai_engine
-        ai_engine = get_ai_engine()
-    except:
-        ai_engine = None
+        swipe_buffer.add(rows)
+    except SwipeBufferFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Swipes are not being written right now, retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
-    my_text = profile.interests if profile.interests else "General"
 
-    for candidate in candidates:
-        cand_text = candidate.interests if candidate.interests else "General"
-        
-        # Calculate AI Score
-        score = 50.0 # Default
-        if ai_engine:
-            try:
-                # Map IDs based on roles
-                if profile.role == "founder":
-                    score = ai_engine.predict_match_score(cand_text, my_text, candidate.id, profile.id)
-                else:
-                    score = ai_engine.predict_match_score(my_text, cand_text, profile.id, candidate.id)
-            except:
-                pass # Keep default if AI fails
+def _swipes_recorded(rows):
+    # Swiped profiles leave this user's match pages right away, queued or not
+    user_id = rows[0]["user_id"]
+    if swiped_ids is not None:
+        swiped_ids.record(user_id, [r["target_profile_id"] for r in rows])
+    match_cache.invalidate_user(user_id)
+
+
+def _insert_swipes_stmt():
+    # Write-through mode: ids come back in the order of the rows
+    return insert(models.MatchSwipe).returning(models.MatchSwipe.id, sort_by_parameter_order=True)
+
 
+def _swipes_payload(swipes, alive) -> Dict[str, Any]:
+    missing = sorted({s.target_id for s in swipes if s.target_id not in alive})
+    return {"status": "ok", "accepted": sum(s.target_id in alive for s in swipes), "missing_target_ids": missing}
+
+
+def _resolve_cursor(cursor: Optional[str], search: Optional[str], domain: Optional[str]) -> Cursor:
+    """The decoded cursor, or the first page with these filters; a cursor carries its own filters."""
+    if not cursor:
+        filters = {k: v for k, v in (("search", search), ("domain", domain)) if v}
+        return Cursor(None, 0, filters)
+    try:
+        return decode_cursor(cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _matches_payload(profile: models.Profile, scored, next_cursor: Optional[str]) -> Dict[str, Any]:
+    matches = []
+    for candidate, score in scored:
         matches.append({
             "profile_id": candidate.id,
             "entrepreneur_id": profile.user_id if profile.role == "founder" else candidate.user_id,
@@ -152,8 +324,156 @@ def get_matches(
             "location": candidate.location,
             "interests": candidate.interests
         })
+    return {"matches": matches, "next_cursor": next_cursor}
+
+
+def _fresh_ranking_stmt(profile_id: int):
+    """(rows, outdated rows) of the scoring worker's ranking for this profile."""
+    outdated = models.Match.is_stale.is_(True)
+    model_version = current_model_version()
+    if model_version is not None:
+        # Rows scored by another model version are not served
+        outdated = or_(outdated, models.Match.model_version.is_(None), models.Match.model_version != model_version)
+    return select(
+        func.count(models.Match.id),
+        func.count(case((outdated, 1))),
+    ).where(models.Match.profile_id == profile_id, models.Match.candidate_profile_id.isnot(None))
+
+
+def _has_fresh_ranking(db: Session, profile_id: int) -> bool:
+    """True if the scoring worker has rows for this profile and none of them is stale."""
+    n_rows, n_outdated = db.execute(_fresh_ranking_stmt(profile_id)).one()
+    return bool(n_rows) and not n_outdated
+
+
+def _materialized_stmt(db, profile_id: int, user_id, search: Optional[str], domain: Optional[str], offset: int, limit: int):
+    """One page of the stored ranking: a single query on ix_matches_profile_score."""
+    stmt = (
+        select(models.Profile, models.Match.match_score)
+        .join(models.Match, models.Match.candidate_profile_id == models.Profile.id)
+        .where(models.Match.profile_id == profile_id)
+    )
+    # Profiles swiped since the ranking was materialized
+    stmt = exclude_swiped(stmt, user_id)
+    # Search by Name / domain in interests (case-insensitive substring, indexed per dialect)
+    stmt = apply_text_filters(db, stmt, search, domain)
+    return (
+        stmt.order_by(models.Match.match_score.desc(), models.Match.candidate_profile_id)
+        .offset(offset)
+        .limit(limit + 1)  # One extra row tells us whether there is a next page
+    )
+
+
+def _materialized_is_cut(db: Session, profile_id: int) -> bool:
+    """True if the stored ranking is full (top-N): candidates may rank below its last row."""
+    stored = db.scalar(select(func.count(models.Match.id)).where(
+        models.Match.profile_id == profile_id, models.Match.candidate_profile_id.isnot(None)))
+    return stored >= scoring_worker.TOP_N
+
+
+def _materialized_page(rows, offset: int, limit: int):
+    next_offset = offset + limit if len(rows) > limit else None
+    return [(candidate, score) for candidate, score in rows[:limit]], next_offset
+
+
+def _ranked_page(ranking_id: str, user_id, offset: int, limit: int):
+    # Later pages come from the ranked order cached by the first request
+    # (or rebuilt by _rank_candidates just before)
+    page = ranking_cache.page(ranking_id, user_id, offset, limit)
+    if page is None:
+        raise HTTPException(status_code=400, detail="Cursor expired, request the first page again")
+    return page
+
+
+def _page_profiles_stmt(rows):
+    # Only the profiles on this page are loaded in full
+    return select(models.Profile).where(models.Profile.id.in_([cand_id for cand_id, _ in rows]))
+
+
+def _load_page(profiles, rows):
+    by_id = {p.id: p for p in profiles}
+    # Profiles deleted since the ranking was computed are skipped
+    return [(by_id[cand_id], score) for cand_id, score in rows if cand_id in by_id]
+
+
+def _rank_candidates(db: Session, profile: models.Profile, user_id, position: Cursor) -> Cursor:
+    """Scores every candidate for `profile` and caches the ranking from `position` on; returns where it was put."""
+    candidates = _candidate_rows(db, profile, user_id, position.filters.get("search"), position.filters.get("domain"))
+
+    # 4. Score all candidates in one vectorized pass (AI Engine if available, or fallback).
+    # Text vectors come from profile_embeddings; only new/changed texts are encoded.
+    scores = [50.0] * len(candidates)  # Default
+
+    scored_by = DEFAULT_SCORES
+    ai_engine = get_ai_engine()
+    if ai_engine and candidates:
+        plan = profile_vector_plan(db, [profile, *candidates], ai_engine.text_model_version)
+        try:
+            scores = score_planned(plan, profile, candidates, ai_engine)
+            scored_by = ai_engine.model_version
+        except Exception as e:
+            print(f"[Match] WARNING: AI scoring failed, using default scores: {e}")
+        else:
+            _keep_vectors(db, plan)
+
+    return _keep_ranking(user_id, position, [c.id for c in candidates], scores, scored_by)
+
+
+def _keep_vectors(db: Session, plan):
+    """Commits the vectors encoded on the way; the ranking is served either way."""
+    try:
+        store_vectors(db, plan)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[Match] WARNING: encoded vectors not stored, they will be encoded again: {e}")
+
+
+def _keep_ranking(user_id, position: Cursor, candidate_ids, scores, scored_by: str) -> Cursor:
+    """
+    Caches a fresh ranking at `position`. A cursor's ranking is rebuilt from
+    the row after its last one, and only by the version that scored it:
+    another model orders candidates differently, so its pages would repeat
+    or skip profiles.
+    """
+    if position.version is not None and position.version != scored_by:
+        raise HTTPException(status_code=400, detail="Cursor expired, request the first page again")
+    kept = ranks_after(candidate_ids, scores, position.after)
+    ranking_id = ranking_cache.put(
+        user_id, [candidate_ids[i] for i in kept], [scores[i] for i in kept], scored_by,
+        start=position.offset, ranking_id=position.ranking_id,
+    )
+    return position._replace(ranking_id=ranking_id)
+
+
+def _candidate_rows(db: Session, profile: models.Profile, user_id, search: Optional[str], domain: Optional[str]):
+    """(id, interests) of every profile `profile` may be matched with, not swiped yet."""
+    # 2. Determine Opposite Role (Founders see Investors, Investors see Founders)
+    target_role = _target_role(profile)
+
+    # 3. Build the Query (only the columns scoring needs)
+    # (in id order: rankings break ties by id, see utils/pagination.ranks_after)
+    query = db.query(models.Profile.id, models.Profile.interests).filter(models.Profile.role == target_role).order_by(models.Profile.id)
+    query = apply_text_filters(db, query, search, domain)
+
+    # Already-swiped profiles are never scored: filtered by the in-memory set
+    # when enabled (SWIPED_IDS_CACHE), else anti-joined in the query
+    swiped = _swiped_ids(db, user_id)
+    if swiped is None:
+        query = exclude_swiped(query, user_id)
+
+    # Execute Query
+    candidates = query.all()
+    if swiped:
+        candidates = [c for c in candidates if c.id not in swiped]
+    return candidates
 
-    # Sort by score
-    matches.sort(key=lambda x: x["match_score"], reverse=True)
 
-    return {"matches": matches}
\ No newline at end of file
+def _swiped_ids(db: Session, user_id):
+    if swiped_ids is None:
+        return None
+    ids = swiped_ids.get(user_id)
+    if ids is None:
+        swiped_ids.put(user_id, db.execute(swiped_ids_stmt(user_id)).scalars())
+        ids = swiped_ids.get(user_id)  # Still None for users with very many swipes
+    return ids
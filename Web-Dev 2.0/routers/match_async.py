@@ -0,0 +1,105 @@
+# routers/match_async.py
+# /match routes on the async engine (DB_ASYNC=true); same API as routers/match.py.
+# The handler bodies are the sync router's, run on this request's AsyncSession
+# with run_sync. Online scoring (CPU-bound) is the one step that leaves the
+# event loop: it runs on the inference executor and touches no session.
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+import schemas
+from database import get_async_db
+from routers.match import (
+    DEFAULT_SCORES,
+    SwipeIn,
+    SwipesIn,
+    _cache_page,
+    _cached_page,
+    _candidate_rows,
+    _choose_ranking,
+    _keep_ranking,
+    _keep_vectors,
+    _needs_ranking,
+    _page_payload,
+    _page_response,
+    _swipe,
+    _swipe_burst,
+    _viewer_profile,
+    get_ai_match_score,
+)
+from utils.auth import get_current_user_async
+from utils.embeddings import profile_vector_plan, score_planned
+from utils.inference import INFERENCE_OVERLOAD_STATUS, InferenceOverloaded, inference_executor
+from utils.match import current_model_version, get_ai_engine
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Cursor
+
+router = APIRouter(tags=["Match"])
+
+router.post("/score")(get_ai_match_score)
+
+
+@router.post("/swipe", status_code=status.HTTP_200_OK)
+async def swipe_target(payload: SwipeIn, db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(get_current_user_async)):
+    return await db.run_sync(_swipe, current_user.id, payload)
+
+
+@router.post("/swipes", status_code=status.HTTP_200_OK)
+async def swipe_targets(payload: SwipesIn, db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(get_current_user_async)):
+    return await db.run_sync(_swipe_burst, current_user.id, payload)
+
+
+@router.get("/", response_model=schemas.MatchList)
+async def get_matches(
+    request: Request,
+    response: Response,
+    search: Optional[str] = None,
+    domain: Optional[str] = None,
+    stage: Optional[str] = None,
+    role: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+) -> Dict[str, Any]:
+    profile = await db.run_sync(_viewer_profile, current_user.id)
+    cache_filters = {"search": search, "domain": domain, "limit": limit, "cursor": cursor}
+    page = _cached_page(profile, current_user.id, cache_filters)
+    if page is None:
+        position = await db.run_sync(_choose_ranking, profile.id, cursor, search, domain)
+        if _needs_ranking(position, current_user.id, limit):
+            try:
+                position = await _rank_candidates(db, profile, current_user.id, position)
+            except InferenceOverloaded as e:
+                raise HTTPException(
+                    status_code=INFERENCE_OVERLOAD_STATUS,
+                    detail="AI scoring is at capacity, retry later",
+                    headers={"Retry-After": str(e.retry_after)},
+                )
+        payload = await db.run_sync(_page_payload, profile, current_user.id, position, limit)
+        page = _cache_page(profile, current_user.id, cache_filters, payload)
+    return _page_response(request, response, *page)
+
+
+async def _rank_candidates(db: AsyncSession, profile: models.Profile, user_id, position: Cursor) -> Cursor:
+    """routers/match._rank_candidates with the encode + scoring pass on the inference executor."""
+    candidates = await db.run_sync(_candidate_rows, profile, user_id, position.filters.get("search"), position.filters.get("domain"))
+    scores = [50.0] * len(candidates)  # Default
+    scored_by = DEFAULT_SCORES
+
+    # Loading the engine takes seconds: only a loaded one is fetched on the loop
+    ai_engine = get_ai_engine() if current_model_version() is not None else await inference_executor.run(get_ai_engine)
+    if ai_engine and candidates:
+        plan = await db.run_sync(profile_vector_plan, [profile, *candidates], ai_engine.text_model_version)
+        try:
+            scores = await inference_executor.run(score_planned, plan, profile, candidates, ai_engine)
+            scored_by = ai_engine.model_version
+        except InferenceOverloaded:
+            raise
+        except Exception as e:
+            print(f"[Match] WARNING: AI scoring failed, using default scores: {e}")
+        else:
+            await db.run_sync(_keep_vectors, plan)
+
+    return _keep_ranking(user_id, position, [c.id for c in candidates], scores, scored_by)
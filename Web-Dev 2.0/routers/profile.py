@@ -6,6 +6,9 @@ from sqlalchemy.orm import Session
 import models, schemas
 from database import get_db
 from utils.auth import get_current_user
+from utils.scoring_worker import mark_profile_changed
+from utils.embeddings import embed_in_background
+from utils.match_cache import match_cache
 
 #router = APIRouter(prefix="/profile", tags=["Profile"],)
 router = APIRouter(
@@ -25,21 +28,7 @@ def create_profile(
     """
     Create a profile for the authenticated user.
     """
-    # Prevent duplicate profiles
-    if db.query(models.Profile).filter_by(user_id=current_user.id).first():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Profile already exists"
-        )
-
-    new_profile = models.Profile(
-        user_id=current_user.id,
-        **profile_in.dict()
-    )
-    db.add(new_profile)
-    db.commit()
-    db.refresh(new_profile)
-    return new_profile
+    return _create_profile(db, current_user.id, profile_in)
 
 
 @router.get(
@@ -54,13 +43,7 @@ def read_own_profile(
     """
     Retrieve the authenticated user's profile.
     """
-    profile = db.query(models.Profile).filter_by(user_id=current_user.id).first()
-    if not profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Profile not found"
-        )
-    return profile
+    return _own_profile(db, current_user.id)
 
 
 @router.put(
@@ -77,18 +60,58 @@ def update_profile(
     Update fields of the authenticated user's profile.
     Only fields provided will be changed.
     """
-    db_profile = db.query(models.Profile).filter_by(user_id=current_user.id).first()
-    if not db_profile:
+    return _update_profile(db, current_user.id, profile_in)
+
+
+# --- Handler bodies, shared with routers/profile_async.py (run there with AsyncSession.run_sync) ---
+
+def _own_profile(db: Session, user_id) -> models.Profile:
+    profile = db.query(models.Profile).filter_by(user_id=user_id).first()
+    if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Profile not found"
         )
+    return profile
+
+
+def _create_profile(db: Session, user_id, profile_in: schemas.ProfileCreate) -> models.Profile:
+    # Prevent duplicate profiles
+    if db.query(models.Profile).filter_by(user_id=user_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Profile already exists"
+        )
+
+    new_profile = models.Profile(
+        user_id=user_id,
+        **profile_in.dict()
+    )
+    db.add(new_profile)
+    db.flush()
+    # Queued as a candidate for the opposite-role rankings (utils/scoring_worker.py)
+    mark_profile_changed(db, new_profile, created=True)
+    db.commit()
+    match_cache.invalidate_profile(user_id, new_profile.role)
+    embed_in_background(models.Profile, new_profile.id)
+    db.refresh(new_profile)
+    return new_profile
+
+
+def _update_profile(db: Session, user_id, profile_in: schemas.ProfileUpdate) -> models.Profile:
+    db_profile = _own_profile(db, user_id)
 
     # Apply only supplied updates
     update_data = profile_in.dict(exclude_unset=True)
+    old_role = db_profile.role
     for field, value in update_data.items():
         setattr(db_profile, field, value)
 
+    if update_data:
+        mark_profile_changed(db, db_profile)
     db.commit()
+    if update_data:
+        match_cache.invalidate_profile(user_id, old_role, db_profile.role)
+        embed_in_background(models.Profile, db_profile.id)
     db.refresh(db_profile)
     return db_profile
@@ -0,0 +1,52 @@
+# routers/profile_async.py
+# /profile routes on the async engine (DB_ASYNC=true); same API as routers/profile.py,
+# whose handler bodies run here on the request's AsyncSession (run_sync).
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models, schemas
+from database import get_async_db
+from routers.profile import _create_profile, _own_profile, _update_profile
+from utils.auth import get_current_user_async
+
+router = APIRouter(
+    tags=["Profile"],
+)
+
+
+@router.post(
+    "/",
+    response_model=schemas.ProfileOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_profile(
+    profile_in: schemas.ProfileCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+):
+    return await db.run_sync(_create_profile, current_user.id, profile_in)
+
+
+@router.get(
+    "/me",
+    response_model=schemas.ProfileOut,
+    status_code=status.HTTP_200_OK,
+)
+async def read_own_profile(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+):
+    return await db.run_sync(_own_profile, current_user.id)
+
+
+@router.put(
+    "/",
+    response_model=schemas.ProfileOut,
+    status_code=status.HTTP_200_OK,
+)
+async def update_profile(
+    profile_in: schemas.ProfileUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+):
+    return await db.run_sync(_update_profile, current_user.id, profile_in)
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 import schemas, models
 from database import get_db
 from routers.auth import get_current_user
+from utils.embeddings import embed_in_background
 
 #router = APIRouter(prefix="/projects", tags=["Projects"])
 router = APIRouter(tags=["Projects"])
@@ -15,15 +16,50 @@ def create_project(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
+    return _create_project(db, current_user.id, project)
+
+@router.put("/{project_id}", response_model=schemas.ProjectOut)
+def update_project(
+    project_id: int,
+    project_in: schemas.ProjectUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Update fields of one of the authenticated user's projects."""
+    return _update_project(db, current_user.id, project_id, project_in)
+
+@router.get("/", response_model=list[schemas.ProjectOut])
+def list_projects(db: Session = Depends(get_db)):
+    return _list_projects(db)
+
+
+# --- Handler bodies, shared with routers/projects_async.py (run there with AsyncSession.run_sync) ---
+
+def _create_project(db: Session, user_id, project: schemas.ProjectCreate) -> models.Project:
     new_proj = models.Project(
-        user_id=current_user.id,
+        user_id=user_id,
         **project.dict()
     )
     db.add(new_proj)
     db.commit()
+    embed_in_background(models.Project, new_proj.id)
     db.refresh(new_proj)
     return new_proj
 
-@router.get("/", response_model=list[schemas.ProjectOut])
-def list_projects(db: Session = Depends(get_db)):
-    return db.query(models.Project).all()
\ No newline at end of file
+def _update_project(db: Session, user_id, project_id: int, project_in: schemas.ProjectUpdate) -> models.Project:
+    db_proj = db.get(models.Project, project_id)
+    if db_proj is None or db_proj.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    update_data = project_in.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_proj, field, value)
+    db.commit()
+    if update_data:
+        # Re-encoded only if title/description changed (text hash)
+        embed_in_background(models.Project, db_proj.id)
+    db.refresh(db_proj)
+    return db_proj
+
+def _list_projects(db: Session):
+    return db.query(models.Project).all()
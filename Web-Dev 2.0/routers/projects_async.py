@@ -0,0 +1,35 @@
+# routers/projects_async.py
+# /projects routes on the async engine (DB_ASYNC=true); same API as routers/projects.py,
+# whose handler bodies run here on the request's AsyncSession (run_sync).
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import schemas, models
+from database import get_async_db
+from routers.projects import _create_project, _list_projects, _update_project
+from utils.auth import get_current_user_async
+
+router = APIRouter(tags=["Projects"])
+
+
+@router.post("/", response_model=schemas.ProjectOut)
+async def create_project(
+    project: schemas.ProjectCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+):
+    return await db.run_sync(_create_project, current_user.id, project)
+
+@router.put("/{project_id}", response_model=schemas.ProjectOut)
+async def update_project(
+    project_id: int,
+    project_in: schemas.ProjectUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+):
+    """Update fields of one of the authenticated user's projects."""
+    return await db.run_sync(_update_project, current_user.id, project_id, project_in)
+
+@router.get("/", response_model=list[schemas.ProjectOut])
+async def list_projects(db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(_list_projects)
@@ -65,6 +65,12 @@ class ProjectBase(BaseModel):
 class ProjectCreate(ProjectBase):
     pass
 
+class ProjectUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    domain: Optional[str] = None
+    funding_goal: Optional[int] = None
+
 class ProjectOut(ProjectBase):
     id: int
     user_id: UUID
@@ -93,6 +99,7 @@ class MatchOut(BaseModel):
 
 class MatchList(BaseModel):
     matches: List[MatchOut]
+    next_cursor: Optional[str] = None  # Opaque; pass back as ?cursor= for the next page
 
 # --- Swipe Schemas ---
 class SwipeIn(BaseModel):
@@ -0,0 +1,134 @@
+# scripts/bench_db_async.py
+# Throughput of ONE API worker with the sync routers (threadpool) vs the async
+# routers (DB_ASYNC=true) at high concurrency, on read-heavy authenticated routes.
+#
+#   python scripts/bench_db_async.py --concurrency 50 200 --duration 10
+#   python scripts/bench_db_async.py --url postgresql://user:pw@host/db   # asyncpg must be installed
+#
+# The response caches are disabled so every request reaches the database.
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTES = ["/auth/me", "/profile/me", "/projects/"]
+
+
+def start_server(port, db_url, async_mode):
+    env = dict(
+        os.environ,
+        DATABASE_URL=db_url,
+        DB_ASYNC="true" if async_mode else "false",
+        AI_PRELOAD="false",
+        MATCH_SCORING_WORKER="false",
+        AUTH_CACHE_TTL_SECONDS="0",
+        MATCH_CACHE_BACKEND="none",
+        BCRYPT_ROUNDS="4",  # Seeding only; logins are not measured here
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--workers", "1"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if httpx.get(base + "/health", timeout=2).status_code == 200:
+                return proc, base
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    os.killpg(proc.pid, signal.SIGTERM)
+    raise RuntimeError("server did not start")
+
+
+async def seed(client, n_users):
+    headers = []
+    for i in range(n_users):
+        email = f"bench-async-{i}@example.com"
+        await client.post("/auth/signup", json={"email": email, "password": "BenchPass123!", "is_investor": i % 2 == 0})
+        r = await client.post("/auth/login", data={"username": email, "password": "BenchPass123!"})
+        h = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        await client.post("/profile/", headers=h, json={
+            "full_name": f"Bench {i}", "bio": "bench", "location": "City",
+            "interests": "ai,fintech", "role": "investor" if i % 2 == 0 else "founder",
+        })
+        headers.append(h)
+    return headers
+
+
+async def load(client, headers, concurrency, duration):
+    latencies, errors = [], 0
+    stop = time.perf_counter() + duration
+
+    async def user_loop(i):
+        nonlocal errors
+        h = headers[i % len(headers)]
+        n = i
+        while time.perf_counter() < stop:
+            route = ROUTES[n % len(ROUTES)]
+            n += 1
+            start = time.perf_counter()
+            try:
+                r = await client.get(route, headers=h)
+                ok = r.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user_loop(i) for i in range(concurrency)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "req_s": len(latencies) / wall,
+        "p50": statistics.median(latencies) * 1000 if latencies else float("nan"),
+        "p99": latencies[int(0.99 * (len(latencies) - 1))] * 1000 if latencies else float("nan"),
+        "errors": errors,
+    }
+
+
+async def run_mode(base, concurrency_levels, duration, n_users):
+    limits = httpx.Limits(max_connections=max(concurrency_levels), max_keepalive_connections=max(concurrency_levels))
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as client:
+        headers = await seed(client, n_users)
+        return [(c, await load(client, headers, c, duration)) for c in concurrency_levels]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None, help="Database URL (default: a scratch SQLite file per mode)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    print(f"{'mode':<7}{'conc':>6}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for async_mode in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_url = args.url or f"sqlite:///{os.path.join(tmp, 'bench_async.db')}"
+            proc, base = start_server(args.port, db_url, async_mode)
+            try:
+                results = asyncio.run(run_mode(base, args.concurrency, args.duration, args.users))
+            finally:
+                os.killpg(proc.pid, signal.SIGTERM)
+                proc.wait(30)
+        for concurrency, r in results:
+            print(f"{'async' if async_mode else 'sync':<7}{concurrency:>6}{r['req_s']:>9.1f}{r['p50']:>10.1f}"
+                  f"{r['p99']:>10.1f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# scripts/bench_hot_queries.py
+# Query plans and latencies of every query issued by routers/profile.py and
+# routers/match.py, on large synthetic tables, with and without the hot-path
+# indexes of migration e3f7b2a9c416.
+#
+#   python scripts/bench_hot_queries.py --profiles 300000                       # SQLite
+#   python scripts/bench_hot_queries.py --url postgresql://... --profiles 1000000
+#   python scripts/bench_hot_queries.py --profiles 300000 --out plans.json     # keep the plans
+#
+# Writes (mark_profile_changed) run inside a transaction that is rolled back.
+# Without the indexes the swipe anti-join scans match_swipes once per candidate,
+# so the "without" pass grows quadratically: keep --profiles modest (~10k) for it.
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HOT_PATH_INDEXES = [
+    "ix_profiles_role_id",
+    "ix_matches_candidate_profile_id",
+    "ix_matches_investor_id",
+    "ix_matches_entrepreneur_id",
+    "ix_match_swipes_user_target",
+    "ix_match_swipes_target_profile_id",
+]
+DOMAINS = ["ai", "fintech", "healthtech", "climate", "edtech", "biotech", "saas", "robotics"]
+
+
+def seed(db, models, n_profiles, ranked_viewers, top_n, swipes_per_user, chunk=20000):
+    from sqlalchemy import insert
+
+    rng = random.Random(0)
+    print(f"Seeding {n_profiles} profiles...")
+    start = time.perf_counter()
+    roles = {}
+    for lo in range(0, n_profiles, chunk):
+        users, profiles = [], []
+        for i in range(lo, min(lo + chunk, n_profiles)):
+            uid = uuid.UUID(int=i + 1)
+            role = "investor" if i % 3 else "founder"
+            roles[i + 1] = role
+            users.append({"id": uid, "email": f"hot{i}@example.com", "hashed_password": "x", "is_investor": role == "investor"})
+            profiles.append({
+                "id": i + 1, "user_id": uid, "full_name": f"Bench User {i}", "bio": "", "location": "City",
+                "interests": ",".join(rng.sample(DOMAINS, 3)), "role": role,
+            })
+        db.execute(insert(models.User), users)
+        db.execute(insert(models.Profile), profiles)
+        db.commit()
+
+    founders = [pid for pid, r in roles.items() if r == "founder"]
+    investors = [pid for pid, r in roles.items() if r == "investor"]
+    print(f"Seeding rankings for {ranked_viewers} viewers x {top_n} and {swipes_per_user} swipes each...")
+    rows, swipes = [], []
+    for viewer in range(1, ranked_viewers + 1):
+        pool = investors if roles[viewer] == "founder" else founders
+        for rank, cand in enumerate(rng.sample(pool, min(top_n, len(pool)))):
+            founder, investor = (viewer, cand) if roles[viewer] == "founder" else (cand, viewer)
+            rows.append({
+                "profile_id": viewer, "candidate_profile_id": cand,
+                "entrepreneur_id": uuid.UUID(int=founder), "investor_id": uuid.UUID(int=investor),
+                "match_score": 100.0 - rank * 0.1, "model_version": None, "is_stale": False,
+            })
+        for target in rng.sample(pool, min(swipes_per_user, len(pool))):
+            swipes.append({"user_id": uuid.UUID(int=viewer), "target_profile_id": target, "liked": rng.random() < 0.5, "type": "swipe"})
+        if len(rows) >= chunk:
+            db.execute(insert(models.Match), rows)
+            db.execute(insert(models.MatchSwipe), swipes)
+            db.commit()
+            rows, swipes = [], []
+    if rows:
+        db.execute(insert(models.Match), rows)
+    if swipes:
+        db.execute(insert(models.MatchSwipe), swipes)
+    db.commit()
+    print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+
+def hot_queries(db, models):
+    """(name, statement, is_write) for every query the two routers send, in request order."""
+    from sqlalchemy import func, or_, select, update
+
+    from routers.match import _fresh_ranking_stmt, _materialized_stmt, _page_profiles_stmt
+    from utils.swipes import exclude_swiped
+
+    viewer = db.get(models.Profile, 1)  # A founder with a materialized ranking
+    target = db.execute(
+        select(models.Match.candidate_profile_id).where(models.Match.profile_id == viewer.id).limit(1)
+    ).scalar()
+    page = [(pid, 0.0) for pid in range(2, 42, 2)]
+    stale = {models.Match.is_stale: True}
+    viewer_chunk = list(range(2, 1002, 2))  # INSERT_CHUNK ids
+    return [
+        # profile.py (create / read / update) and match.py get_matches
+        ("profile by user_id", select(models.Profile).where(models.Profile.user_id == viewer.user_id), False),
+        # profile.py update -> mark_profile_changed
+        ("mark changed (update)", update(models.Match).where(or_(
+            models.Match.profile_id == viewer.id, models.Match.candidate_profile_id == viewer.id)).values(stale), True),
+        # scoring worker, insert_candidate: ranking size and N-th score of a chunk of viewers
+        ("N-th score per viewer", select(
+            models.Match.profile_id, func.count(models.Match.id), func.min(models.Match.match_score)
+        ).where(models.Match.profile_id.in_(viewer_chunk)).group_by(models.Match.profile_id), False),
+        # match.py get_matches
+        ("fresh ranking check", _fresh_ranking_stmt(viewer.id), False),
+        ("materialized page", _materialized_stmt(db, viewer.id, viewer.user_id, None, None, 0, 20), False),
+        ("materialized page, domain", _materialized_stmt(db, viewer.id, viewer.user_id, None, "fintech", 0, 20), False),
+        ("online candidates (role)", exclude_swiped(
+            select(models.Profile.id, models.Profile.interests).where(models.Profile.role == "investor"), viewer.user_id), False),
+        ("page profiles", _page_profiles_stmt(page), False),
+        # match.py swipe
+        ("swipe target", select(models.Profile).where(models.Profile.id == target), False),
+        ("swipe exists", select(models.MatchSwipe.id).where(
+            models.MatchSwipe.user_id == viewer.user_id, models.MatchSwipe.target_profile_id == target), False),
+    ]
+
+
+def captured_sql(db, stmt):
+    """The SQL + parameters the driver actually receives for `stmt`."""
+    from sqlalchemy import event
+
+    seen = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        seen.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        db.execute(stmt)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+        db.rollback()
+    return seen[-1]
+
+
+def explain(db, stmt):
+    statement, parameters = captured_sql(db, stmt)
+    conn = db.connection()
+    dialect = conn.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN ANALYZE "
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        db.rollback()
+    if dialect == "sqlite":
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+def time_stmt(db, stmt, is_write, repeat):
+    lat = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = db.execute(stmt)
+        if not is_write:
+            result.all()
+        lat.append((time.perf_counter() - start) * 1000)
+        db.rollback()
+    lat.sort()
+    return statistics.median(lat), lat[int(0.99 * (len(lat) - 1))]
+
+
+def set_indexes(db, models, present):
+    tables = models.Base.metadata.tables
+    bind = db.get_bind()
+    for table in tables.values():
+        for index in table.indexes:
+            if index.name in HOT_PATH_INDEXES:
+                if present:
+                    index.create(bind, checkfirst=True)
+                else:
+                    index.drop(bind, checkfirst=True)
+    if bind.dialect.name == "sqlite":
+        with bind.begin() as conn:
+            from sqlalchemy import text
+            conn.execute(text("ANALYZE"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="sqlite:///./bench_hot_queries.db")
+    parser.add_argument("--profiles", type=int, default=300_000)
+    parser.add_argument("--ranked-viewers", type=int, default=2000, help="Viewers with a materialized ranking")
+    parser.add_argument("--top-n", type=int, default=200)
+    parser.add_argument("--swipes", type=int, default=50, help="Swipes per ranked viewer")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--reseed", action="store_true", help="Drop and reseed the tables")
+    parser.add_argument("--out", help="Write plans and latencies as JSON")
+    args = parser.parse_args()
+
+    # database.py reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.url
+    import database
+    import models
+    from utils.search import ensure_search_index
+
+    db = database.SessionLocal()
+    if args.reseed:
+        models.Base.metadata.drop_all(bind=database.engine)
+        models.Base.metadata.create_all(bind=database.engine)
+    if db.query(models.Profile.id).count() < args.profiles:
+        seed(db, models, args.profiles, args.ranked_viewers, args.top_n, args.swipes)
+    ensure_search_index(database.engine)
+    print(f"{database.engine.url.get_backend_name()}: {db.query(models.Profile.id).count()} profiles, "
+          f"{db.query(models.Match.id).count()} matches, {db.query(models.MatchSwipe.id).count()} swipes\n")
+
+    report = {}
+    for present in (False, True):
+        set_indexes(db, models, present)
+        label = "with indexes" if present else "without indexes"
+        for name, stmt, is_write in hot_queries(db, models):
+            p50, p99 = time_stmt(db, stmt, is_write, args.repeat)
+            report.setdefault(name, {})[label] = {"p50_ms": p50, "p99_ms": p99, "plan": explain(db, stmt)}
+
+    print(f"{'query':<28}{'no idx p50':>12}{'no idx p99':>12}{'idx p50':>10}{'idx p99':>10}")
+    for name, r in report.items():
+        a, b = r["without indexes"], r["with indexes"]
+        print(f"{name:<28}{a['p50_ms']:>12.2f}{a['p99_ms']:>12.2f}{b['p50_ms']:>10.2f}{b['p99_ms']:>10.2f}")
+    print()
+    for name, r in report.items():
+        print(f"{name}")
+        for label in ("without indexes", "with indexes"):
+            print(f"  {label}:")
+            for line in r[label]["plan"]:
+                print(f"    {line}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
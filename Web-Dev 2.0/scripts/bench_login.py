@@ -0,0 +1,138 @@
+# scripts/bench_login.py
+# Sustained POST /auth/login throughput of ONE API worker under concurrent logins,
+# plus /health latency measured alongside (it stays flat while bcrypt runs on
+# the password executor instead of the request threads).
+#
+#   python scripts/bench_login.py --concurrency 1 8 32 --duration 15
+#   python scripts/bench_login.py --rounds 10 12 --concurrency 16
+#
+# Each run starts a fresh single-worker uvicorn on a scratch SQLite database.
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMAIL, PASSWORD = "bench-login@example.com", "BenchPass123!"
+
+
+def request(url, data=None, form=False, timeout=60):
+    headers = {}
+    if data is not None:
+        if form:
+            data = urllib.parse.urlencode(data).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        else:
+            data = json.dumps(data).encode()
+            headers["Content-Type"] = "application/json"
+    req = urllib.request.Request(url, data=data, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def start_server(port, rounds, db_path):
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        BCRYPT_ROUNDS=str(rounds),
+        AI_PRELOAD="false",
+        MATCH_SCORING_WORKER="false",
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--workers", "1"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if request(base + "/health", timeout=2) == 200:
+                return proc, base
+        except OSError:
+            pass
+        time.sleep(0.25)
+    os.killpg(proc.pid, signal.SIGTERM)
+    raise RuntimeError("server did not start")
+
+
+def run_load(base, concurrency, duration):
+    stop = time.time() + duration
+    latencies, errors, health = [], [0], []
+    lock = threading.Lock()
+
+    def login_loop():
+        while time.time() < stop:
+            start = time.perf_counter()
+            code = request(base + "/auth/login", {"username": EMAIL, "password": PASSWORD}, form=True)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if code == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    def health_loop():
+        while time.time() < stop:
+            start = time.perf_counter()
+            request(base + "/health")
+            health.append(time.perf_counter() - start)
+            time.sleep(0.1)
+
+    threads = [threading.Thread(target=login_loop) for _ in range(concurrency)] + [threading.Thread(target=health_loop)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    def pct(samples, q):
+        samples = sorted(samples)
+        return samples[int(q * (len(samples) - 1))] * 1000 if samples else float("nan")
+
+    return {
+        "req_s": len(latencies) / wall,
+        "p50": statistics.median(latencies) * 1000 if latencies else float("nan"),
+        "p99": pct(latencies, 0.99),
+        "errors": errors[0],
+        "health_p99": pct(health, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--rounds", type=int, nargs="+", default=[12])
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    print(f"{'rounds':>6}{'conc':>6}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'/health p99 ms':>16}")
+    for rounds in args.rounds:
+        with tempfile.TemporaryDirectory() as tmp:
+            proc, base = start_server(args.port, rounds, os.path.join(tmp, "bench_login.db"))
+            try:
+                request(base + "/auth/signup", {"email": EMAIL, "password": PASSWORD, "is_investor": False})
+                for concurrency in args.concurrency:
+                    r = run_load(base, concurrency, args.duration)
+                    print(f"{rounds:>6}{concurrency:>6}{r['req_s']:>9.1f}{r['p50']:>10.1f}{r['p99']:>10.1f}"
+                          f"{r['errors']:>8}{r['health_p99']:>16.1f}")
+            finally:
+                os.killpg(proc.pid, signal.SIGTERM)
+                proc.wait(30)
+
+
+if __name__ == "__main__":
+    main()
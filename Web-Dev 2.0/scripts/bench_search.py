@@ -0,0 +1,131 @@
+# scripts/bench_search.py
+# Latency of the GET /match/ search/domain filters: plain ILIKE '%term%' vs the
+# dialect's text index (utils/search.py), on a large synthetic profiles table.
+#
+#   python scripts/bench_search.py --profiles 1000000                      # SQLite + FTS5
+#   python scripts/bench_search.py --url postgresql://... --profiles 1000000  # Postgres + pg_trgm
+#
+# Run `alembic upgrade head` first on Postgres so the trigram indexes exist.
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIRST = ["Ada", "Grace", "Alan", "Linus", "Margaret", "Dennis", "Barbara", "Ken", "Frances", "Edsger",
+         "Radia", "Donald", "Sophie", "Guido", "Katherine", "Tim", "Hedy", "Vint", "Shafi", "Niklaus"]
+LAST = ["Lovelace", "Hopper", "Turing", "Torvalds", "Hamilton", "Ritchie", "Liskov", "Thompson", "Allen",
+        "Dijkstra", "Perlman", "Knuth", "Wilson", "Rossum", "Johnson", "Berners-Lee", "Lamarr", "Cerf"]
+DOMAINS = ["ai", "fintech", "healthtech", "climate", "edtech", "biotech", "saas", "robotics", "blockchain",
+           "gaming", "mobility", "agritech", "cybersecurity", "ecommerce", "proptech", "insurtech"]
+
+QUERIES = [
+    {"search": "Lovelace"},
+    {"search": "grace hop"},
+    {"domain": "fintech"},
+    {"domain": "cybersecurity"},
+    {"search": "Knuth", "domain": "robotics"},
+]
+
+
+def seed(db, models, n_profiles, chunk=20000):
+    from sqlalchemy import insert
+
+    rng = random.Random(0)
+    print(f"Seeding {n_profiles} profiles...")
+    start = time.perf_counter()
+    for lo in range(0, n_profiles, chunk):
+        users, profiles = [], []
+        for i in range(lo, min(lo + chunk, n_profiles)):
+            uid = uuid.UUID(int=i + 1)
+            role = "investor" if i % 3 else "founder"
+            users.append({"id": uid, "email": f"bench{i}@example.com", "hashed_password": "x", "is_investor": role == "investor"})
+            profiles.append({
+                "id": i + 1,
+                "user_id": uid,
+                "full_name": f"{rng.choice(FIRST)} {rng.choice(LAST)} {i}",
+                "bio": "",
+                "location": "City",
+                "interests": ",".join(rng.sample(DOMAINS, 3)),
+                "role": role,
+            })
+        db.execute(insert(models.User), users)
+        db.execute(insert(models.Profile), profiles)
+        db.commit()
+    print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+
+def explain(db, query):
+    bind = db.get_bind()
+    sql = str(query.statement.compile(bind, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if bind.dialect.name == "sqlite" else "EXPLAIN ANALYZE "
+    from sqlalchemy import text
+    return "\n".join("    " + " ".join(str(c) for c in row) for row in db.execute(text(prefix + sql)))
+
+
+def time_query(query, repeat):
+    lat = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = query.all()
+        lat.append((time.perf_counter() - start) * 1000)
+    lat.sort()
+    return len(rows), statistics.median(lat), lat[int(0.99 * (len(lat) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="sqlite:///./bench_search.db")
+    parser.add_argument("--profiles", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--reseed", action="store_true", help="Drop and reseed the tables")
+    parser.add_argument("--explain", action="store_true", help="Print the query plans")
+    args = parser.parse_args()
+
+    # database.py reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.url
+    import database
+    import models
+    from utils.search import apply_text_filters, ensure_search_index
+
+    db = database.SessionLocal()
+    if args.reseed:
+        models.Base.metadata.drop_all(bind=database.engine)
+        with database.engine.begin() as conn:
+            from sqlalchemy import text
+            if database.engine.url.get_backend_name() == "sqlite":
+                conn.execute(text("DROP TABLE IF EXISTS profiles_fts"))
+        models.Base.metadata.create_all(bind=database.engine)
+    if db.query(models.Profile.id).count() < args.profiles:
+        seed(db, models, args.profiles)
+    # After seeding, so the SQLite FTS table is built in one 'rebuild'
+    ensure_search_index(database.engine)
+    print(f"{database.engine.url.get_backend_name()}: {db.query(models.Profile.id).count()} profiles\n")
+
+    print(f"{'filters':<36}{'rows':>8}{'ilike p50':>12}{'ilike p99':>12}{'index p50':>12}{'index p99':>12}")
+    for filters in QUERIES:
+        base = db.query(models.Profile.id, models.Profile.interests).filter(models.Profile.role == "investor")
+        plain = base
+        if filters.get("search"):
+            plain = plain.filter(models.Profile.full_name.ilike(f"%{filters['search']}%"))
+        if filters.get("domain"):
+            plain = plain.filter(models.Profile.interests.ilike(f"%{filters['domain']}%"))
+        indexed = apply_text_filters(db, base, filters.get("search"), filters.get("domain"))
+
+        n_plain, p50_plain, p99_plain = time_query(plain, args.repeat)
+        n_indexed, p50_indexed, p99_indexed = time_query(indexed, args.repeat)
+        assert n_plain == n_indexed, f"result mismatch for {filters}: {n_plain} vs {n_indexed}"
+        label = ", ".join(f"{k}={v}" for k, v in filters.items())
+        print(f"{label:<36}{n_indexed:>8}{p50_plain:>12.1f}{p99_plain:>12.1f}{p50_indexed:>12.1f}{p99_indexed:>12.1f}")
+        if args.explain:
+            print("  ilike plan:\n" + explain(db, plain))
+            print("  index plan:\n" + explain(db, indexed))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# scripts/bench_worker_memory.py
+# RSS / PSS per worker for N-worker deployments of the API (Linux only):
+#
+#   per-worker  gunicorn, no preload     every worker loads its own engine
+#   shared      gunicorn -c gunicorn.conf.py (engine preloaded before fork)
+#
+#   python scripts/bench_worker_memory.py --workers 4
+#   FOUNDMATCH_MMAP_WEIGHTS=true python scripts/bench_worker_memory.py --modes shared
+#
+# PSS splits shared pages between the processes mapping them, so the PSS total
+# is the real memory cost of the deployment; RSS counts shared pages N times.
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    # -c /dev/null: don't pick up ./gunicorn.conf.py (and its preload)
+    "per-worker": lambda port, n: [sys.executable, "-m", "gunicorn", "-c", os.devnull, "-k", "uvicorn.workers.UvicornWorker",
+                                   "-w", str(n), "-b", f"127.0.0.1:{port}", "--timeout", "300", "main:app"],
+    "shared": lambda port, n: [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+}
+
+
+def children(pid):
+    """All descendant pids of `pid`, from /proc."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                parents.setdefault(ppid, []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    out, stack = [], [pid]
+    while stack:
+        for child in parents.get(stack.pop(), []):
+            out.append(child)
+            stack.append(child)
+    return out
+
+
+def memory_kb(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields
+
+
+def wait_ready(port, n_workers, timeout):
+    # /ready lands on a random worker; require a run of 200s so every worker is warm
+    deadline, streak = time.time() + timeout, 0
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=5) as r:
+                streak = streak + 1 if r.status == 200 else 0
+        except Exception:
+            streak = 0
+        if streak >= 4 * n_workers:
+            return True
+        time.sleep(0.25)
+    return False
+
+
+def run_mode(mode, n_workers, port, timeout):
+    env = dict(os.environ, WEB_CONCURRENCY=str(n_workers), BIND=f"127.0.0.1:{port}")
+    proc = subprocess.Popen(
+        COMMANDS[mode](port, n_workers), cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    try:
+        if not wait_ready(port, n_workers, timeout):
+            print(f"{mode}: workers not ready after {timeout}s")
+            return None
+        time.sleep(1)
+        pids = [proc.pid] + children(proc.pid)
+        rows = []
+        for pid in pids:
+            try:
+                mem = memory_kb(pid)
+            except OSError:
+                continue
+            rows.append((pid, mem.get("Rss", 0), mem.get("Pss", 0)))
+        return rows
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(30)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=list(COMMANDS), choices=list(COMMANDS))
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=int, default=600)
+    args = parser.parse_args()
+
+    summary = []
+    for mode in args.modes:
+        rows = run_mode(mode, args.workers, args.port, args.timeout)
+        if rows is None:
+            continue
+        print(f"\n[{mode}] {'pid':>8}{'RSS MB':>10}{'PSS MB':>10}")
+        for pid, rss, pss in rows:
+            print(f"{'':<{len(mode) + 3}}{pid:>8}{rss / 1024:>10.1f}{pss / 1024:>10.1f}")
+        total_rss = sum(r[1] for r in rows) / 1024
+        total_pss = sum(r[2] for r in rows) / 1024
+        summary.append((mode, len(rows), total_rss, total_pss))
+
+    print(f"\n{'mode':<12}{'procs':>6}{'RSS total MB':>14}{'PSS total MB':>14}{'PSS/worker MB':>15}")
+    for mode, n, rss, pss in summary:
+        print(f"{mode:<12}{n:>6}{rss:>14.1f}{pss:>14.1f}{pss / args.workers:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
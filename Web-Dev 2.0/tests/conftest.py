@@ -11,6 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from database import Base
 from main import app  # Import your FastAPI app
+from utils.search import ensure_search_index
 
 # Test database URL
 TEST_DATABASE_URL = "sqlite:///./test.db"
@@ -28,6 +29,8 @@ def setup_test_database():
     
     # Create all tables using SQLAlchemy metadata
     Base.metadata.create_all(bind=test_engine)
+    # Same search index as main.py builds (the file it indexed was just replaced)
+    ensure_search_index(test_engine)
     
     yield test_engine
     
@@ -0,0 +1,55 @@
+# tests/test_ai_engine.py
+import pytest
+
+import main
+from utils import match
+
+
+@pytest.fixture
+def failing_build(monkeypatch):
+    """_build_ai_engine raises; counts the attempts. The engine slot and backoff are reset."""
+    calls = []
+
+    def build():
+        calls.append(1)
+        raise RuntimeError("weights corrupt")
+
+    monkeypatch.setattr(match, "_build_ai_engine", build)
+    monkeypatch.setattr(match, "_ai_instance", None)
+    monkeypatch.setattr(match, "_ai_failure", {"count": 0, "retry_at": 0.0})
+    monkeypatch.setattr(match, "_ai_state", dict(match._ai_state, status="not_started", error=None))
+    return calls
+
+
+def test_failed_load_is_not_retried_until_the_backoff_expires(failing_build, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(match.time, "monotonic", lambda: now[0])
+
+    assert match.get_ai_engine() is None
+    assert match.get_ai_engine() is None
+    assert len(failing_build) == 1  # The second request did not reload
+
+    now[0] += match.AI_LOAD_RETRY_SECONDS
+    assert match.get_ai_engine() is None
+    assert len(failing_build) == 2
+    assert match.ai_readiness()["retry_in_seconds"] == 2 * match.AI_LOAD_RETRY_SECONDS  # Doubled
+
+
+def test_ready_reports_the_failed_load(failing_build, client):
+    match.get_ai_engine()
+    response = client.get("/ready")
+    assert response.status_code == 503
+    body = response.json()
+    assert body["status"] == "failed"
+    assert body["ai"]["error"] == "weights corrupt"
+    assert body["ai"]["retry_in_seconds"] == match.AI_LOAD_RETRY_SECONDS
+
+
+def test_lazy_retry_recovers_after_a_failure(failing_build, monkeypatch):
+    match.get_ai_engine()
+    engine = object()
+    monkeypatch.setattr(match, "_build_ai_engine", lambda: engine)
+    match._ai_failure["retry_at"] = 0.0  # Backoff elapsed
+    assert match.get_ai_engine() is engine
+    assert match.ai_readiness()["status"] == "ready"
+    assert match._ai_failure["count"] == 0
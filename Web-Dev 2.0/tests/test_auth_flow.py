@@ -0,0 +1,111 @@
+# tests/test_auth_flow.py
+import uuid
+
+from passlib.context import CryptContext
+
+import models
+from utils import auth as auth_utils
+
+
+def make_user(test_session, email, password, rounds=4):
+    hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds).hash(password)
+    user = models.User(id=uuid.uuid4(), email=email, hashed_password=hashed, is_investor=False)
+    test_session.add(user)
+    test_session.commit()
+    return user
+
+
+def login(client, email, password):
+    return client.post("/auth/login", data={"username": email, "password": password})
+
+
+def test_login_rehashes_hashes_made_with_another_cost(client, test_session):
+    user = make_user(test_session, "rehash@example.com", "RehashPass1!", rounds=4)
+    assert user.hashed_password.startswith("$2b$04$")
+
+    r = login(client, "rehash@example.com", "RehashPass1!")
+    assert r.status_code == 200, r.text
+    test_session.expire_all()
+    new_hash = test_session.get(models.User, user.id).hashed_password
+    assert new_hash.startswith(f"$2b${auth_utils.BCRYPT_ROUNDS:02d}$")
+    # The new hash still accepts the password, and is kept as is
+    assert login(client, "rehash@example.com", "RehashPass1!").status_code == 200
+    test_session.expire_all()
+    assert test_session.get(models.User, user.id).hashed_password == new_hash
+
+
+def test_wrong_password_is_rejected(client, test_session):
+    make_user(test_session, "wrongpw@example.com", "RightPass1!")
+    assert login(client, "wrongpw@example.com", "WrongPass1!").status_code == 401
+
+
+def test_unknown_email_still_pays_a_bcrypt_verify(client, monkeypatch):
+    verified = []
+    real_verify = auth_utils.pwd_ctx.verify
+    monkeypatch.setattr(auth_utils.pwd_ctx, "verify", lambda secret, hashed: verified.append(hashed) or real_verify(secret, hashed))
+
+    assert login(client, "nobody@example.com", "Whatever1!").status_code == 401
+    # Same bcrypt cost as a real account: no timing difference to tell them apart
+    assert len(verified) == 1 and verified[0].startswith(f"$2b${auth_utils.BCRYPT_ROUNDS:02d}$")
+
+
+def bearer(user):
+    return {"Authorization": f"Bearer {auth_utils.create_access_token(subject=str(user.id))}"}
+
+
+def test_cached_user_is_resolved_without_sql(test_engine, test_session):
+    from sqlalchemy import event
+
+    user = make_user(test_session, "cached@example.com", "CachedPass1!")
+    token = auth_utils.create_access_token(subject=str(user.id))
+    assert auth_utils.resolve_user(token, test_session).email == "cached@example.com"
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(test_engine, "before_cursor_execute", listener)
+    try:
+        assert auth_utils.resolve_user(token, test_session).email == "cached@example.com"
+    finally:
+        event.remove(test_engine, "before_cursor_execute", listener)
+    assert statements == []
+
+
+def test_user_change_invalidates_the_cache(client, test_session):
+    user = make_user(test_session, "before@example.com", "ChangePass1!")
+    headers = bearer(user)
+    assert client.get("/auth/me", headers=headers).json()["email"] == "before@example.com"
+
+    user.email = "after@example.com"
+    test_session.commit()
+    assert client.get("/auth/me", headers=headers).json()["email"] == "after@example.com"
+
+
+def test_logout_revokes_the_token(client, test_session):
+    user = make_user(test_session, "logout@example.com", "LogoutPass1!")
+    headers = bearer(user)
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    # Still a valid JWT, but refused (and not re-cached) until it expires
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_sync_login_is_turned_away_when_every_hash_slot_is_busy(client, test_session, monkeypatch):
+    import threading
+
+    from utils.inference import InferenceExecutor
+
+    make_user(test_session, "busy@example.com", "BusyPass1!")
+    executor = InferenceExecutor(max_workers=1, max_queue=8)
+    monkeypatch.setattr("routers.auth.password_executor", executor)
+    release = threading.Event()
+    executor.submit(release.wait, 5)  # The one slot is taken
+
+    r = login(client, "busy@example.com", "BusyPass1!")
+    # No waiting in the queue on a request thread
+    assert r.status_code == 503
+    assert int(r.headers["Retry-After"]) >= 1
+    release.set()
+    executor.shutdown()
+    assert login(client, "busy@example.com", "BusyPass1!").status_code == 200
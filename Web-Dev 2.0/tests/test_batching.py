@@ -0,0 +1,66 @@
+# tests/test_batching.py
+import asyncio
+import threading
+
+import pytest
+
+from ml_engine.batching import BatcherStopped, MicroBatcher
+
+
+def test_batches_concurrent_items():
+    async def run():
+        batcher = MicroBatcher(lambda items: [i * 2 for i in items], max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [0, 2, 4, 6, 8]
+    assert stats["items"] == 5 and stats["batches"] < 5
+
+
+def test_stop_fails_in_flight_and_queued_items():
+    release = threading.Event()
+
+    def slow(items):
+        release.wait(5)
+        return items
+
+    async def run():
+        batcher = MicroBatcher(slow, max_batch_size=1, max_wait_ms=0)
+        in_flight = asyncio.ensure_future(batcher.submit("a"))
+        queued = asyncio.ensure_future(batcher.submit("b"))
+        await asyncio.sleep(0.05)  # "a" is running, "b" waits behind it
+        await batcher.stop()
+        # Both callers finish instead of waiting for a batch that won't run
+        done = await asyncio.wait_for(asyncio.gather(in_flight, queued, return_exceptions=True), 1)
+        release.set()
+        return done
+
+    results = asyncio.run(run())
+    assert [type(r) for r in results] == [BatcherStopped, BatcherStopped]
+
+
+def test_restarts_after_stop():
+    async def run():
+        batcher = MicroBatcher(lambda items: items, max_wait_ms=0)
+        assert await batcher.submit(1) == 1
+        await batcher.stop()
+        return await batcher.submit(2)
+
+    assert asyncio.run(run()) == 2
+
+
+def test_batch_errors_reach_each_caller():
+    def fail(items):
+        raise ValueError("bad batch")
+
+    async def run():
+        batcher = MicroBatcher(fail, max_wait_ms=0)
+        try:
+            with pytest.raises(ValueError, match="bad batch"):
+                await batcher.submit(1)
+        finally:
+            await batcher.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,99 @@
+# tests/test_match_cache.py
+import time
+
+import pytest
+
+from utils.match_cache import CacheBackend, InProcessCache, MatchCache, SharedCache, etag_matches
+
+
+class FakeRedis:
+    """Local stand-in for the shared cache client (get / set(ex=) / incr)."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and time.monotonic() >= expires:
+            return None
+        return value
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value.encode(), time.monotonic() + ex if ex else None)
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.data[key] = (str(value).encode(), None)
+        return value
+
+
+FILTERS = {"search": None, "domain": "ai", "limit": 20, "cursor": None}
+PAYLOAD = {"matches": [{"profile_id": 1, "match_score": 91.5}], "next_cursor": None}
+
+
+def check_backend(backend):
+    cache = MatchCache(backend, ttl_seconds=60)
+    assert cache.get("u1", "investor", FILTERS, "v1") is None
+
+    etag = cache.put("u1", "investor", FILTERS, "v1", PAYLOAD)
+    assert cache.get("u1", "investor", FILTERS, "v1") == (etag, PAYLOAD)
+    # Other filters / model version / user are separate entries
+    assert cache.get("u1", "investor", dict(FILTERS, domain="fintech"), "v1") is None
+    assert cache.get("u1", "investor", FILTERS, "v2") is None
+    assert cache.get("u2", "investor", FILTERS, "v1") is None
+
+    # An unrelated user's profile change leaves the entry alone
+    cache.invalidate_user("u2")
+    assert cache.get("u1", "investor", FILTERS, "v1") is not None
+    # A candidate of the listed role changed
+    cache.invalidate_profile("u3", "investor")
+    assert cache.get("u1", "investor", FILTERS, "v1") is None
+
+    cache.put("u1", "investor", FILTERS, "v1", PAYLOAD)
+    cache.invalidate_user("u1")
+    assert cache.get("u1", "investor", FILTERS, "v1") is None
+
+    cache.put("u1", "investor", FILTERS, "v1", PAYLOAD)
+    cache.invalidate_all()
+    assert cache.get("u1", "investor", FILTERS, "v1") is None
+
+
+def test_in_process_backend():
+    check_backend(InProcessCache())
+
+
+def test_shared_backend():
+    check_backend(SharedCache(FakeRedis()))
+
+
+def test_lru_and_ttl():
+    backend = InProcessCache(max_entries=2)
+    backend.set("a", "1", ttl=60)
+    backend.set("b", "2", ttl=60)
+    backend.get("a")
+    backend.set("c", "3", ttl=60)
+    assert backend.get("b") is None  # Least recently used
+    assert backend.get("a") == "1"
+
+    backend.set("d", "4", ttl=0)
+    assert backend.get("d") is None
+
+
+def test_backend_interface_is_enforced():
+    class Partial(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()  # set / incr missing
+
+
+def test_if_none_match_compares_whole_entity_tags():
+    etag = '"0123abcd"'
+    assert etag_matches('"0123abcd"', etag)
+    assert etag_matches('"ffff", W/"0123abcd" ,"eeee"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"0123abcd-gzip"', etag)  # Not a substring test
+    assert not etag_matches('"0123', etag)
+    assert not etag_matches("", etag)
+    assert not etag_matches(None, etag)
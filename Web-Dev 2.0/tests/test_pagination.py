@@ -0,0 +1,253 @@
+# tests/test_pagination.py
+import uuid
+
+import pytest
+
+import models
+from routers import match as match_router
+from tests.test_auth_flow import bearer
+from utils import pagination, scoring_worker
+from utils.pagination import InvalidCursor, RankingCache, decode_cursor, encode_cursor, ranks_after, top_k_indices
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("abc", 40)) == ("abc", 40, {}, None, None)
+    cursor = encode_cursor("abc", 20, {"domain": "ai"}, "v1", (61.25, 7))
+    assert decode_cursor(cursor) == ("abc", 20, {"domain": "ai"}, "v1", (61.25, 7))
+    assert "=" not in encode_cursor("abc", 1)  # URL-safe, unpadded
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor("abc", 0)[:-3], "eyJyIjoiYSJ9"])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_negative_offset_is_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor("abc", -1))
+
+
+def test_top_k_is_best_first_with_stable_ties():
+    scores = [10.0, 90.0, 50.0, 90.0, 20.0]
+    assert top_k_indices(scores, 3) == [1, 3, 2]
+    assert top_k_indices(scores, 10) == [1, 3, 2, 4, 0]
+
+
+def test_ranks_after_resumes_past_the_last_row():
+    ids, scores = [1, 2, 3, 4], [50.0, 90.0, 50.0, 20.0]
+    assert ranks_after(ids, scores, None) == [0, 1, 2, 3]
+    assert ranks_after(ids, scores, (50.0, 1)) == [2, 3]  # Tie: higher ids only
+    assert ranks_after(ids, scores, (90.0, 2)) == [0, 2, 3]
+
+
+def test_ranking_pages_in_score_order():
+    cache = RankingCache()
+    ranking_id = cache.put("u1", [11, 12, 13, 14, 15], [10.0, 90.0, 50.0, 70.0, 20.0], "v1")
+    assert cache.page(ranking_id, "u1", 0, 2) == ([(12, 90.0), (14, 70.0)], 2, "v1")
+    assert cache.page(ranking_id, "u1", 2, 2) == ([(13, 50.0), (15, 20.0)], 4, "v1")
+    assert cache.page(ranking_id, "u1", 4, 2) == ([(11, 10.0)], None, "v1")
+    assert cache.page(ranking_id, "u1", 10, 2) == ([], None, "v1")  # Past the end
+
+
+def test_ranking_is_only_served_to_its_owner():
+    cache = RankingCache()
+    ranking_id = cache.put("u1", [1], [50.0])
+    assert cache.page(ranking_id, "u2", 0, 10) is None
+    assert not cache.covers(ranking_id, "u2", 0, 10)
+    assert cache.covers(ranking_id, "u1", 0, 10)
+    # u2 rebuilding it under the same id leaves u1's alone
+    cache.put("u2", [2], [50.0], ranking_id=ranking_id)
+    assert cache.page(ranking_id, "u1", 0, 10)[0] == [(1, 50.0)]
+
+
+def test_ranking_keeps_a_bounded_window():
+    cache = RankingCache(max_depth=3)
+    ids = list(range(1, 11))
+    ranking_id = cache.put("u1", ids, [float(100 - i) for i in ids])
+    assert cache.page(ranking_id, "u1", 0, 2) == ([(1, 99.0), (2, 98.0)], 2, None)
+    assert not cache.covers(ranking_id, "u1", 2, 2)  # Past rank 3: the caller re-ranks
+    # ... and keeps the next window, from the rows after the last one seen
+    cache.put("u1", ids[2:], [float(100 - i) for i in ids[2:]], start=2, ranking_id=ranking_id)
+    assert cache.page(ranking_id, "u1", 2, 2) == ([(3, 97.0), (4, 96.0)], 4, None)
+    assert cache.page(ranking_id, "u1", 0, 2) is None
+
+
+def test_rankings_expire_and_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(pagination.time, "monotonic", lambda: now[0])
+    cache = RankingCache(max_entries=2, ttl_seconds=60)
+    a = cache.put("u1", [1], [50.0])
+    b = cache.put("u1", [2], [50.0])
+    cache.covers(a, "u1", 0, 1)
+    c = cache.put("u1", [3], [50.0])
+    assert not cache.covers(b, "u1", 0, 1)  # Least recently used
+    assert cache.covers(a, "u1", 0, 1) and cache.covers(c, "u1", 0, 1)
+
+    now[0] += 61
+    assert cache.page(a, "u1", 0, 10) is None
+
+
+# --- GET /match/ ---
+
+def add_profile(test_session, role, name, interests):
+    user = models.User(id=uuid.uuid4(), email=f"page-{role}-{uuid.uuid4().hex[:8]}@example.com", hashed_password="x", is_investor=role == "investor")
+    test_session.add(user)
+    test_session.flush()
+    profile = models.Profile(user_id=user.id, full_name=name, bio="", location="City", interests=interests, role=role)
+    test_session.add(profile)
+    test_session.commit()
+    return user, profile
+
+
+@pytest.fixture
+def viewer(test_session, monkeypatch):
+    """
+    A founder and three investors in a domain only they carry: (founder, investors, domain).
+    Scored online with the default score unless ranked.
+    """
+    monkeypatch.setattr(match_router, "get_ai_engine", lambda: None)
+    domain = f"quark{uuid.uuid4().hex[:8]}"
+    founder = add_profile(test_session, "founder", "Page", domain)
+    investors = [add_profile(test_session, "investor", "Page", domain) for _ in range(3)]
+    return founder, investors, domain
+
+
+def test_cursor_pages_through_the_whole_ranking(client, viewer):
+    (user, _), investors, domain = viewer
+    first = client.get("/match/", params={"domain": domain, "limit": 2}, headers=bearer(user))
+    assert first.status_code == 200, first.text
+    assert len(first.json()["matches"]) == 2 and first.json()["next_cursor"]
+
+    second = client.get("/match/", params={"domain": domain, "limit": 2, "cursor": first.json()["next_cursor"]}, headers=bearer(user))
+    assert second.status_code == 200, second.text
+    assert second.json()["next_cursor"] is None
+    seen = [m["profile_id"] for m in first.json()["matches"] + second.json()["matches"]]
+    assert sorted(seen) == sorted(p.id for _, p in investors)
+
+
+def test_next_page_is_rebuilt_when_the_ranking_is_not_kept(client, test_session, viewer):
+    (user, founder), investors, domain = viewer
+    first = client.get("/match/", params={"domain": domain, "limit": 1}, headers=bearer(user)).json()
+    # Another worker (or a restart / eviction) gets page 2, after a swipe on page 1
+    match_router.ranking_cache.clear()
+    test_session.add(models.MatchSwipe(user_id=user.id, target_profile_id=first["matches"][0]["profile_id"], liked=True))
+    test_session.commit()
+
+    seen = [m["profile_id"] for m in first["matches"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        r = client.get("/match/", params={"limit": 1, "cursor": cursor}, headers=bearer(user))  # Filters from the cursor
+        assert r.status_code == 200, r.text
+        seen += [m["profile_id"] for m in r.json()["matches"]]
+        cursor = r.json()["next_cursor"]
+    assert seen == sorted(p.id for _, p in investors)  # Equal scores: id order, none skipped or repeated
+
+
+def test_bad_and_outdated_cursors_get_400(client, viewer):
+    (user, _), _, domain = viewer
+    r = client.get("/match/", params={"cursor": "not-a-cursor"}, headers=bearer(user))
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Malformed cursor"
+
+    # A ranking scored by a model that is no longer loaded can't be rebuilt in the same order
+    outdated = encode_cursor(uuid.uuid4().hex, 1, {"domain": domain}, "old-model", (50.0, 0))
+    r = client.get("/match/", params={"cursor": outdated}, headers=bearer(user))
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("Cursor expired")
+
+
+def test_filtered_pages_are_ranked_online_and_keep_their_filters(client, test_session, viewer):
+    (user, founder), investors, domain = viewer
+    # A fresh stored ranking: filtered requests don't read it
+    for score, (investor_user, investor) in zip((90.0, 70.0, 50.0), investors):
+        test_session.add(models.Match(
+            profile_id=founder.id, candidate_profile_id=investor.id,
+            entrepreneur_id=user.id, investor_id=investor_user.id, match_score=score,
+        ))
+    elsewhere = investors[1][1].interests = f"elsewhere{uuid.uuid4().hex[:8]}"
+    test_session.commit()
+
+    first = client.get("/match/", params={"domain": domain, "limit": 1}, headers=bearer(user))
+    assert [(m["profile_id"], m["match_score"]) for m in first.json()["matches"]] == [(investors[0][1].id, 50.0)]
+    assert decode_cursor(first.json()["next_cursor"]).ranking_id != match_router.MATERIALIZED
+
+    # The domain sent with the next page is ignored: the cursor's applies
+    params = {"domain": elsewhere, "limit": 1, "cursor": first.json()["next_cursor"]}
+    second = client.get("/match/", params=params, headers=bearer(user))
+    assert second.status_code == 200, second.text
+    assert [m["profile_id"] for m in second.json()["matches"]] == [investors[2][1].id]
+    assert second.json()["next_cursor"] is None
+
+
+@pytest.fixture
+def cut_ranking(test_session, viewer, monkeypatch):
+    """The viewer's ranking materialized with top_n=3, and three more investors below it."""
+    (user, founder), investors, domain = viewer
+    monkeypatch.setattr(scoring_worker, "TOP_N", 3)
+    for name in ("Extra", "Extra", f"Zelda{domain}"):
+        investors.append(add_profile(test_session, "investor", name, domain))
+    scoring_worker.score_profile(test_session, founder, None, top_n=3)
+    test_session.commit()
+    return viewer
+
+
+def test_search_finds_profiles_below_the_stored_top_n(client, cut_ranking):
+    (user, _), investors, domain = cut_ranking
+    r = client.get("/match/", params={"search": f"Zelda{domain}"}, headers=bearer(user))
+    assert r.status_code == 200, r.text
+    assert [m["profile_id"] for m in r.json()["matches"]] == [investors[-1][1].id]
+
+
+def test_feed_continues_online_past_the_stored_top_n(client, test_session, cut_ranking):
+    (user, _), investors, domain = cut_ranking
+    first = client.get("/match/", params={"limit": 2}, headers=bearer(user)).json()
+    assert decode_cursor(first["next_cursor"]).ranking_id == match_router.MATERIALIZED
+
+    seen = [m["profile_id"] for m in first["matches"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = client.get("/match/", params={"limit": 2, "cursor": cursor}, headers=bearer(user)).json()
+        seen += [m["profile_id"] for m in page["matches"]]
+        cursor = page["next_cursor"]
+    # Every investor (other tests' too), each once: equal scores rank by id
+    everyone = [p.id for p in test_session.query(models.Profile.id).filter_by(role="investor").order_by(models.Profile.id)]
+    assert seen == everyone
+    assert set(p.id for _, p in investors) <= set(seen)
+
+
+class FakeEngine:
+    model_version = "fake-v1"
+    text_model_version = "fake-text-v1"
+
+
+def test_vector_store_failure_keeps_the_ai_scores(client, viewer, monkeypatch, capsys):
+    (user, _), investors, domain = viewer
+    monkeypatch.setattr(match_router, "get_ai_engine", lambda: FakeEngine())
+    monkeypatch.setattr(match_router, "profile_vector_plan", lambda db, rows, version: None)
+    monkeypatch.setattr(match_router, "score_planned", lambda plan, profile, candidates, engine: [70.0, 90.0, 80.0])
+
+    def store_fails(db, plan):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(match_router, "store_vectors", store_fails)
+    r = client.get("/match/", params={"domain": domain}, headers=bearer(user))
+    assert r.status_code == 200, r.text
+    assert [m["match_score"] for m in r.json()["matches"]] == [90.0, 80.0, 70.0]
+    out = capsys.readouterr().out
+    assert "encoded vectors not stored" in out and "disk full" in out
+    assert "AI scoring failed" not in out
+
+
+def test_ai_failure_falls_back_to_default_scores(client, viewer, monkeypatch, capsys):
+    (user, _), investors, domain = viewer
+    monkeypatch.setattr(match_router, "get_ai_engine", lambda: FakeEngine())
+    monkeypatch.setattr(match_router, "profile_vector_plan", lambda db, rows, version: None)
+
+    def scoring_fails(plan, profile, candidates, engine):
+        raise RuntimeError("CUDA error")
+
+    monkeypatch.setattr(match_router, "score_planned", scoring_fails)
+    r = client.get("/match/", params={"domain": domain}, headers=bearer(user))
+    assert [m["match_score"] for m in r.json()["matches"]] == [50.0, 50.0, 50.0]
+    assert "AI scoring failed, using default scores: CUDA error" in capsys.readouterr().out
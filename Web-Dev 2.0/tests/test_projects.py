@@ -0,0 +1,55 @@
+# tests/test_projects.py
+import threading
+
+import pytest
+
+import models
+from routers import projects
+from tests.test_auth_flow import bearer, make_user
+from utils import embeddings
+from utils.inference import InferenceExecutor
+
+PROJECT = {"title": "Grid storage", "description": "Flow batteries for substations", "domain": "climate", "funding_goal": 500000}
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    """(table, id) of every embedding job the routes queue."""
+    jobs = []
+    monkeypatch.setattr(projects, "embed_in_background", lambda model, row_id: jobs.append((model.__tablename__, row_id)))
+    return jobs
+
+
+def test_create_queues_the_embedding_instead_of_encoding(client, test_session, queued):
+    owner = make_user(test_session, "proj-create@example.com", "ProjPass1!")
+    r = client.post("/projects/", json=PROJECT, headers=bearer(owner))
+    assert r.status_code == 200, r.text
+    assert queued == [("projects", r.json()["id"])]
+
+
+def test_owner_updates_a_project_and_it_is_re_embedded(client, test_session, queued):
+    owner = make_user(test_session, "proj-owner@example.com", "ProjPass1!")
+    other = make_user(test_session, "proj-other@example.com", "ProjPass1!")
+    project_id = client.post("/projects/", json=PROJECT, headers=bearer(owner)).json()["id"]
+
+    r = client.put(f"/projects/{project_id}", json={"description": "Sodium-ion packs"}, headers=bearer(owner))
+    assert r.status_code == 200, r.text
+    assert r.json()["description"] == "Sodium-ion packs"
+    assert r.json()["title"] == PROJECT["title"]
+    assert queued[-1] == ("projects", project_id)
+
+    assert client.put(f"/projects/{project_id}", json={"title": "Mine"}, headers=bearer(other)).status_code == 404
+    assert client.put("/projects/999999", json={"title": "Nope"}, headers=bearer(owner)).status_code == 404
+    test_session.expire_all()
+    assert test_session.get(models.Project, project_id).title == PROJECT["title"]
+
+
+def test_embedding_is_skipped_when_the_executor_is_full(monkeypatch):
+    executor = InferenceExecutor(max_workers=1, max_queue=0)
+    monkeypatch.setattr(embeddings, "inference_executor", executor)
+    release = threading.Event()
+    executor.submit(release.wait, 5)
+    # The write path returns at once; the row is left for the backfill
+    assert embeddings.embed_in_background(models.Project, 1, session_factory=lambda: None) is None
+    release.set()
+    executor.shutdown()
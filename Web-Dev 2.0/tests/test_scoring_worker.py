@@ -0,0 +1,162 @@
+# tests/test_scoring_worker.py
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import Base
+from utils import scoring_worker
+
+
+@pytest.fixture
+def scoring_db(tmp_path, monkeypatch):
+    """A fresh SQLite file; profiles are added by each test. No AI engine: every score is the default."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'scoring.db'}")
+
+    @event.listens_for(engine, "connect")
+    def _fk_on(dbapi_conn, record):
+        dbapi_conn.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(scoring_worker, "get_ai_engine", lambda: None)
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    db = Session()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def add_profile(db, profile_id, role):
+    user = models.User(id=uuid.uuid4(), email=f"w{profile_id}@example.com", hashed_password="x", is_investor=role == "investor")
+    db.add(user)
+    db.flush()
+    profile = models.Profile(id=profile_id, user_id=user.id, full_name=f"W {profile_id}", bio="", location="City", interests="ai", role=role)
+    db.add(profile)
+    db.commit()
+    return profile
+
+
+def add_profiles(db, roles):
+    """Profiles with ids 1..len(roles), in order."""
+    return [add_profile(db, i, role) for i, role in enumerate(roles, start=1)]
+
+
+def ranking(db, profile_id):
+    return sorted(m.candidate_profile_id for m in db.query(models.Match).filter_by(profile_id=profile_id))
+
+
+def test_profiles_without_candidates_do_not_block_the_rest(scoring_db):
+    db = scoring_db
+    founders = add_profiles(db, ["founder"] * 3 + ["investor"] * 3)[:3]
+    # The low-id founders swiped every investor: nothing left to rank for them
+    for founder in founders:
+        for target in (4, 5, 6):
+            db.add(models.MatchSwipe(user_id=founder.user_id, target_profile_id=target, liked=False))
+    db.commit()
+
+    assert scoring_worker.run_scoring_pass(db, batch=3) == 3  # Founders: recorded with no rows
+    assert [ranking(db, pid) for pid in (1, 2, 3)] == [[], [], []]
+    assert scoring_worker.run_scoring_pass(db, batch=3) == 3  # Investors are reached
+    assert [ranking(db, pid) for pid in (4, 5, 6)] == [[1, 2, 3]] * 3
+    assert scoring_worker.run_scoring_pass(db, batch=3) == 0
+    assert scoring_worker.profiles_needing_scoring(db) == []
+
+
+def test_outdated_rankings_are_picked_again(scoring_db):
+    db = scoring_db
+    founder, investor = add_profiles(db, ["founder", "investor"])
+    scoring_worker.run_scoring_pass(db)
+    assert scoring_worker.profiles_needing_scoring(db) == []
+
+    # Another model version is loaded
+    assert [p.id for p in scoring_worker.profiles_needing_scoring(db, model_version="v2")] == [1, 2]
+
+    # A flagged row
+    db.query(models.Match).filter_by(profile_id=investor.id).update({models.Match.is_stale: True})
+    db.commit()
+    assert [p.id for p in scoring_worker.profiles_needing_scoring(db)] == [2]
+
+
+def test_update_rescores_its_own_ranking_even_without_rows(scoring_db):
+    db = scoring_db
+    lone, other = add_profiles(db, ["founder", "founder"])
+    scoring_worker.run_scoring_pass(db)
+    assert ranking(db, lone.id) == []
+
+    other.role = "investor"  # Now lone has a candidate
+    scoring_worker.mark_profile_changed(db, other)
+    db.commit()
+    assert [p.id for p in scoring_worker.profiles_needing_scoring(db)] == [other.id]
+    scoring_worker.run_scoring_pass(db)
+    assert ranking(db, lone.id) == [other.id]  # Entered as a candidate, no rescore of lone
+
+
+def test_new_profile_enters_rankings_without_rescoring_them(scoring_db):
+    db = scoring_db
+    add_profiles(db, ["founder", "founder", "investor", "investor"])
+    scoring_worker.run_scoring_pass(db, top_n=2)
+    # Founder 1's ranking is full with low scores, founder 2's is full with high ones
+    db.query(models.Match).filter_by(profile_id=1).update({models.Match.match_score: 10.0})
+    db.query(models.Match).filter_by(profile_id=2).update({models.Match.match_score: 90.0})
+    db.commit()
+
+    newcomer = add_profile(db, 5, "investor")
+    scoring_worker.mark_profile_changed(db, newcomer, created=True)
+    db.commit()
+    assert db.query(models.Match).filter_by(is_stale=True).count() == 0  # No ranking invalidated
+    assert [p.id for p in scoring_worker.profiles_needing_scoring(db)] == [5]  # Only its own
+
+    assert scoring_worker.insert_candidate(db, newcomer, None, top_n=2) == 1
+    db.commit()
+    # Beat founder 1's N-th score (10 < 50): the last row (highest id among ties) made room
+    assert ranking(db, 1) == [3, 5]
+    assert ranking(db, 2) == [3, 4]  # 50 does not beat 90
+    assert scoring_worker.profiles_pending_insert(db) == []
+
+
+def test_candidate_fills_short_and_empty_rankings(scoring_db):
+    db = scoring_db
+    add_profiles(db, ["founder", "founder", "investor"])
+    db.add(models.MatchSwipe(user_id=db.get(models.Profile, 2).user_id, target_profile_id=3, liked=False))
+    db.commit()
+    scoring_worker.run_scoring_pass(db)
+    assert ranking(db, 2) == []  # Ranked, no candidates left
+
+    newcomer = add_profile(db, 4, "investor")
+    scoring_worker.mark_profile_changed(db, newcomer, created=True)
+    db.commit()
+    assert scoring_worker.run_scoring_pass(db) == 2  # Entered as a candidate, then ranked itself
+    assert ranking(db, 1) == [3, 4]
+    assert ranking(db, 2) == [4]
+    assert ranking(db, 4) == [1, 2]
+
+
+def test_failing_profile_backs_off_instead_of_blocking_the_pass(scoring_db, monkeypatch):
+    db = scoring_db
+    add_profiles(db, ["founder", "investor", "investor"])
+    now = [1000.0]
+    monkeypatch.setattr(scoring_worker.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(scoring_worker, "_failures", {})
+    real_score = scoring_worker.score_profile
+    attempts = []
+
+    def score(db, profile, ai_engine, top_n):
+        attempts.append(profile.id)
+        if profile.id == 1:
+            raise RuntimeError("bad profile")
+        return real_score(db, profile, ai_engine, top_n)
+
+    monkeypatch.setattr(scoring_worker, "score_profile", score)
+    assert scoring_worker.run_scoring_pass(db, batch=1) == 0
+    # Profile 1 waits out its backoff: the next passes reach the others
+    assert scoring_worker.run_scoring_pass(db, batch=1) == 1
+    assert scoring_worker.run_scoring_pass(db, batch=1) == 1
+    assert scoring_worker.run_scoring_pass(db, batch=1) == 0
+    assert attempts == [1, 2, 3]
+
+    now[0] += scoring_worker.RETRY_SECONDS
+    scoring_worker.run_scoring_pass(db, batch=1)
+    assert attempts == [1, 2, 3, 1]
+    assert scoring_worker._failures[("ranking", 1)]["retry_at"] == now[0] + 2 * scoring_worker.RETRY_SECONDS  # Doubled
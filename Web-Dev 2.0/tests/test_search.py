@@ -0,0 +1,95 @@
+# tests/test_search.py
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import Base
+from utils import search
+from utils.search import FTS_TABLE, apply_text_filters, ensure_search_index
+
+PROFILES = [
+    (1, "Ada Lovelace", "AI, fintech"),
+    (2, "Grace Hopper", "compilers, ai"),
+    (3, "Alan Turing", "cryptography"),
+    (4, "Al Bo", "climate"),
+]
+
+
+@pytest.fixture
+def search_db(tmp_path, monkeypatch):
+    """A fresh SQLite file with PROFILES; rows exist before the index, so the first build indexes them."""
+    monkeypatch.setattr(search, "_fts_databases", set())
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    with Session() as db:
+        for profile_id, name, interests in PROFILES:
+            user = models.User(id=uuid.uuid4(), email=f"q{profile_id}@example.com", hashed_password="x", is_investor=False)
+            db.add(user)
+            db.flush()
+            db.add(models.Profile(id=profile_id, user_id=user.id, full_name=name, bio="", location="City", interests=interests, role="founder"))
+        db.commit()
+    ensure_search_index(engine)
+    db = Session()
+    yield engine, db
+    db.close()
+    engine.dispose()
+
+
+def found(db, search_term=None, domain=None):
+    query = apply_text_filters(db, db.query(models.Profile.id), search_term, domain)
+    return sorted(profile_id for profile_id, in query)
+
+
+def test_terms_match_case_insensitive_substrings(search_db):
+    engine, db = search_db
+    assert found(db, search_term="LOVE") == [1]
+    assert found(db, domain="Ai") == [1, 2]  # Short term: matched on the row
+    assert found(db, domain="fintech") == [1]
+    assert found(db, search_term="ing") == [3]
+    assert found(db, search_term="zzz") == []
+
+
+def test_long_terms_are_answered_from_the_fts_table(search_db):
+    engine, db = search_db
+    query = apply_text_filters(db, db.query(models.Profile.id), "lovelace", None)
+    assert FTS_TABLE in str(query.statement.compile(engine))
+    query = apply_text_filters(db, db.query(models.Profile.id), "al", None)
+    assert FTS_TABLE not in str(query.statement.compile(engine))
+
+
+def test_search_and_domain_are_combined(search_db):
+    engine, db = search_db
+    assert found(db, search_term="a", domain="ai") == [1, 2]
+    assert found(db, search_term="grace", domain="compilers") == [2]
+    assert found(db, search_term="grace", domain="fintech") == []
+    assert found(db, search_term="Al", domain="cli") == [4]  # Short search, trigram domain
+
+
+def test_index_follows_profile_writes(search_db):
+    engine, db = search_db
+    profile = db.get(models.Profile, 3)
+    profile.interests = "quantum computing"
+    db.commit()
+    assert found(db, domain="cryptography") == []
+    assert found(db, domain="quantum") == [3]
+
+    db.delete(profile)
+    db.commit()
+    assert found(db, domain="quantum") == []
+    with engine.connect() as conn:
+        assert conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE} WHERE interests LIKE '%quantum%'")).scalar() == 0
+
+
+def test_unindexed_database_falls_back_to_ilike(tmp_path, monkeypatch):
+    monkeypatch.setattr(search, "_fts_databases", set())
+    engine = create_engine(f"sqlite:///{tmp_path / 'plain.db'}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        query = apply_text_filters(db, db.query(models.Profile.id), "lovelace", "fintech")
+        assert FTS_TABLE not in str(query.statement.compile(engine))
+        assert query.all() == []
+    engine.dispose()
@@ -0,0 +1,166 @@
+# tests/test_swipes.py
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import Base
+from utils.swipes import SwipeBuffer, SwipeBufferFull, SwipedIds
+
+
+@pytest.fixture
+def swipe_db(tmp_path):
+    """A fresh SQLite file with one founder and five investor profiles (ids 2..6)."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'swipes.db'}")
+
+    @event.listens_for(engine, "connect")
+    def _fk_on(dbapi_conn, record):
+        dbapi_conn.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    with Session() as db:
+        for i in range(6):
+            role = "founder" if i == 0 else "investor"
+            user = models.User(id=uuid.uuid4(), email=f"s{i}@example.com", hashed_password="x", is_investor=role == "investor")
+            db.add(user)
+            db.flush()
+            db.add(models.Profile(id=i + 1, user_id=user.id, full_name=f"S {i}", bio="", location="City", interests="ai", role=role))
+        db.commit()
+        founder_id = db.get(models.Profile, 1).user_id
+    yield engine, Session, founder_id
+    engine.dispose()
+
+
+def rows(user_id, targets):
+    return [{"user_id": user_id, "target_profile_id": t, "liked": True, "type": "swipe", "created_at": datetime.utcnow()} for t in targets]
+
+
+def stored(Session):
+    with Session() as db:
+        return [s.target_profile_id for s in db.query(models.MatchSwipe).order_by(models.MatchSwipe.id)]
+
+
+def test_flushes_when_full(swipe_db):
+    engine, Session, founder = swipe_db
+    buffer = SwipeBuffer(Session, max_rows=3, flush_seconds=60)
+    buffer.add(rows(founder, [2, 3]))
+    time.sleep(0.2)
+    assert stored(Session) == []  # Neither full nor due yet
+    buffer.add(rows(founder, [4]))
+    deadline = time.time() + 5
+    while len(stored(Session)) < 3 and time.time() < deadline:
+        time.sleep(0.02)
+    assert stored(Session) == [2, 3, 4]
+    buffer.stop()
+
+
+def test_stop_writes_pending_rows(swipe_db):
+    engine, Session, founder = swipe_db
+    buffer = SwipeBuffer(Session, max_rows=100, flush_seconds=60)
+    buffer.add(rows(founder, [2, 3, 4, 5, 6]))
+    buffer.stop()
+    assert stored(Session) == [2, 3, 4, 5, 6]
+
+
+def test_failed_flush_is_retried_in_order(swipe_db):
+    engine, Session, founder = swipe_db
+    buffer = SwipeBuffer(Session, max_rows=100, flush_seconds=60)
+    models.MatchSwipe.__table__.drop(engine)  # The write fails: "no such table"
+    buffer.add(rows(founder, [2, 3]))
+    assert buffer.flush() == 0
+    assert buffer.pending_targets(founder) == {2, 3}
+
+    models.MatchSwipe.__table__.create(engine)
+    buffer.add(rows(founder, [4]))
+    assert buffer.flush() == 3
+    assert stored(Session) == [2, 3, 4]
+    assert buffer.pending_targets(founder) == set()
+    buffer.stop()
+
+
+def test_pending_targets_cover_queued_and_in_flight_rows(swipe_db):
+    engine, Session, founder = swipe_db
+    buffer = SwipeBuffer(Session, max_rows=100, flush_seconds=60)
+    buffer.add(rows(founder, [2, 3]))
+    buffer.add(rows(uuid.uuid4(), [4]))
+    assert buffer.pending_targets(founder) == {2, 3}
+
+    seen_during_write = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _during_write(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO match_swipes"):
+            seen_during_write.append(buffer.pending_targets(founder))
+
+    buffer.flush()
+    # Still excluded while the batch is written, gone once it is committed
+    assert seen_during_write == [{2, 3}]
+    assert buffer.pending_targets(founder) == set()
+    buffer.stop()
+
+
+def test_rows_for_deleted_profiles_are_dropped_at_flush(swipe_db):
+    engine, Session, founder = swipe_db
+    buffer = SwipeBuffer(Session, max_rows=100, flush_seconds=60)
+    buffer.add(rows(founder, [2, 3]))
+    with Session() as db:
+        db.delete(db.get(models.Profile, 3))
+        db.commit()
+    assert buffer.flush() == 1  # The FK would otherwise fail the whole batch
+    assert stored(Session) == [2]
+    buffer.stop()
+
+
+def test_refuses_rows_beyond_max_pending(swipe_db):
+    engine, Session, founder = swipe_db
+    buffer = SwipeBuffer(Session, max_rows=100, flush_seconds=60, max_pending=4)
+    buffer.add(rows(founder, [2, 3, 4, 5]))
+    with pytest.raises(SwipeBufferFull):
+        buffer.add(rows(founder, [6]))
+    buffer.stop()
+    assert stored(Session) == [2, 3, 4, 5]
+
+
+def test_swiped_ids_follow_new_swipes_and_limits():
+    cache = SwipedIds(max_users=2, ttl_seconds=60, max_per_user=3)
+    cache.record("u1", [9])  # Not cached yet: nothing to update
+    assert cache.get("u1") is None
+
+    cache.put("u1", [1, 2])
+    ids = cache.get("u1")
+    cache.record("u1", [3])
+    assert ids == {1, 2}  # Sets already handed out don't change
+    assert cache.get("u1") == {1, 2, 3}
+    cache.record("u1", [4])
+    assert cache.get("u1") is None  # Past max_per_user: anti-join only
+
+    cache.put("u2", [1]); cache.put("u3", [1]); cache.put("u4", [1])
+    assert cache.get("u2") is None  # LRU
+
+
+def test_exclude_swiped_hides_written_and_queued_swipes(swipe_db, monkeypatch):
+    from sqlalchemy import select
+
+    import utils.swipes as swipes
+
+    engine, Session, founder = swipe_db
+    buffer = SwipeBuffer(Session, max_rows=100, flush_seconds=60)
+    monkeypatch.setattr(swipes, "swipe_buffer", buffer)
+    with Session() as db:
+        db.add(models.MatchSwipe(user_id=founder, target_profile_id=2, liked=True))
+        other = db.get(models.Profile, 5).user_id
+        db.add(models.MatchSwipe(user_id=other, target_profile_id=3, liked=True))  # Someone else's
+        db.commit()
+    buffer.add(rows(founder, [4]))
+
+    stmt = select(models.Profile.id).where(models.Profile.role == "investor").order_by(models.Profile.id)
+    with Session() as db:
+        assert db.execute(swipes.exclude_swiped(stmt, founder)).scalars().all() == [3, 5, 6]
+    buffer.stop()
+    with Session() as db:
+        assert db.execute(swipes.exclude_swiped(stmt, founder)).scalars().all() == [3, 5, 6]
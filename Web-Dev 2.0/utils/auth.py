@@ -1,23 +1,43 @@
 # utils/auth.py
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, make_transient_to_detached
 
-from database import get_db
+from database import get_async_db, get_db
 import models
+from utils.inference import InferenceExecutor
+from utils.match_cache import SharedCache, match_cache
 
 # Load secrets from environment (use .env in dev)
 SECRET_KEY = os.getenv("JWT_SECRET", os.getenv("SECRET_KEY", "please-change-me-in-prod"))
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
+# Resolved users are cached per token for a short time (0 disables)
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+# bcrypt cost (log2 rounds). Hashes made with another cost are re-hashed on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# At most PASSWORD_HASH_WORKERS hashes run at once, so logins can't take over the
+# request threads: async routes queue on this pool (PASSWORD_HASH_QUEUE), sync
+# routes hash on their own thread and are turned away when every slot is busy
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or (os.cpu_count() or 1)
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "64"))
+
 # Password hashing context
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+password_executor = InferenceExecutor(max_workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_QUEUE)
 
 # OAuth2 scheme for Bearer tokens (login endpoint url)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -36,6 +56,32 @@ def get_password_hash(password: str) -> str:
     return pwd_ctx.hash(password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    (valid, new_hash). new_hash is set when the stored hash was made with
+    another bcrypt cost (or scheme) and should replace it.
+    """
+    return pwd_ctx.verify_and_update(plain_password, hashed_password)
+
+
+_dummy_hash = None
+
+
+def check_login_password(plain_password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    verify_and_update_password for a login. An unknown account (hashed_password
+    None) is checked against a dummy hash of the same cost, so it takes as long
+    as a wrong password and doesn't reveal which emails are registered.
+    """
+    global _dummy_hash
+    if hashed_password is None:
+        if _dummy_hash is None:
+            _dummy_hash = pwd_ctx.hash("dummy-password-for-unknown-accounts")
+        pwd_ctx.verify(plain_password, _dummy_hash)
+        return False, None
+    return verify_and_update_password(plain_password, hashed_password)
+
+
 # ------------------------
 # JWT utilities
 # ------------------------
@@ -50,21 +96,198 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
     return token
 
 
-def decode_access_token(token: str) -> Optional[str]:
+def decode_access_token_claims(token: str) -> Optional[Dict[str, Any]]:
     """
-    Decode a JWT and return the subject (user id) or None if invalid.
+    Decode a JWT and return its claims, or None if invalid / expired.
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: Optional[str] = payload.get("sub")
-        return user_id
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
 
 
+def decode_access_token(token: str) -> Optional[str]:
+    """
+    Decode a JWT and return the subject (user id) or None if invalid.
+    """
+    claims = decode_access_token_claims(token)
+    return claims.get("sub") if claims else None
+
+
+# ------------------------
+# Authenticated-user cache
+# ------------------------
+class UserCache:
+    """
+    token hash -> column values of the user it resolved to.
+    Bounded by entry count (LRU) and age (TTL, never past the token's `exp`).
+    Entries are dropped on logout and whenever the user row changes.
+    """
+
+    def __init__(self, max_entries: int = AUTH_CACHE_MAX_ENTRIES, ttl_seconds: int = AUTH_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._by_user = {}  # user id -> token hashes, for invalidate_user
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self.token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            values, expires = entry
+            if time.monotonic() >= expires:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return values
+
+    def put(self, token: str, user: models.User, token_exp: Optional[float] = None):
+        if self.ttl_seconds <= 0:
+            return
+        expires = time.monotonic() + self.ttl_seconds
+        if token_exp is not None:
+            expires = min(expires, time.monotonic() + (token_exp - time.time()))
+        values = {c.key: getattr(user, c.key) for c in models.User.__table__.columns}
+        key = self.token_key(token)
+        with self._lock:
+            self._entries[key] = (values, expires)
+            self._by_user.setdefault(str(user.id), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        values, _ = self._entries.pop(key)
+        keys = self._by_user.get(str(values["id"]))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[str(values["id"])]
+
+    def invalidate_token(self, token: str):
+        with self._lock:
+            key = self.token_key(token)
+            if key in self._entries:
+                self._drop(key)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._by_user.get(str(user_id), ())):
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+
+user_cache = UserCache()
+
+
+class RevokedTokens:
+    """
+    Hashes of tokens revoked by logout, kept until the token would have
+    expired anyway. A JWT stays valid until `exp`, so without this a logged-out
+    token would simply be decoded (and cached) again on the next request.
+    Per process; with MATCH_CACHE_BACKEND=redis revocations also go to the
+    shared cache, so every worker honours them.
+    """
+
+    def __init__(self, shared=None):
+        self.shared = shared
+        self._expires = {}  # token hash -> exp (unix time)
+        self._lock = threading.Lock()
+        self._next_sweep = 1024
+
+    def revoke(self, token: str):
+        claims = decode_access_token_claims(token)
+        if not claims or "exp" not in claims:
+            return  # Invalid or already expired: nothing can use it
+        key = UserCache.token_key(token)
+        with self._lock:
+            self._expires[key] = claims["exp"]
+            if len(self._expires) >= self._next_sweep:
+                now = time.time()
+                self._expires = {k: exp for k, exp in self._expires.items() if exp > now}
+                self._next_sweep = 2 * len(self._expires) + 1024
+        if self.shared is not None:
+            self.shared.set(f"revoked:{key}", "1", max(1, int(claims["exp"] - time.time())))
+
+    def is_revoked(self, token: str) -> bool:
+        key = UserCache.token_key(token)
+        with self._lock:
+            exp = self._expires.get(key)
+        if exp is not None:
+            return exp > time.time()
+        return self.shared is not None and self.shared.get(f"revoked:{key}") is not None
+
+
+revoked_tokens = RevokedTokens(match_cache.backend if isinstance(match_cache.backend, SharedCache) else None)
+
+
+def revoke_token(token: str):
+    """Logout: the token is refused from now on, and its cached user dropped."""
+    revoked_tokens.revoke(token)
+    user_cache.invalidate_token(token)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _user_changed(mapper, connection, target):
+    user_cache.invalidate_user(target.id)
+
+
 # ------------------------
 # FastAPI dependency
 # ------------------------
+def resolve_user(token: str, db: Session) -> Optional[models.User]:
+    """
+    Return the user a token belongs to, or None.
+    A cache hit costs no JWT decode and no DB round trip: the cached row is
+    attached to `db` as a persistent instance without a SELECT.
+    """
+    if revoked_tokens.is_revoked(token):
+        return None
+    values = user_cache.get(token)
+    if values is not None:
+        user = models.User(**values)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    claims = decode_access_token_claims(token)
+    if not claims or not claims.get("sub"):
+        return None
+    user = db.query(models.User).filter(models.User.id == claims["sub"]).first()
+    if user is not None:
+        user_cache.put(token, user, claims.get("exp"))
+    return user
+
+
+async def resolve_user_async(token: str, db) -> Optional[models.User]:
+    """resolve_user for an AsyncSession (DB_ASYNC=true), same cache."""
+    if revoked_tokens.is_revoked(token):
+        return None
+    values = user_cache.get(token)
+    if values is not None:
+        user = models.User(**values)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    claims = decode_access_token_claims(token)
+    if not claims or not claims.get("sub"):
+        return None
+    user = (await db.execute(select(models.User).where(models.User.id == claims["sub"]))).scalar_one_or_none()
+    if user is not None:
+        user_cache.put(token, user, claims.get("exp"))
+    return user
+
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
     """
     FastAPI dependency - use in routes: current_user: models.User = Depends(get_current_user)
@@ -76,14 +299,21 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    user_id = decode_access_token(token)
-    if not user_id:
+    user = resolve_user(token, db)
+    if user is None:
         raise credentials_exception
+    return user
 
-    # Query user from DB. This is safe across SQLAlchemy versions:
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db=Depends(get_async_db)) -> models.User:
+    """get_current_user for the async routers."""
+    user = await resolve_user_async(token, db)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
@@ -0,0 +1,262 @@
+"""
+Persisted text vectors for profiles and projects (profile_embeddings /
+project_embeddings), so matching reads stored vectors instead of re-encoding
+`interests` on every request.
+
+Rows are tagged with the encoder version and a hash of the embedded text; a
+vector is re-encoded only when either changes. Writes never encode in the
+request: the routers commit, then embed_in_background() queues the row on the
+inference executor. Rows it misses (executor full, engine down) are encoded
+at the next /match/ request (profiles) or by the backfill:
+    python -m utils.embeddings --backfill
+"""
+import argparse
+import hashlib
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+import models
+from utils.inference import InferenceOverloaded, inference_executor
+from utils.match import get_ai_engine
+
+BACKFILL_BATCH = 256
+
+
+def profile_text(interests) -> str:
+    # Same text the matcher scores on
+    return interests if interests else "General"
+
+
+def project_text(project) -> str:
+    return f"{project.title}. {project.description}"
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _to_bytes(vector) -> bytes:
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def _from_row(row) -> np.ndarray:
+    return np.frombuffer(row.vector, dtype="<f4", count=row.dim)
+
+
+def _encode(ai_engine, texts: List[str]) -> np.ndarray:
+    return ai_engine.encode_texts(texts).detach().cpu().numpy().astype(np.float32)
+
+
+class VectorPlan:
+    """
+    Vectors for (id, text) items, in three steps so the DB work and the encode
+    can run in different places (the async routers keep the encode off the
+    event loop and the DB work on their own session):
+    plan_vectors (DB) -> encode_missing (CPU) -> store_vectors (DB).
+    """
+
+    def __init__(self, table, key_column: str, items: Sequence[Tuple[int, str]], version):
+        self.table = table
+        self.key_column = key_column
+        self.items = list(items)
+        self.version = version
+        self.vectors: Dict[int, np.ndarray] = {}
+        self.missing: List[Tuple[int, str]] = []
+        self.existing = {}
+        self.encoded = None
+
+    def stacked(self) -> np.ndarray:
+        """[N, d] vectors in item order; needs encode_missing first if anything was missing."""
+        if not self.items:
+            return np.zeros((0, 0), np.float32)
+        return np.stack([self.vectors[item_id] for item_id, _ in self.items])
+
+
+def plan_vectors(db: Session, table, key_column: str, items: Sequence[Tuple[int, str]], version) -> VectorPlan:
+    """Loads the stored rows; those with `version` and the current text hash are reused."""
+    plan = VectorPlan(table, key_column, items, version)
+    if not plan.items:
+        return plan
+    key = getattr(table, key_column)
+    ids = [item_id for item_id, _ in plan.items]
+    plan.existing = {getattr(row, key_column): row for row in db.query(table).filter(key.in_(ids)).all()}
+    for item_id, text in plan.items:
+        row = plan.existing.get(item_id)
+        if row is not None and row.model_version == version and row.text_hash == _text_hash(text):
+            plan.vectors[item_id] = _from_row(row)
+        else:
+            plan.missing.append((item_id, text))
+    return plan
+
+
+def encode_missing(plan: VectorPlan, ai_engine) -> VectorPlan:
+    """Encodes the texts plan_vectors found no current row for, in one batch. No DB access."""
+    if plan.missing and plan.encoded is None:
+        plan.encoded = _encode(ai_engine, [text for _, text in plan.missing])
+        for (item_id, _), vector in zip(plan.missing, plan.encoded):
+            plan.vectors[item_id] = vector
+    return plan
+
+
+def store_vectors(db: Session, plan: VectorPlan):
+    """Writes the vectors encode_missing produced (not committed)."""
+    if plan.encoded is None:
+        return
+    for (item_id, text), vector in zip(plan.missing, plan.encoded):
+        fields = {"model_version": plan.version, "text_hash": _text_hash(text),
+                  "dim": int(vector.shape[0]), "vector": _to_bytes(vector)}
+        row = plan.existing.get(item_id)
+        if row is None:
+            db.add(plan.table(**{plan.key_column: item_id}, **fields))
+        else:
+            for name, value in fields.items():
+                setattr(row, name, value)
+
+
+def _sync_vectors(db: Session, table, key_column: str, items: Sequence[Tuple[int, str]], ai_engine) -> Dict[int, np.ndarray]:
+    """
+    {id: vector} for (id, text) items. Stored rows with the current encoder
+    version and text hash are reused; the rest are encoded in one batch and
+    written back (not committed).
+    """
+    plan = encode_missing(plan_vectors(db, table, key_column, items, ai_engine.text_model_version), ai_engine)
+    store_vectors(db, plan)
+    return plan.vectors
+
+
+def profile_vector_plan(db: Session, rows: Sequence, version) -> VectorPlan:
+    """plan_vectors for rows with `.id` / `.interests` (Profile or column tuples)."""
+    items = [(row.id, profile_text(row.interests)) for row in rows]
+    return plan_vectors(db, models.ProfileEmbedding, "profile_id", items, version)
+
+
+def profile_vectors(db: Session, rows: Sequence, ai_engine) -> np.ndarray:
+    """[N, d] vectors for rows with `.id` / `.interests` (Profile or column tuples), in order."""
+    plan = encode_missing(profile_vector_plan(db, rows, ai_engine.text_model_version), ai_engine)
+    store_vectors(db, plan)
+    return plan.stacked()
+
+
+def score_planned(plan: VectorPlan, profile, candidates: Sequence, ai_engine) -> List[float]:
+    """
+    Hybrid scores of `profile` against `candidates` from a plan over
+    [profile, *candidates]; encodes what is missing. No DB access.
+    """
+    vectors = encode_missing(plan, ai_engine).stacked()
+    # Founders are scored as startups against investors, and vice versa
+    query_kind = "startup" if profile.role == "founder" else "investor"
+    return ai_engine.score_candidates(
+        None, profile.id, None, [c.id for c in candidates], query_kind=query_kind,
+        query_emb=vectors[0], candidate_emb=vectors[1:],
+    ).tolist()
+
+
+def score_profile_candidates(db: Session, profile: models.Profile, candidates: Sequence, ai_engine) -> List[float]:
+    """
+    Hybrid scores of `profile` against candidate rows (`.id` / `.interests`),
+    using stored vectors; only new or changed texts are encoded (and stored,
+    uncommitted).
+    """
+    if not candidates:
+        return []
+    plan = profile_vector_plan(db, [profile, *candidates], ai_engine.text_model_version)
+    scores = score_planned(plan, profile, candidates, ai_engine)
+    store_vectors(db, plan)
+    return scores
+
+
+def store_profile_embedding(db: Session, profile: models.Profile, ai_engine=None):
+    """Embeds `profile` in `db` (not committed); an encode failure is only logged."""
+    ai_engine = ai_engine if ai_engine is not None else get_ai_engine()
+    if ai_engine is None:
+        return  # Picked up later by the backfill / first match request
+    try:
+        profile_vectors(db, [profile], ai_engine)
+    except Exception as e:
+        print(f"[Embeddings] WARNING: profile {profile.id} not embedded: {e}")
+
+
+def store_project_embedding(db: Session, project: models.Project, ai_engine=None):
+    ai_engine = ai_engine if ai_engine is not None else get_ai_engine()
+    if ai_engine is None:
+        return
+    try:
+        _sync_vectors(db, models.ProjectEmbedding, "project_id", [(project.id, project_text(project))], ai_engine)
+    except Exception as e:
+        print(f"[Embeddings] WARNING: project {project.id} not embedded: {e}")
+
+
+def store_embedding_in_session(session_factory, model, row_id: int):
+    """store_*_embedding for a row committed elsewhere, in its own sync session."""
+    store = store_profile_embedding if model is models.Profile else store_project_embedding
+    try:
+        with session_factory() as db:
+            row = db.get(model, row_id)
+            if row is not None:
+                store(db, row)
+                db.commit()
+    except Exception as e:
+        # Nobody awaits the job: this is the only place the error shows up
+        print(f"[Embeddings] WARNING: {model.__tablename__} {row_id} not embedded: {e}")
+
+
+def embed_in_background(model, row_id: int, session_factory=None):
+    """
+    Queues the embedding of a just-committed profile/project on the inference
+    executor and returns at once, so a write never waits for an encode (or for
+    the first model load). Safe to call from the event loop.
+    """
+    if session_factory is None:
+        from database import SessionLocal
+        session_factory = SessionLocal
+    try:
+        return inference_executor.submit(store_embedding_in_session, session_factory, model, row_id)
+    except InferenceOverloaded:
+        print(f"[Embeddings] WARNING: executor busy, {model.__tablename__} {row_id} left for the backfill")
+
+
+def backfill(db: Session, ai_engine, batch: int = BACKFILL_BATCH) -> Tuple[int, int]:
+    """(profiles, projects) processed; rows that are already current cost no encode."""
+    counts = []
+    for table, emb_table, key_column, text_of in (
+        (models.Profile, models.ProfileEmbedding, "profile_id", lambda p: profile_text(p.interests)),
+        (models.Project, models.ProjectEmbedding, "project_id", project_text),
+    ):
+        done, last_id = 0, None
+        while True:
+            query = db.query(table).order_by(table.id)
+            if last_id is not None:
+                query = query.filter(table.id > last_id)
+            chunk = query.limit(batch).all()
+            if not chunk:
+                break
+            _sync_vectors(db, emb_table, key_column, [(row.id, text_of(row)) for row in chunk], ai_engine)
+            db.commit()
+            done += len(chunk)
+            last_id = chunk[-1].id
+        counts.append(done)
+    return tuple(counts)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Persist profile/project text embeddings.")
+    parser.add_argument("--backfill", action="store_true", help="Embed every existing profile and project")
+    parser.add_argument("--batch", type=int, default=BACKFILL_BATCH)
+    args = parser.parse_args()
+
+    if args.backfill:
+        engine = get_ai_engine()
+        if engine is None:
+            raise SystemExit("AI engine failed to load; nothing to backfill with")
+        db = SessionLocal()
+        try:
+            n_profiles, n_projects = backfill(db, engine, args.batch)
+        finally:
+            db.close()
+        print(f"[Embeddings] Backfill done: {n_profiles} profiles, {n_projects} projects")
+    else:
+        parser.print_help()
@@ -0,0 +1,144 @@
+"""
+Bounded executor for CPU-bound model calls made from async routes.
+
+Inference runs on a small dedicated thread pool (torch releases the GIL inside
+its kernels), so the event loop keeps serving other requests. At most
+`max_workers + max_queue` calls are admitted; beyond that the caller gets
+InferenceOverloaded with a Retry-After estimate instead of queueing forever.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- CONFIGURATION ---
+# Workers default to cores / torch intra-op threads, so concurrent calls don't oversubscribe the CPU
+INFERENCE_MAX_WORKERS = int(os.getenv("INFERENCE_MAX_WORKERS", "0")) or None
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "32"))
+INFERENCE_OVERLOAD_STATUS = int(os.getenv("INFERENCE_OVERLOAD_STATUS", "429"))
+
+
+class InferenceOverloaded(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def default_workers() -> int:
+    try:
+        import torch
+        intra_op = max(torch.get_num_threads(), 1)
+    except ImportError:
+        intra_op = 1
+    return max((os.cpu_count() or 1) // intra_op, 1)
+
+
+class InferenceExecutor:
+    def __init__(self, max_workers=INFERENCE_MAX_WORKERS, max_queue: int = INFERENCE_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = None
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._rejected = 0
+        self._avg_seconds = 0.05  # EWMA of call duration, for Retry-After
+
+    def _get_pool(self):
+        # Created on first use: sizing from torch threads must not import torch at app import
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self.max_workers = self.max_workers or default_workers()
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        return self._pool
+
+    @property
+    def capacity(self) -> int:
+        return (self.max_workers or default_workers()) + self.max_queue
+
+    def retry_after(self) -> int:
+        # Time for the current backlog to drain through the workers
+        workers = self.max_workers or default_workers()
+        return max(1, math.ceil(self._admitted * self._avg_seconds / workers))
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs fn(*args, **kwargs) on the pool; raises InferenceOverloaded when full."""
+        return await asyncio.wrap_future(self._submit(fn, args, kwargs))
+
+    def call(self, fn, *args, **kwargs):
+        """run() for sync callers (threadpool routes): blocks until fn returns."""
+        return self._submit(fn, args, kwargs).result()
+
+    def call_here(self, fn, *args, **kwargs):
+        """
+        call() run on the calling thread, for threadpool routes: the request
+        thread does the work instead of parking while a pool thread does it.
+        Admitted only while a worker slot is free, so it never queues:
+        InferenceOverloaded straight away otherwise. Shares the count of
+        run() calls, so both together stay within max_workers busy threads.
+        """
+        self._admit(self.max_workers or default_workers())
+        return self._timed(fn, args, kwargs)
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues fn without waiting for it; returns the Future. Same admission as run()."""
+        return self._submit(fn, args, kwargs)
+
+    def _admit(self, limit: int):
+        with self._lock:
+            if self._admitted >= limit:
+                self._rejected += 1
+                raise InferenceOverloaded(self.retry_after())
+            self._admitted += 1
+
+    def _timed(self, fn, args, kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                # Released by the worker, so a cancelled request still counts until its call ends
+                self._admitted -= 1
+                self._avg_seconds = 0.9 * self._avg_seconds + 0.1 * elapsed
+
+    def _submit(self, fn, args, kwargs):
+        pool = self._get_pool()
+        self._admit(self.capacity)
+
+        def timed():
+            return self._timed(fn, args, kwargs)
+
+        def release_if_cancelled(future):
+            # Cancelled before a worker picked it up: timed() never runs
+            if future.cancelled():
+                with self._lock:
+                    self._admitted -= 1
+
+        try:
+            future = pool.submit(timed)
+        except RuntimeError:
+            with self._lock:
+                self._admitted -= 1
+            raise
+        future.add_done_callback(release_if_cancelled)
+        return future
+
+    def stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._admitted,
+            "rejected": self._rejected,
+            "avg_ms": round(self._avg_seconds * 1000, 3),
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+inference_executor = InferenceExecutor()
@@ -1,7 +1,10 @@
 import sys
 import os
-import pandas as pd
+import threading
+import time
 from pathlib import Path
+
+from utils.match_cache import match_cache
  # Ensure ml_engine is importable
 
 # --- 1. PATH FIX (CRITICAL) ---
@@ -22,65 +25,202 @@ if not ROOT_DIR:
     ROOT_DIR = Path.cwd()
     print("WARNING: Could not locate project root containing 'ml_engine'.")
 
-# Import the Production AI Class
-try:
-    from ml_engine.production_model import FoundMatchProductionAI
-except ImportError:
-    print("ERROR: Could not import FoundMatchProductionAI. Check your python path.")
-    FoundMatchProductionAI = None
+# NOTE: torch / sentence_transformers are imported lazily inside get_ai_engine,
+# so importing the API (and routes that never score) stays fast.
 
 # --- 2. SINGLETON AI INSTANCE ---
 # We store the engine here so it is only loaded once per server restart
 _ai_instance = None
+_ai_lock = threading.Lock()
+
+# After a failed load, requests get None without retrying for this long
+# (doubling per consecutive failure, capped), instead of each one reloading
+AI_LOAD_RETRY_SECONDS = float(os.getenv("AI_LOAD_RETRY_SECONDS", "30"))
+AI_LOAD_RETRY_MAX_SECONDS = float(os.getenv("AI_LOAD_RETRY_MAX_SECONDS", "600"))
+_ai_failure = {"count": 0, "retry_at": 0.0}
+
+# Readiness as reported by /ready: not_started -> loading -> warming -> ready | failed
+_ai_state = {"status": "not_started", "warmup_rounds": 0, "p99_ms": None, "error": None, "retry_in_seconds": None}
 
 def get_ai_engine():
     """
     Returns the global, pre-loaded AI Engine instance.
     Initializes it on the first call if it doesn't exist.
+    Returns None if loading failed; the load is retried after a backoff.
     """
     global _ai_instance
     
     if _ai_instance is not None:
         return _ai_instance
+    if time.monotonic() < _ai_failure["retry_at"]:
+        return None
+
+    # Only one thread builds the engine (startup preload vs. an early request)
+    with _ai_lock:
+        if _ai_instance is None and time.monotonic() >= _ai_failure["retry_at"]:
+            try:
+                _ai_instance = _build_ai_engine()
+            except Exception as e:
+                _record_load_failure(e)
+                return None
+            _ai_failure.update(count=0, retry_at=0.0)
+            if _ai_state["status"] == "failed":
+                # A lazy retry succeeded after an earlier failure
+                _ai_state.update(status="ready", error=None, retry_in_seconds=None)
+            # New weights: no cached /match/ page may outlive them
+            match_cache.invalidate_all()
+    return _ai_instance
 
+
+def _record_load_failure(error):
+    _ai_failure["count"] += 1
+    delay = min(AI_LOAD_RETRY_SECONDS * 2 ** (_ai_failure["count"] - 1), AI_LOAD_RETRY_MAX_SECONDS)
+    _ai_failure["retry_at"] = time.monotonic() + delay
+    _ai_state.update(status="failed", error=str(error), retry_in_seconds=delay)
+    print(f"[AI Utils] Load failed ({_ai_failure['count']}x), next attempt in {delay:.0f}s")
+
+
+def _build_ai_engine():
     print("--- INITIALIZING CENTRAL AI ENGINE (Singleton) ---")
-    
-    if FoundMatchProductionAI is None:
-        return None
+
+    try:
+        from ml_engine.manifest import resolve_model_size
+        from ml_engine.production_model import FoundMatchProductionAI, load_edge_index
+        from ml_engine.embedding_store import EmbeddingStore
+    except ImportError:
+        print("ERROR: Could not import FoundMatchProductionAI. Check your python path.")
+        raise
 
     try:
         # Define Paths
         data_dir = ROOT_DIR / "data"
-        investors_path = data_dir / "processed_investors.csv"
-        startups_path = data_dir / "processed_startups.csv"
         model_path = data_dir / "foundmatch_graph.pth"
+        interactions_path = data_dir / "processed_interactions.csv"
+        store_path = data_dir / "text_embeddings.npy"
 
-        # Load Data Stats to size the model correctly
-        if investors_path.exists() and startups_path.exists():
-            n_inv = len(pd.read_csv(investors_path))
-            n_stu = len(pd.read_csv(startups_path))
-            print(f"[AI Utils] Stats: {n_inv} Investors, {n_stu} Startups")
-        else:
-            print("[AI Utils] WARNING: Data CSVs not found. Using fallback size 100.")
-            n_inv, n_stu = 100, 100
+        # Size the model from the training manifest (CSV row count as fallback)
+        n_inv, n_stu, manifest = resolve_model_size(data_dir, model_path)
+        source = "manifest" if manifest else "CSV row count"
+        print(f"[AI Utils] Stats ({source}): {n_inv} Investors, {n_stu} Startups")
+        embedding_dim = manifest["embedding_dim"] if manifest else 64
 
         # Initialize Engine
-        engine = FoundMatchProductionAI(n_inv, n_stu)
+        engine = FoundMatchProductionAI(n_inv, n_stu, embedding_dim=embedding_dim)
+        engine.model_version = _model_version(manifest, model_path)
 
-        # Load Weights
+        # Load Weights (and propagate once over the interaction graph)
         if model_path.exists():
-            engine.load_weights(str(model_path))
+            edge_index = None
+            if interactions_path.exists():
+                edge_index = load_edge_index(str(interactions_path), n_inv)
+            engine.load_weights(str(model_path), edge_index=edge_index)
         else:
             print("[AI Utils] WARNING: 'foundmatch_graph.pth' weights not found.")
 
-        _ai_instance = engine
-        return _ai_instance
+        # Known startups/investors are scored from the shared mmap store
+        store = EmbeddingStore.open_if_exists(str(store_path))
+        if store is not None:
+            engine.attach_embedding_store(store)
+
+        return engine
 
     except Exception as e:
         print(f"[AI Utils] CRITICAL INIT ERROR: {e}")
-        return None
+        raise
+
+
+def _model_version(manifest, model_path):
+    """
+    Manifest version, else a content hash of the weights file (the same tag
+    the training scripts write into manifests). New weights must change the version:
+    it keys the /match/ cache and ETags, and the scoring worker rescores rows
+    of any other version.
+    """
+    if manifest:
+        return manifest["model_version"]
+    if model_path.exists():
+        from ml_engine.manifest import weights_version
+        return weights_version(model_path)
+    return "unversioned"  # No weights: the random-init model never changes either way
+
+
+# --- 3. PRELOAD & WARMUP (used by main.py at startup) ---
+WARMUP_TEXTS = [
+    "General",
+    "AI-powered analytics for small businesses.",
+    "Seed-stage fintech investor focused on payments infrastructure.",
+    "Climate tech hardware for grid-scale energy storage.",
+    "B2B SaaS, developer tools, open source.",
+    "Healthcare marketplace connecting clinics and patients.",
+    "Early-stage deep tech fund, robotics and IoT.",
+    "Consumer social app for college students.",
+]
+
+def _p99(samples):
+    ordered = sorted(samples)
+    return ordered[int(0.99 * (len(ordered) - 1))]
+
+def warmup_ai_engine(engine, window=10, max_rounds=200, tolerance=0.2):
+    """
+    Runs warmup batches through the encoder and the graph path until the p99
+    latency of the last `window` rounds is within `tolerance` of the window
+    before it (or max_rounds is hit). Returns the steady p99 in ms.
+
+    The encoder is called directly, as in build_recommendation_index, so the
+    warmup texts never enter the request text cache (or its hit rate).
+    """
+    import torch
+
+    n = max(engine.num_users, 1)
+    m = max(engine.num_items, 1)
+    latencies = []
+    for i in range(max_rounds):
+        start = time.perf_counter()
+        with torch.no_grad():
+            emb = engine.nlp_model.encode(WARMUP_TEXTS, convert_to_tensor=True)
+        # Same scoring path as /match/ (utils/embeddings.score_profile_candidates)
+        engine.score_candidates(
+            None, i % n, None, [(i * 7 + k) % m for k in range(len(WARMUP_TEXTS))],
+            query_emb=emb[0], candidate_emb=emb,
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        _ai_state["warmup_rounds"] = i + 1
+
+        if len(latencies) >= 2 * window:
+            prev, last = _p99(latencies[-2 * window:-window]), _p99(latencies[-window:])
+            if abs(last - prev) <= tolerance * prev:
+                break
+    return _p99(latencies[-window:])
+
+def preload_ai_engine():
+    """Loads + warms the engine; meant to run in a background thread at startup."""
+    _ai_state["status"] = "loading"
+    try:
+        engine = get_ai_engine()
+        if engine is None:
+            raise RuntimeError(_ai_state["error"] or "AI engine failed to initialize")
+        _ai_state["status"] = "warming"
+        _ai_state["p99_ms"] = round(warmup_ai_engine(engine), 3)
+        _ai_state["status"] = "ready"
+        print(f"[AI Utils] READY after {_ai_state['warmup_rounds']} warmup rounds (p99 {_ai_state['p99_ms']} ms)")
+    except Exception as e:
+        _ai_state["status"] = "failed"
+        _ai_state["error"] = str(e)
+        print(f"[AI Utils] PRELOAD FAILED: {e}")
+
+def start_ai_preload():
+    thread = threading.Thread(target=preload_ai_engine, name="ai-preload", daemon=True)
+    thread.start()
+    return thread
+
+def ai_readiness():
+    return dict(_ai_state)
+
+def current_model_version():
+    """Version tag of the loaded engine, or None if it is not loaded (never triggers a load)."""
+    return _ai_instance.model_version if _ai_instance is not None else None
 
-# --- 3. HELPER UTILS (Legacy Support) ---
+# --- 4. HELPER UTILS (Legacy Support) ---
 
 def user_to_dict(user):
      return {
@@ -0,0 +1,214 @@
+"""
+Per-user cache of GET /match/ responses.
+
+Key: (user, filters, model version) plus two generation counters: one per
+user (bumped when their own profile changes) and one per candidate role
+(bumped when any profile of that role is created or updated). Bumping a
+counter orphans every affected entry at once, so invalidation never has to
+scan keys; orphans age out via TTL / LRU.
+
+Backends:
+    InProcessCache  default, per worker (MATCH_CACHE_BACKEND=memory)
+    SharedCache     any client with redis-style get / set(ex=) / incr,
+                    e.g. MATCH_CACHE_BACKEND=redis + MATCH_CACHE_REDIS_URL
+    none            disables caching
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# --- CONFIGURATION ---
+MATCH_CACHE_BACKEND = os.getenv("MATCH_CACHE_BACKEND", "memory")
+MATCH_CACHE_TTL_SECONDS = int(os.getenv("MATCH_CACHE_TTL_SECONDS", "300"))
+MATCH_CACHE_MAX_ENTRIES = int(os.getenv("MATCH_CACHE_MAX_ENTRIES", "10000"))
+MATCH_CACHE_REDIS_URL = os.getenv("MATCH_CACHE_REDIS_URL")
+
+
+class CacheBackend(ABC):
+    """Minimal interface a shared cache has to provide."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: int):
+        ...
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        ...
+
+
+class NullCache(CacheBackend):
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def incr(self, key):
+        return 0
+
+
+class InProcessCache(CacheBackend):
+    """LRU + TTL dict. Generation counters live apart so eviction never resets them."""
+
+    def __init__(self, max_entries: int = MATCH_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if time.monotonic() >= expires:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedCache(CacheBackend):
+    """Adapter for a shared store client (redis.Redis or anything with the same three calls)."""
+
+    def __init__(self, client, prefix: str = "foundmatch:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def incr(self, key):
+        return int(self.client.incr(self.prefix + key))
+
+    def counter(self, key):
+        return int(self.get(key) or 0)
+
+
+def _etag(body: str) -> str:
+    return '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match check (RFC 9110 weak comparison): `*`, or one of the
+    comma-separated entity-tags equal to `etag` once any W/ prefix is dropped.
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in tags:
+        return True
+    return _opaque_tag(etag) in {_opaque_tag(tag) for tag in tags}
+
+
+def _opaque_tag(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+class MatchCache:
+    def __init__(self, backend: CacheBackend, ttl_seconds: int = MATCH_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def _generation(self, name: str) -> int:
+        counter = getattr(self.backend, "counter", None)
+        return counter(f"gen:{name}") if counter else 0
+
+    def _key(self, user_id, candidate_role, filters: dict, model_version) -> str:
+        filters_key = json.dumps(filters, sort_keys=True, default=str)
+        return "match:" + hashlib.sha1(json.dumps([
+            str(user_id), candidate_role, filters_key, model_version,
+            self._generation(f"user:{user_id}"), self._generation(f"role:{candidate_role}"),
+            self._generation("all"),
+        ]).encode()).hexdigest()
+
+    def get(self, user_id, candidate_role, filters, model_version) -> Optional[Tuple[str, dict]]:
+        """(etag, payload) or None."""
+        raw = self.backend.get(self._key(user_id, candidate_role, filters, model_version))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _etag(raw), json.loads(raw)
+
+    def put(self, user_id, candidate_role, filters, model_version, payload: dict) -> str:
+        """Stores a JSON-able payload; returns its ETag."""
+        raw = json.dumps(payload, sort_keys=True, default=str)
+        self.backend.set(self._key(user_id, candidate_role, filters, model_version), raw, self.ttl_seconds)
+        return _etag(raw)
+
+    # --- INVALIDATION ---
+    def invalidate_user(self, user_id):
+        self.backend.incr(f"gen:user:{user_id}")
+
+    def invalidate_role(self, role):
+        """Every viewer whose candidates have this role."""
+        self.backend.incr(f"gen:role:{role}")
+
+    def invalidate_profile(self, user_id, *roles):
+        """A profile was created / updated: its owner's pages and every page listing that role."""
+        self.invalidate_user(user_id)
+        for role in set(roles):
+            self.invalidate_role(role)
+
+    def invalidate_all(self):
+        self.backend.incr("gen:all")
+
+    def stats(self):
+        return {"backend": type(self.backend).__name__, "hits": self.hits, "misses": self.misses}
+
+
+def _backend_from_env() -> CacheBackend:
+    if MATCH_CACHE_BACKEND == "none":
+        return NullCache()
+    if MATCH_CACHE_BACKEND == "redis":
+        import redis  # Optional dependency, only for the shared backend
+
+        return SharedCache(redis.Redis.from_url(MATCH_CACHE_REDIS_URL or "redis://localhost:6379/0"))
+    return InProcessCache()
+
+
+match_cache = MatchCache(_backend_from_env())
+
+
+def configure_match_cache(backend: CacheBackend, ttl_seconds: int = MATCH_CACHE_TTL_SECONDS) -> MatchCache:
+    """Swaps the backend in place (e.g. a shared cache, or a stand-in in tests)."""
+    match_cache.backend = backend
+    match_cache.ttl_seconds = ttl_seconds
+    return match_cache
@@ -0,0 +1,145 @@
+"""
+Minimal Prometheus metrics (text exposition format 0.0.4), served by GET /metrics.
+
+Counters and histograms are updated from SQLAlchemy pool events (database.py)
+and the swipe buffer (utils/swipes.py); gauges are callbacks read at scrape
+time. Values are per process: with several gunicorn workers each one reports
+its own pool, labelled by `pid`.
+"""
+import bisect
+import os
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted(labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._callbacks: Dict[LabelKey, Callable[[], float]] = {}
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        self._callbacks[_labels(labels)] = fn
+
+    def samples(self):
+        return [(self.name, key, float(fn())) for key, fn in list(self._callbacks.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.buckets = sorted(buckets)
+        self._values: Dict[LabelKey, List] = {}  # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            row = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, row in self._values.items():
+                cumulative = 0
+                for bound, n in zip(self.buckets, row):
+                    cumulative += n
+                    out.append((f"{self.name}_bucket", key + (("le", repr(float(bound))),), cumulative))
+                out.append((f"{self.name}_bucket", key + (("le", "+Inf"),), row[-1]))
+                out.append((f"{self.name}_sum", key, row[-2]))
+                out.append((f"{self.name}_count", key, row[-1]))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text) -> Counter:
+        return self._add(Counter(name, help_text))
+
+    def gauge(self, name, help_text) -> Gauge:
+        return self._add(Gauge(name, help_text))
+
+    def histogram(self, name, help_text, buckets) -> Histogram:
+        return self._add(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        pid = (("pid", str(os.getpid())),)
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_fmt_labels(key, pid)} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# --- DB POOL ---
+# Labelled by `engine` ("sync" / "async")
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", POOL_WAIT_BUCKETS)
+pool_checkouts = registry.counter("db_pool_checkouts_total", "Connections checked out of the pool")
+pool_checkout_timeouts = registry.counter("db_pool_checkout_timeouts_total", "Checkouts that gave up after pool_timeout")
+pool_connects = registry.counter("db_pool_connections_created_total", "New DBAPI connections opened")
+pool_invalidations = registry.counter("db_pool_invalidations_total", "Connections invalidated (hard / soft)")
+pool_in_use = registry.gauge("db_pool_connections_in_use", "Connections currently checked out")
+pool_idle = registry.gauge("db_pool_connections_idle", "Connections idle in the pool")
+pool_overflow = registry.gauge("db_pool_overflow", "Connections open beyond pool_size (negative: pool not full yet)")
+pool_size = registry.gauge("db_pool_size", "Configured pool_size")
+
+# --- SWIPE BUFFER (utils/swipes.py) ---
+swipe_buffer_pending = registry.gauge("swipe_buffer_pending_rows", "Swipes queued and not yet written")
+swipe_rows_written = registry.counter("swipe_rows_written_total", "Swipes written by buffer flushes")
+swipe_flush_failures = registry.counter("swipe_flush_failures_total", "Buffer flushes that failed and were requeued")
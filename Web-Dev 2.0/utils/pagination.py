@@ -0,0 +1,174 @@
+import base64
+import heapq
+import json
+import os
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+# --- CONFIGURATION ---
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+RANKING_TTL_SECONDS = int(os.getenv("MATCH_RANKING_TTL_SECONDS", "600"))
+RANKING_CACHE_SIZE = int(os.getenv("MATCH_RANKING_CACHE_SIZE", "1024"))
+# Ranks kept per cached ranking; deeper pages re-rank and keep the next window
+RANKING_MAX_DEPTH = int(os.getenv("MATCH_RANKING_MAX_DEPTH", "500"))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# --- OPAQUE CURSORS ---
+# The client only ever sees a base64 token. Inside is the ranking it belongs
+# to, the offset of the next page, the filters it was built with, the version
+# that scored it and the (score, id) of the last row it followed, so any
+# worker can rebuild the rest of the ranking it points at.
+
+class Cursor(NamedTuple):
+    ranking_id: Optional[str]
+    offset: int
+    filters: dict
+    version: Optional[str] = None
+    after: Optional[Tuple[float, int]] = None
+
+
+def encode_cursor(ranking_id: str, offset: int, filters: Optional[dict] = None, version: Optional[str] = None,
+                  after: Optional[Tuple[float, int]] = None) -> str:
+    data = {"r": ranking_id, "o": offset}
+    if filters:
+        data["f"] = filters
+    if version is not None:
+        data["v"] = version
+    if after is not None:
+        data["a"] = list(after)
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        ranking_id, offset, filters = str(data["r"]), int(data["o"]), dict(data.get("f") or {})
+        version = None if data.get("v") is None else str(data["v"])
+        after = None if data.get("a") is None else (float(data["a"][0]), int(data["a"][1]))
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+    if offset < 0:
+        raise InvalidCursor("Malformed cursor")
+    return Cursor(ranking_id, offset, filters, version, after)
+
+
+def ranks_after(candidate_ids: List[int], scores: List[float], after: Optional[Tuple[float, int]]) -> List[int]:
+    """
+    Indices of the candidates ranked below `after` (score, id): lower score,
+    or the same score and a higher id. Rankings break ties by id (candidates
+    are listed in id order), so a rebuilt ranking resumes where the cursor
+    left off even if rows before it were swiped or deleted since.
+    """
+    if after is None:
+        return list(range(len(candidate_ids)))
+    score, last_id = after
+    return [i for i, (c, s) in enumerate(zip(candidate_ids, scores)) if s < score or (s == score and c > last_id)]
+
+
+# --- PARTIAL TOP-K ---
+
+def top_k_indices(scores: List[float], k: int) -> List[int]:
+    """
+    Indices of the k highest scores, best first (ties keep input order).
+    Heap selection: O(N log k) instead of sorting all N candidates.
+    """
+    if k >= len(scores):
+        return sorted(range(len(scores)), key=lambda i: -scores[i])
+    return heapq.nlargest(k, range(len(scores)), key=scores.__getitem__)
+
+
+# --- RANKED ORDER CACHE ---
+
+class RankingCache:
+    """
+    Keeps a window of the ranked candidates of a /match/ query (ids + scores
+    only) so later pages are sliced from it instead of re-scoring everyone.
+    Bounded by entry count (LRU), age (TTL) and window length (max_depth).
+    Entries are per process: a page it does not cover is re-ranked by the
+    caller and put back under the same id (see routers/match.py).
+    """
+
+    def __init__(self, max_entries: int = RANKING_CACHE_SIZE, ttl_seconds: int = RANKING_TTL_SECONDS, max_depth: int = RANKING_MAX_DEPTH):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_depth = max_depth
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, owner, candidate_ids: List[int], scores: List[float], version: Optional[str] = None,
+            start: int = 0, ranking_id: Optional[str] = None) -> str:
+        """
+        Ranks the candidates and keeps the first max_depth of them as ranks
+        start, start + 1, ... (the candidates left after the rows a cursor
+        already showed); returns the ranking id (new unless `ranking_id` is given).
+        """
+        ranking_id = ranking_id or uuid.uuid4().hex
+        order = top_k_indices(scores, self.max_depth)
+        entry = {
+            "start": start,
+            "ids": array("q", (candidate_ids[i] for i in order)),
+            "scores": array("d", (scores[i] for i in order)),
+            "total": start + len(candidate_ids),
+            "version": version,
+            "created": time.monotonic(),
+        }
+        with self._lock:
+            # Keyed by owner too: a cursor never reaches another user's ranking
+            self._entries[(owner, ranking_id)] = entry
+            self._entries.move_to_end((owner, ranking_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return ranking_id
+
+    def _get(self, ranking_id: str, owner):
+        with self._lock:
+            entry = self._entries.get((owner, ranking_id))
+            if entry is None:
+                return None
+            if time.monotonic() - entry["created"] > self.ttl_seconds:
+                del self._entries[(owner, ranking_id)]
+                return None
+            self._entries.move_to_end((owner, ranking_id))
+            return entry
+
+    @staticmethod
+    def _covers(entry, offset: int, limit: int) -> bool:
+        end = entry["start"] + len(entry["ids"])
+        return entry["start"] <= offset and (offset + limit <= end or end >= entry["total"])
+
+    def covers(self, ranking_id: Optional[str], owner, offset: int, limit: int) -> bool:
+        """True if page(ranking_id, owner, offset, limit) would be served from this cache."""
+        entry = self._get(ranking_id, owner)
+        return entry is not None and self._covers(entry, offset, limit)
+
+    def page(self, ranking_id: str, owner, offset: int, limit: int) -> Optional[Tuple[List[Tuple[int, float]], Optional[int], Optional[str]]]:
+        """
+        ([(candidate_id, score), ...], next_offset or None, version) for one
+        page, or None if the ranking is unknown / expired / not owned by
+        `owner`, or the page is outside its window.
+        """
+        entry = self._get(ranking_id, owner)
+        if entry is None or not self._covers(entry, offset, limit):
+            return None
+        lo = offset - entry["start"]
+        rows = list(zip(entry["ids"][lo:lo + limit], entry["scores"][lo:lo + limit]))
+        end = offset + limit
+        return rows, (end if end < entry["total"] else None), entry["version"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+ranking_cache = RankingCache()
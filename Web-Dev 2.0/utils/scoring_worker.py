@@ -0,0 +1,317 @@
+"""
+Background job that materializes each profile's top-N ranking into `matches`,
+so GET /match/ is a single indexed read instead of an online scoring pass.
+
+Run next to the API (one process is enough):
+    python -m utils.scoring_worker            # loop forever
+    python -m utils.scoring_worker --once     # one pass, e.g. from cron
+
+or in-process with MATCH_SCORING_WORKER=true (see main.py).
+"""
+import argparse
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, exists, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+import models
+from utils.embeddings import score_profile_candidates
+from utils.match import get_ai_engine
+from utils.pagination import top_k_indices
+from utils.swipes import not_swiped
+
+# --- CONFIGURATION ---
+TOP_N = int(os.getenv("MATCH_TOP_N", "200"))
+SCORING_INTERVAL_SECONDS = int(os.getenv("MATCH_SCORING_INTERVAL_SECONDS", "60"))
+SCORING_BATCH = int(os.getenv("MATCH_SCORING_BATCH", "100"))
+# Rows older than this are rescored even if nothing flagged them
+MAX_AGE_SECONDS = int(os.getenv("MATCH_MAX_AGE_SECONDS", str(24 * 3600)))
+# Viewers per statement when entering a new candidate (bound-parameter limits)
+INSERT_CHUNK = 500
+# A failed job is skipped until its backoff expires (doubled per failure), so
+# a profile that fails every time can't take a batch slot on every pass
+RETRY_SECONDS = float(os.getenv("MATCH_SCORING_RETRY_SECONDS", "60"))
+RETRY_MAX_SECONDS = float(os.getenv("MATCH_SCORING_RETRY_MAX_SECONDS", "3600"))
+_failures = {}  # (job, profile_id) -> {"count", "retry_at"}
+
+
+def _backing_off(job):
+    now = time.monotonic()
+    return [profile_id for (kind, profile_id), failure in _failures.items() if kind == job and failure["retry_at"] > now]
+
+
+def _record_failure(job, profile_id, error):
+    failure = _failures.setdefault((job, profile_id), {"count": 0, "retry_at": 0.0})
+    failure["count"] += 1
+    delay = min(RETRY_SECONDS * 2 ** (failure["count"] - 1), RETRY_MAX_SECONDS)
+    failure["retry_at"] = time.monotonic() + delay
+    print(f"[Scoring] WARNING: {job} of profile {profile_id} failed ({failure['count']}x), next attempt in {delay:.0f}s: {error}")
+
+
+def _target_role(role):
+    return "investor" if role == "founder" else "founder"
+
+
+def _match_row(viewer, viewer_role, candidate, score, model_version, now):
+    founder_uid, investor_uid = (viewer.user_id, candidate.user_id) if viewer_role == "founder" else (candidate.user_id, viewer.user_id)
+    return {
+        "profile_id": viewer.id,
+        "candidate_profile_id": candidate.id,
+        "entrepreneur_id": founder_uid,
+        "investor_id": investor_uid,
+        "match_score": score,
+        "model_version": model_version,
+        "scored_at": now,
+        "is_stale": False,
+    }
+
+
+def score_profile(db: Session, profile: models.Profile, ai_engine, top_n: int = TOP_N) -> int:
+    """
+    Scores every opposite-role candidate for `profile` in one vectorized pass
+    and replaces its rows in `matches` with the top-N. Does not commit.
+    Records the pass on the profile even if no candidate qualified.
+    """
+    candidates = (
+        db.query(models.Profile.id, models.Profile.user_id, models.Profile.interests)
+        .filter(models.Profile.role == _target_role(profile.role))
+        .filter(not_swiped(profile.user_id))  # Already swiped: not worth a top-N slot
+        .order_by(models.Profile.id)  # Ties by id, as the online ranking continuing it
+        .all()
+    )
+    scores = [50.0] * len(candidates)  # Default
+    model_version = None
+    if ai_engine is not None and candidates:
+        scores = score_profile_candidates(db, profile, candidates, ai_engine)
+        model_version = ai_engine.model_version
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        _match_row(profile, profile.role, candidates[i], scores[i], model_version, now)
+        for i in top_k_indices(scores, top_n)
+    ]
+
+    # Replace the profile's ranking as a whole: rows that fell out of the top-N go too
+    db.query(models.Match).filter(models.Match.profile_id == profile.id).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(models.Match), rows)
+    profile.ranked_at = now
+    profile.ranking_version = model_version
+    return len(rows)
+
+
+def profiles_needing_scoring(db: Session, model_version=None, limit: int = SCORING_BATCH, skip=()):
+    """
+    Profiles never ranked, ranked too long ago or by another model version, or
+    with a row flagged stale. Decided from profiles.ranked_at / ranking_version,
+    so a profile without candidates is not picked again on every pass.
+    Ids in `skip` (failed jobs backing off) are left out.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=MAX_AGE_SECONDS)
+    has_stale = exists().where(and_(models.Match.profile_id == models.Profile.id, models.Match.is_stale.is_(True)))
+    needed = [models.Profile.ranked_at.is_(None), models.Profile.ranked_at < cutoff, has_stale]
+    if model_version is not None:
+        needed.append(or_(models.Profile.ranking_version.is_(None), models.Profile.ranking_version != model_version))
+    return (
+        db.query(models.Profile)
+        .filter(models.Profile.role.in_(("founder", "investor")))
+        .filter(or_(*needed))
+        .filter(models.Profile.id.notin_(skip))
+        .order_by(models.Profile.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def insert_candidate(db: Session, candidate: models.Profile, ai_engine, top_n: int = TOP_N) -> int:
+    """
+    Enters a new or changed profile into the opposite-role rankings it now
+    belongs in, without rescoring them: it is scored against every viewer in
+    one vectorized pass (the hybrid score is symmetric) and kept where it beats
+    the viewer's current N-th score, evicting that row. Viewers never ranked,
+    or already ranking it, are left to score_profile. Does not commit.
+    Returns how many rankings it entered.
+    """
+    candidate.candidate_pending = False
+    viewers = (
+        db.query(models.Profile.id, models.Profile.user_id, models.Profile.interests)
+        .filter(models.Profile.role == _target_role(candidate.role))
+        .filter(models.Profile.ranked_at.isnot(None))
+        .filter(~exists().where(
+            models.Match.profile_id == models.Profile.id, models.Match.candidate_profile_id == candidate.id))
+        .filter(~exists().where(
+            models.MatchSwipe.user_id == models.Profile.user_id, models.MatchSwipe.target_profile_id == candidate.id))
+        .order_by(models.Profile.id)
+        .all()
+    )
+    if not viewers:
+        return 0
+    scores = [50.0] * len(viewers)  # Default, as in score_profile
+    model_version = None
+    if ai_engine is not None:
+        scores = score_profile_candidates(db, candidate, viewers, ai_engine)
+        model_version = ai_engine.model_version
+
+    now = datetime.now(timezone.utc)
+    viewer_role = _target_role(candidate.role)
+    ranked = models.Match.candidate_profile_id.isnot(None)
+    entered = 0
+    for lo in range(0, len(viewers), INSERT_CHUNK):
+        chunk = list(zip(viewers[lo:lo + INSERT_CHUNK], scores[lo:lo + INSERT_CHUNK]))
+        # Size and N-th (lowest kept) score of each viewer's ranking
+        kept = {
+            profile_id: (n, lowest) for profile_id, n, lowest in db.query(
+                models.Match.profile_id, func.count(models.Match.id), func.min(models.Match.match_score)
+            ).filter(models.Match.profile_id.in_([v.id for v, _ in chunk]), ranked).group_by(models.Match.profile_id)
+        }
+        rows, full = [], []
+        for viewer, score in chunk:
+            n, lowest = kept.get(viewer.id, (0, None))
+            if n >= top_n:
+                if score <= lowest:
+                    continue
+                full.append(viewer.id)
+            rows.append(_match_row(viewer, viewer_role, candidate, score, model_version, now))
+        if full:
+            # The last row of each full ranking, in get_matches order
+            position = func.row_number().over(
+                partition_by=models.Match.profile_id,
+                order_by=(models.Match.match_score, models.Match.candidate_profile_id.desc()),
+            ).label("position")
+            last = select(models.Match.id, position).where(models.Match.profile_id.in_(full), ranked).subquery()
+            db.query(models.Match).filter(
+                models.Match.id.in_(select(last.c.id).where(last.c.position == 1))
+            ).delete(synchronize_session=False)
+        if rows:
+            db.execute(insert(models.Match), rows)
+        entered += len(rows)
+    return entered
+
+
+def profiles_pending_insert(db: Session, limit: int = SCORING_BATCH, skip=()):
+    return (
+        db.query(models.Profile)
+        .filter(models.Profile.candidate_pending.is_(True), models.Profile.role.in_(("founder", "investor")))
+        .filter(models.Profile.id.notin_(skip))
+        .order_by(models.Profile.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def mark_profile_changed(db: Session, profile: models.Profile, created: bool = False):
+    """
+    Records what a profile write invalidates. Does not commit.
+    Its own ranking is rescored, and the rankings it appears in are flagged
+    stale. Rankings it is not in yet get it from insert_candidate (queued with
+    candidate_pending), so a new profile rescores no one else's ranking.
+    """
+    profile.ranked_at = None  # Its own ranking, even one without rows (e.g. after a role change)
+    profile.candidate_pending = True
+    if created:
+        return  # Nobody ranks it yet, and it has no ranking of its own
+    affected = or_(models.Match.profile_id == profile.id, models.Match.candidate_profile_id == profile.id)
+    db.query(models.Match).filter(affected).update({models.Match.is_stale: True}, synchronize_session=False)
+
+
+def run_scoring_pass(db: Session, ai_engine=None, batch: int = SCORING_BATCH, top_n: int = TOP_N) -> int:
+    """
+    Enters up to `batch` pending candidates into existing rankings, then
+    rescores up to `batch` profiles; returns how many of these jobs ran.
+    A job that fails is retried on a later pass, after a backoff.
+    """
+    ai_engine = ai_engine if ai_engine is not None else get_ai_engine()
+    model_version = ai_engine.model_version if ai_engine is not None else None
+    scored = 0
+    for candidate in profiles_pending_insert(db, batch, _backing_off("insert")):
+        candidate_id = candidate.id
+        try:
+            insert_candidate(db, candidate, ai_engine, top_n)
+            db.commit()
+            scored += 1
+            _failures.pop(("insert", candidate_id), None)
+        except Exception as e:
+            db.rollback()
+            _record_failure("insert", candidate_id, e)
+    for profile in profiles_needing_scoring(db, model_version, batch, _backing_off("ranking")):
+        profile_id = profile.id
+        try:
+            score_profile(db, profile, ai_engine, top_n)
+            db.commit()
+            scored += 1
+            _failures.pop(("ranking", profile_id), None)
+        except Exception as e:
+            db.rollback()
+            _record_failure("ranking", profile_id, e)
+    return scored
+
+
+class ScoringWorker:
+    """Daemon thread draining run_scoring_pass until nothing is left, then sleeping."""
+
+    def __init__(self, session_factory, interval_seconds: int = SCORING_INTERVAL_SECONDS, batch: int = SCORING_BATCH):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.batch = batch
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="match-scoring", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            db = self.session_factory()
+            try:
+                scored = run_scoring_pass(db, batch=self.batch)
+                if scored:
+                    print(f"[Scoring] Materialized rankings for {scored} profiles")
+            except Exception as e:
+                print(f"[Scoring] WARNING: scoring pass failed: {e}")
+                scored = 0
+            finally:
+                db.close()
+            # Full batch: there is probably more backlog, go again right away
+            if scored < self.batch:
+                self._stop.wait(self.interval_seconds)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Materialize top-N match rankings into the matches table.")
+    parser.add_argument("--once", action="store_true", help="Drain the backlog once and exit")
+    parser.add_argument("--batch", type=int, default=SCORING_BATCH)
+    parser.add_argument("--interval", type=int, default=SCORING_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    if args.once:
+        total = 0
+        while True:
+            db = SessionLocal()
+            try:
+                scored = run_scoring_pass(db, batch=args.batch)
+            finally:
+                db.close()
+            total += scored
+            if scored < args.batch:
+                break
+        print(f"[Scoring] Done: {total} profiles scored")
+    else:
+        worker = ScoringWorker(SessionLocal, args.interval, args.batch)
+        worker.start()
+        try:
+            worker._thread.join()
+        except KeyboardInterrupt:
+            worker.stop()
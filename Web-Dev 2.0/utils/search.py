@@ -0,0 +1,79 @@
+"""
+Indexed substring search for the /match/ `search` (full_name) and `domain`
+(interests) filters, picked per dialect:
+
+    postgresql  ILIKE '%term%', served by pg_trgm GIN indexes (alembic migration)
+    sqlite      trigram FTS5 shadow table `profiles_fts`, kept in sync by triggers
+    other       plain ILIKE (full scan)
+
+Both keep the old case-insensitive substring semantics.
+"""
+from sqlalchemy import column, select, table, text
+from sqlalchemy.engine import Engine
+
+import models
+
+FTS_TABLE = "profiles_fts"
+TRIGRAM_MIN_CHARS = 3
+
+_fts = table(FTS_TABLE, column("rowid"), column("full_name"), column("interests"))
+
+# SQLite database files that have the FTS table (set by ensure_search_index);
+# by file, so the aiosqlite engine on the same database uses it too
+_fts_databases = set()
+
+_SQLITE_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        full_name, interests, content='profiles', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON profiles BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, full_name, interests) VALUES (new.id, new.full_name, new.interests);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON profiles BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, full_name, interests) VALUES ('delete', old.id, old.full_name, old.interests);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON profiles BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, full_name, interests) VALUES ('delete', old.id, old.full_name, old.interests);
+        INSERT INTO {FTS_TABLE}(rowid, full_name, interests) VALUES (new.id, new.full_name, new.interests);
+    END""",
+]
+
+
+def ensure_search_index(engine: Engine):
+    """
+    SQLite: create the FTS5 shadow table + triggers (and index existing rows
+    the first time). Postgres indexes come from alembic, nothing to do here.
+    """
+    if engine.url.get_backend_name() != "sqlite":
+        return
+    with engine.begin() as conn:
+        existed = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).first() is not None
+        for ddl in _SQLITE_FTS_DDL:
+            conn.execute(text(ddl))
+        if not existed:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    _fts_databases.add(engine.url.database)
+
+
+def apply_text_filters(db, query, search=None, domain=None):
+    """Adds the `search` / `domain` filters to a Profile query using the dialect's text index."""
+    terms = [(name, term) for name, term in (("full_name", search), ("interests", domain)) if term]
+    if not terms:
+        return query
+    bind = db.get_bind()
+    if bind.dialect.name == "sqlite" and bind.url.database in _fts_databases:
+        # Case-insensitive LIKE on a trigram FTS5 table is answered from the index;
+        # the terms go into one FTS lookup so it intersects them itself. Terms
+        # under 3 characters have no trigram (and crash SQLite 3.40 when mixed
+        # with another term), so they are matched on the profiles row instead.
+        fts_terms = [(name, term) for name, term in terms if len(term) >= TRIGRAM_MIN_CHARS]
+        terms = [(name, term) for name, term in terms if len(term) < TRIGRAM_MIN_CHARS]
+        if fts_terms:
+            ids = select(_fts.c.rowid).where(*[_fts.c[name].like(f"%{term}%") for name, term in fts_terms])
+            query = query.filter(models.Profile.id.in_(ids))
+    # Postgres: the pg_trgm GIN indexes serve ILIKE '%term%'
+    for name, term in terms:
+        query = query.filter(getattr(models.Profile, name).ilike(f"%{term}%"))
+    return query
@@ -0,0 +1,289 @@
+"""
+Write-behind buffer for match swipes.
+
+POST /match/swipe and /match/swipes only validate the targets (one query per
+request) and queue the rows here. A background thread writes them in batches:
+one multi-row INSERT, or COPY on Postgres/psycopg2, flushed when
+SWIPE_BUFFER_MAX_ROWS rows are queued or every SWIPE_BUFFER_FLUSH_SECONDS,
+and once more on shutdown (main.py lifespan, atexit as a backstop).
+
+Rows still queued when the process is killed hard are lost; set
+SWIPE_WRITE_BEHIND=false to write every request through instead.
+
+GET /match/ never returns a profile the user already swiped: candidate
+queries anti-join match_swipes on ix_match_swipes_user_target (exclude_swiped),
+and rows still queued here are excluded by id. The queue is per process: with
+several workers, a swipe queued in one of them can still show up in another
+worker's /match/ until the flush (SWIPE_BUFFER_FLUSH_SECONDS). That staleness
+is accepted; SWIPE_WRITE_BEHIND=false removes it. With SWIPED_IDS_CACHE=true each
+process also keeps the swiped ids of recent users in memory (SwipedIds), so the
+online scoring pass filters them without the anti-join.
+"""
+import atexit
+import csv
+import io
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import exists, insert, select
+from sqlalchemy.orm import Session
+
+import models
+from utils import metrics
+
+# --- CONFIGURATION ---
+SWIPE_WRITE_BEHIND = os.getenv("SWIPE_WRITE_BEHIND", "true").lower() == "true"
+SWIPE_BUFFER_MAX_ROWS = int(os.getenv("SWIPE_BUFFER_MAX_ROWS", "500"))
+SWIPE_BUFFER_FLUSH_SECONDS = float(os.getenv("SWIPE_BUFFER_FLUSH_SECONDS", "1.0"))
+# Beyond this many queued rows (e.g. the database is down) swipes are refused with 503
+SWIPE_BUFFER_MAX_PENDING = int(os.getenv("SWIPE_BUFFER_MAX_PENDING", "20000"))
+SWIPE_BULK_MAX = int(os.getenv("SWIPE_BULK_MAX", "200"))
+# Per-process swiped-id sets. Other workers' swipes show up after the TTL, so
+# keep it short when requests of one user are spread over several processes.
+SWIPED_IDS_CACHE = os.getenv("SWIPED_IDS_CACHE", "false").lower() == "true"
+SWIPED_IDS_TTL_SECONDS = int(os.getenv("SWIPED_IDS_TTL_SECONDS", "60"))
+SWIPED_IDS_MAX_USERS = int(os.getenv("SWIPED_IDS_MAX_USERS", "10000"))
+# Users with more swipes than this are served by the anti-join only
+SWIPED_IDS_MAX_PER_USER = int(os.getenv("SWIPED_IDS_MAX_PER_USER", "5000"))
+
+COPY_COLUMNS = ("user_id", "target_profile_id", "liked", "type", "created_at")
+
+
+class SwipeBufferFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Swipe buffer full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def swipe_rows(user_id, swipes) -> List[dict]:
+    """MatchSwipe rows for `swipes` (SwipeIn), stamped now rather than at flush time."""
+    now = datetime.utcnow()
+    return [
+        {"user_id": user_id, "target_profile_id": s.target_id, "liked": s.liked, "type": s.type, "created_at": now}
+        for s in swipes
+    ]
+
+
+def existing_targets_stmt(target_ids: Iterable[int]):
+    """The ids among `target_ids` that are still profiles: one query per batch."""
+    return select(models.Profile.id).where(models.Profile.id.in_(set(target_ids)))
+
+
+def swiped_ids_stmt(user_id):
+    return select(models.MatchSwipe.target_profile_id).where(models.MatchSwipe.user_id == user_id)
+
+
+def not_swiped(user_id):
+    """Anti-join condition on Profile: a probe of ix_match_swipes_user_target per candidate."""
+    return ~exists().where(
+        models.MatchSwipe.user_id == user_id,
+        models.MatchSwipe.target_profile_id == models.Profile.id,
+    )
+
+
+def exclude_swiped(stmt, user_id):
+    """`stmt` (selecting Profile) without the profiles `user_id` swiped, written or still queued."""
+    stmt = stmt.where(not_swiped(user_id))
+    pending = swipe_buffer.pending_targets(user_id)
+    if pending:
+        stmt = stmt.where(models.Profile.id.notin_(pending))
+    return stmt
+
+
+def _copy_swipes(db: Session, rows: List[dict]):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([row["user_id"], row["target_profile_id"], row["liked"], row["type"], row["created_at"].isoformat()])
+    buf.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY match_swipes ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buf)
+    finally:
+        cursor.close()
+
+
+def write_swipes(db: Session, rows: List[dict]):
+    """Inserts `rows` in one statement (COPY on Postgres/psycopg2). Does not commit."""
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2":
+        _copy_swipes(db, rows)
+    else:
+        # executemany: a multi-row VALUES on Postgres drivers, one prepared statement on SQLite
+        db.execute(insert(models.MatchSwipe), rows)
+
+
+def _index(by_user: Dict[object, Set[int]], rows: List[dict]):
+    for row in rows:
+        by_user.setdefault(row["user_id"], set()).add(row["target_profile_id"])
+
+
+class SwipeBuffer:
+    """Queues swipe rows and writes them from a daemon thread, by size or by time."""
+
+    def __init__(self, session_factory=None, max_rows: int = SWIPE_BUFFER_MAX_ROWS,
+                 flush_seconds: float = SWIPE_BUFFER_FLUSH_SECONDS, max_pending: int = SWIPE_BUFFER_MAX_PENDING):
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._rows: List[dict] = []
+        # user id -> queued target ids, so pending_targets() doesn't scan the queue;
+        # the batch being written keeps its index until it is committed
+        self._queued: Dict[object, Set[int]] = {}
+        self._in_flight: Dict[object, Set[int]] = {}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # One batch in flight: keeps rows in arrival order
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, rows: List[dict]):
+        """Queues `rows`; raises SwipeBufferFull when too many are waiting to be written."""
+        self.start()
+        with self._cond:
+            if len(self._rows) + len(rows) > self.max_pending:
+                raise SwipeBufferFull(max(1, math.ceil(self.flush_seconds)))
+            self._rows.extend(rows)
+            _index(self._queued, rows)
+            if len(self._rows) >= self.max_rows:
+                self._cond.notify()
+
+    def start(self):
+        # Started on first use too, so scripts and tests without the lifespan still flush
+        if self._thread is None:
+            with self._cond:
+                if self._thread is None:
+                    self._stop.clear()
+                    self._thread = threading.Thread(target=self._run, name="swipe-buffer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.stop)
+
+    def stop(self, timeout=10):
+        """Stops the thread and writes whatever is still queued."""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def pending_targets(self, user_id) -> Set[int]:
+        """Targets `user_id` swiped that are queued here and not in the table yet."""
+        with self._cond:
+            return self._queued.get(user_id, set()) | self._in_flight.get(user_id, set())
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._rows) >= self.max_rows or self._stop.is_set(), self.flush_seconds)
+            self.flush()
+
+    def flush(self) -> int:
+        """Writes the queued rows in one transaction; returns how many were written."""
+        with self._flush_lock:
+            with self._cond:
+                rows, self._rows = self._rows, []
+                self._in_flight, self._queued = self._queued, {}
+            if not rows:
+                return 0
+            db = self._session()
+            try:
+                # Targets or users deleted while the rows waited would fail the whole batch on the FKs
+                alive = set(db.execute(existing_targets_stmt(r["target_profile_id"] for r in rows)).scalars())
+                users = set(db.execute(
+                    select(models.User.id).where(models.User.id.in_({r["user_id"] for r in rows}))
+                ).scalars())
+                batch = [r for r in rows if r["target_profile_id"] in alive and r["user_id"] in users]
+                if batch:
+                    write_swipes(db, batch)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                with self._cond:
+                    self._rows[:0] = rows  # Retried on the next flush
+                    _index(self._queued, rows)
+                    self._in_flight = {}
+                metrics.swipe_flush_failures.inc()
+                print(f"[Swipes] WARNING: flush of {len(rows)} swipes failed, will retry: {e}")
+                return 0
+            finally:
+                db.close()
+            with self._cond:
+                self._in_flight = {}
+            metrics.swipe_rows_written.inc(len(batch))
+            return len(batch)
+
+    def _session(self):
+        if self.session_factory is None:
+            from database import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    def stats(self):
+        return {"pending": len(self._rows), "max_rows": self.max_rows, "flush_seconds": self.flush_seconds}
+
+
+class SwipedIds:
+    """
+    user id -> ids of the profiles they swiped, for the online scoring pass.
+    Bounded by user count (LRU) and age (TTL); loaded from match_swipes plus
+    the rows still queued, then kept current by record().
+    """
+
+    def __init__(self, max_users: int = SWIPED_IDS_MAX_USERS, ttl_seconds: int = SWIPED_IDS_TTL_SECONDS,
+                 max_per_user: int = SWIPED_IDS_MAX_PER_USER):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.max_per_user = max_per_user
+        self._entries = OrderedDict()  # str(user id) -> (set of ids, expires)
+        self._lock = threading.Lock()
+
+    def get(self, user_id) -> Optional[Set[int]]:
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            ids, expires = entry
+            if time.monotonic() >= expires:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return ids
+
+    def put(self, user_id, ids: Iterable[int]):
+        """Caches the ids loaded by swiped_ids_stmt(user_id); too many and the user is not cached."""
+        ids = set(ids) | swipe_buffer.pending_targets(user_id)
+        if self.ttl_seconds <= 0 or len(ids) > self.max_per_user:
+            return
+        with self._lock:
+            self._entries[str(user_id)] = (ids, time.monotonic() + self.ttl_seconds)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def record(self, user_id, target_ids: Iterable[int]):
+        """New swipes of `user_id` (no-op unless the user is cached)."""
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Copy on write: sets handed out by get() are never mutated
+                ids = entry[0] | set(target_ids)
+                if len(ids) > self.max_per_user:
+                    del self._entries[key]
+                else:
+                    self._entries[key] = (ids, entry[1])
+
+    def stats(self):
+        return {"users": len(self._entries), "ttl_seconds": self.ttl_seconds}
+
+
+swipe_buffer = SwipeBuffer()
+metrics.swipe_buffer_pending.set_function(lambda: swipe_buffer.stats()["pending"])
+swiped_ids = SwipedIds() if SWIPED_IDS_CACHE else None
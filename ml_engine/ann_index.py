@@ -0,0 +1,86 @@
+import math
+import os
+
+import torch
+
+# Recall-vs-latency knob: how many inverted lists each query scans
+DEFAULT_NPROBE = int(os.getenv("FOUNDMATCH_ANN_NPROBE", "8"))
+
+
+def _assign(x, centroids, chunk_size=16384):
+    # Nearest centroid (L2) per row, chunked so N x nlist never gets huge
+    c_norm = (centroids * centroids).sum(dim=1)
+    out = torch.empty(x.shape[0], dtype=torch.long)
+    for start in range(0, x.shape[0], chunk_size):
+        block = x[start:start + chunk_size]
+        dist = c_norm.unsqueeze(0) - 2 * block @ centroids.T
+        out[start:start + chunk_size] = dist.argmin(dim=1)
+    return out
+
+
+def _kmeans(x, nlist, n_iter=15, seed=0):
+    gen = torch.Generator().manual_seed(seed)
+    centroids = x[torch.randperm(x.shape[0], generator=gen)[:nlist]].clone()
+    for _ in range(n_iter):
+        assign = _assign(x, centroids)
+        sums = torch.zeros_like(centroids).index_add_(0, assign, x)
+        counts = torch.bincount(assign, minlength=nlist).to(x.dtype)
+        empty = counts == 0
+        centroids = sums / counts.clamp(min=1).unsqueeze(1)
+        if empty.any():
+            # Re-seed dead clusters with random points
+            refill = torch.randint(0, x.shape[0], (int(empty.sum()),), generator=gen)
+            centroids[empty] = x[refill]
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file index for maximum inner product search (CPU, pure PyTorch).
+    Vectors are clustered with k-means; a query only scans the `nprobe` lists
+    whose centroids score highest, so cost is ~ nprobe/nlist of brute force.
+    """
+
+    def __init__(self, vectors, nlist=None, nprobe=DEFAULT_NPROBE, n_iter=15, seed=0):
+        vectors = torch.as_tensor(vectors, dtype=torch.float32).cpu().contiguous()
+        n = vectors.shape[0]
+        if nlist is None:
+            nlist = max(1, int(4 * math.sqrt(n)))
+        self.nlist = min(nlist, n)
+        self.nprobe = nprobe
+
+        self.centroids = _kmeans(vectors, self.nlist, n_iter=n_iter, seed=seed)
+        assign = _assign(vectors, self.centroids)
+
+        # CSR layout: vectors of list l live in [offsets[l], offsets[l + 1])
+        order = torch.argsort(assign, stable=True)
+        counts = torch.bincount(assign, minlength=self.nlist)
+        self.offsets = torch.zeros(self.nlist + 1, dtype=torch.long)
+        self.offsets[1:] = torch.cumsum(counts, dim=0)
+        self.ids = order
+        self.vectors = vectors[order].contiguous()
+
+    def __len__(self):
+        return self.ids.shape[0]
+
+    def search(self, query, k, nprobe=None):
+        """
+        Returns (scores, ids) of the approximate top-k inner products for a
+        single query vector. Larger nprobe = better recall, higher latency.
+        """
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        query = torch.as_tensor(query, dtype=torch.float32).cpu()
+
+        lists = torch.topk(self.centroids @ query, nprobe).indices
+        starts = self.offsets[lists]
+        lengths = self.offsets[lists + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return torch.empty(0), torch.empty(0, dtype=torch.long)
+
+        # Row ids of all probed lists without a Python loop over the lists
+        list_base = torch.cumsum(lengths, dim=0) - lengths
+        rows = torch.arange(total) + torch.repeat_interleave(starts - list_base, lengths)
+        scores = self.vectors[rows] @ query
+        top = torch.topk(scores, min(k, rows.numel()))
+        return top.values, self.ids[rows[top.indices]]
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("FOUNDMATCH_BATCH_MAX_SIZE", "64"))
+DEFAULT_MAX_WAIT_MS = float(os.getenv("FOUNDMATCH_BATCH_MAX_WAIT_MS", "5"))
+
+
+class BatcherStopped(RuntimeError):
+    """Raised to callers whose item was queued or in flight when the batcher stopped."""
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent requests into one batched call.
+
+    Callers `await submit(item)`. A single worker task waits for the first item,
+    keeps collecting until `max_batch_size` items or `max_wait_ms` elapse, runs
+    `batch_fn(items)` in a worker thread (so the event loop stays free) and
+    resolves each caller's future with its own result. If batch_fn returns an
+    Exception instance for an item, that caller gets it raised. Items still
+    queued or in flight when it stops get BatcherStopped.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = None
+        self._worker = None
+        self._executor = None
+        self._in_flight = []  # Batch taken off the queue and not resolved yet
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+        self.total_run = 0.0
+        self.batch_size_hist = {}
+
+    def start(self):
+        # Everything is created here, not in __init__, so a stopped batcher
+        # starts again (e.g. the next lifespan of the same app in tests)
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            # One thread: batches run back to back, never concurrently
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="microbatch")
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            # Nothing will run these any more: their callers return now
+            pending, self._in_flight = self._in_flight, []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(BatcherStopped("Micro-batcher stopped"))
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def submit(self, item):
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = self._in_flight = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            self._record(batch, started)
+
+            items = [item for item, _, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.batch_fn, items)
+            except Exception as e:
+                results = [e] * len(batch)
+            self.total_run += time.perf_counter() - started
+
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue  # caller went away
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self._in_flight = []
+
+    def _record(self, batch, started):
+        size = len(batch)
+        self.batches += 1
+        self.items += size
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        self.batch_size_hist[size] = self.batch_size_hist.get(size, 0) + 1
+        for _, _, enqueued in batch:
+            waited = started - enqueued
+            self.total_wait += waited
+            self.max_wait_seen = max(self.max_wait_seen, waited)
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+            "batch_size_hist": dict(sorted(self.batch_size_hist.items())),
+            "avg_wait_ms": round(1000 * self.total_wait / self.items, 3) if self.items else 0.0,
+            "max_wait_ms_seen": round(1000 * self.max_wait_seen, 3),
+            "avg_batch_run_ms": round(1000 * self.total_run / self.batches, 3) if self.batches else 0.0,
+        }
@@ -0,0 +1,106 @@
+import hashlib
+import os
+
+import torch
+
+PRECISIONS = ("fp32", "fp16", "int8")
+DEFAULT_PRECISION = os.getenv("FOUNDMATCH_GRAPH_PRECISION", "fp32")
+# Map saved tables from disk instead of reading them into private memory, so
+# every worker process on the host shares the same page-cache copy.
+MMAP_TABLES = os.getenv("FOUNDMATCH_MMAP_WEIGHTS", "false").lower() == "true"
+
+
+class CompactEmbeddingTable:
+    """
+    Serving-time storage for the graph embedding matrix.
+
+    fp32: plain tensor. fp16: half storage (2x smaller). int8: per-row
+    symmetric quantization, q = round(w / scale) with scale = max|w_row| / 127
+    (~4x smaller). Rows are dequantized on lookup, and pair dot products are
+    computed on the compact form: dot(u, i) = scale_u * scale_i * (q_u . q_i).
+    """
+
+    def __init__(self, data, scale=None, precision="fp32"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+        self.data = data
+        self.scale = scale
+        self.precision = precision
+
+    @classmethod
+    def from_tensor(cls, weight, precision=DEFAULT_PRECISION):
+        weight = weight.detach().float()
+        if precision == "fp32":
+            return cls(weight.clone(), precision="fp32")
+        if precision == "fp16":
+            return cls(weight.half(), precision="fp16")
+        if precision == "int8":
+            scale = weight.abs().amax(dim=1).clamp(min=1e-12) / 127.0
+            q = torch.round(weight / scale.unsqueeze(1)).clamp(-127, 127).to(torch.int8)
+            return cls(q, scale=scale, precision="int8")
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+    @classmethod
+    def from_state_dict(cls, path, precision=DEFAULT_PRECISION, key="embedding.weight"):
+        """Raw (unpropagated) table straight from a trained .pth file."""
+        state_dict = torch.load(path, map_location="cpu")
+        return cls.from_tensor(state_dict[key], precision)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def device(self):
+        return self.data.device
+
+    @property
+    def nbytes(self):
+        total = self.data.element_size() * self.data.nelement()
+        if self.scale is not None:
+            total += self.scale.element_size() * self.scale.nelement()
+        return total
+
+    def to(self, device):
+        scale = self.scale.to(device) if self.scale is not None else None
+        return CompactEmbeddingTable(self.data.to(device), scale, self.precision)
+
+    def lookup(self, idx):
+        """float32 rows for `idx` (an int, slice or index tensor)."""
+        rows = self.data[idx].float()
+        if self.precision == "int8":
+            scale = self.scale[idx]
+            rows = rows * (scale.unsqueeze(-1) if rows.dim() > scale.dim() else scale)
+        return rows
+
+    def dense(self):
+        return self.lookup(slice(None))
+
+    def pair_dot(self, u_idx, i_idx):
+        """Row-wise dot(table[u_idx], table[i_idx]) without dequantizing the table."""
+        u = self.data[u_idx].float()
+        i = self.data[i_idx].float()
+        dot = (u * i).sum(dim=-1)
+        if self.precision == "int8":
+            dot = dot * self.scale[u_idx] * self.scale[i_idx]
+        return dot
+
+    def save(self, path, **meta):
+        torch.save({"precision": self.precision, "data": self.data.cpu(),
+                    "scale": None if self.scale is None else self.scale.cpu(), "meta": meta}, path)
+
+    @classmethod
+    def load(cls, path, map_location="cpu", mmap=False):
+        # mmap: tensors stay backed by the file (read-only, CPU only)
+        blob = torch.load(path, map_location=map_location, mmap=mmap)
+        return cls(blob["data"], blob["scale"], blob["precision"]), blob.get("meta", {})
+
+
+def edge_fingerprint(edge_index):
+    """Stable hash of an interaction graph, to know when a saved table is stale."""
+    if edge_index is None:
+        return "none"
+    return hashlib.sha1(edge_index.detach().cpu().contiguous().numpy().tobytes()).hexdigest()
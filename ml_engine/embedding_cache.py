@@ -0,0 +1,112 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import torch
+
+# Defaults can be tuned per deployment without code changes
+DEFAULT_MAX_ENTRIES = int(os.getenv("FOUNDMATCH_EMBED_CACHE_ENTRIES", "50000"))
+DEFAULT_MAX_BYTES = int(os.getenv("FOUNDMATCH_EMBED_CACHE_BYTES", str(128 * 1024 * 1024)))
+
+
+def normalize_text(text):
+    # Collapse whitespace so "AI,  FinTech " and "AI, FinTech" share one entry
+    return " ".join(str(text).split())
+
+
+def text_key(text):
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of sentence embeddings, keyed by a hash of the
+    normalized text. Bounded both by entry count and by tensor bytes.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, text):
+        key = text_key(text)
+        with self._lock:
+            emb = self._data.get(key)
+            if emb is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return emb
+
+    def put(self, text, emb):
+        key = text_key(text)
+        emb = emb.detach()
+        size = emb.element_size() * emb.nelement()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old.element_size() * old.nelement()
+            self._data[key] = emb
+            self.bytes += size
+            # Evict least recently used until both limits hold
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.bytes -= evicted.element_size() * evicted.nelement()
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def encode(self, nlp_model, texts):
+        """
+        Drop-in for nlp_model.encode(texts, convert_to_tensor=True).
+        Only the texts missing from the cache reach the transformer, in one batch.
+        """
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        found = [self.get(t) for t in texts]
+        missing = list(dict.fromkeys(t for t, emb in zip(texts, found) if emb is None))
+
+        if missing:
+            with torch.no_grad():
+                fresh = nlp_model.encode(missing, convert_to_tensor=True)
+            fresh_by_text = {}
+            for t, emb in zip(missing, fresh):
+                emb = emb.clone()
+                self.put(t, emb)
+                fresh_by_text[t] = emb
+            found = [emb if emb is not None else fresh_by_text[t] for t, emb in zip(texts, found)]
+
+        out = torch.stack(found)
+        return out[0] if single else out
@@ -0,0 +1,117 @@
+"""
+Offline-built, memory-mapped text embeddings for every known startup pitch
+and investor focus string.
+
+Build (after preprocessing, whenever the CSVs change):
+    python -m ml_engine.embedding_store --dtype float16
+
+Layout: one contiguous .npy matrix (investor rows first, then startup rows,
+same order as the graph nodes) plus a JSON sidecar mapping entity ids to rows.
+Serving opens the matrix with mmap, so every worker shares the same pages.
+"""
+import argparse
+import json
+import os
+import warnings
+
+import numpy as np
+import torch
+
+DATA_DIR = "data"
+STORE_PATH = os.path.join(DATA_DIR, "text_embeddings.npy")
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def sidecar_path(store_path):
+    return os.path.splitext(store_path)[0] + ".json"
+
+
+def build_embedding_store(data_dir=DATA_DIR, store_path=STORE_PATH, dtype="float32", batch_size=128, backend=None):
+    import pandas as pd
+    from ml_engine.encoders import DEFAULT_BACKEND, load_encoder
+
+    investors = pd.read_csv(os.path.join(data_dir, "processed_investors.csv"))
+    startups = pd.read_csv(os.path.join(data_dir, "processed_startups.csv"))
+    inv_texts = investors["focus_industry"].fillna("General").astype(str).tolist()
+    stu_texts = startups["One_Line_Pitch"].fillna("General").astype(str).tolist()
+
+    print(f"[Store] Encoding {len(inv_texts)} investor + {len(stu_texts)} startup texts...")
+    backend = backend or DEFAULT_BACKEND
+    model = load_encoder(backend, MODEL_NAME)
+    emb = model.encode(
+        inv_texts + stu_texts,
+        batch_size=batch_size,
+        normalize_embeddings=True,
+        show_progress_bar=True,
+    )
+    emb = np.ascontiguousarray(emb, dtype=np.dtype(dtype))
+
+    np.save(store_path, emb)
+    meta = {
+        "model": MODEL_NAME,
+        "backend": backend,
+        "dtype": str(emb.dtype),
+        "dim": int(emb.shape[1]),
+        "normalized": True,
+        "investor": {"offset": 0, "ids": investors["investor_id"].astype(int).tolist()},
+        "startup": {"offset": len(inv_texts), "ids": startups["Startup_ID"].astype(int).tolist()},
+    }
+    with open(sidecar_path(store_path), "w") as f:
+        json.dump(meta, f)
+    print(f"[Store] SAVED: {emb.shape} {emb.dtype} -> '{store_path}'")
+    return store_path
+
+
+class EmbeddingStore:
+    """Read-only, mmap-backed view over a store written by build_embedding_store."""
+
+    def __init__(self, store_path=STORE_PATH):
+        self.path = store_path
+        with open(sidecar_path(store_path)) as f:
+            self.meta = json.load(f)
+        # mmap_mode='r': pages come from the OS page cache, shared across processes
+        self.matrix = np.load(store_path, mmap_mode="r")
+        self.dim = self.meta["dim"]
+        self._rows = {}
+        for kind in ("investor", "startup"):
+            offset = self.meta[kind]["offset"]
+            self._rows[kind] = {eid: offset + i for i, eid in enumerate(self.meta[kind]["ids"])}
+
+    @classmethod
+    def open_if_exists(cls, store_path=STORE_PATH):
+        if os.path.exists(store_path) and os.path.exists(sidecar_path(store_path)):
+            return cls(store_path)
+        return None
+
+    def count(self, kind):
+        return len(self.meta[kind]["ids"])
+
+    def has(self, kind, entity_id):
+        return entity_id in self._rows[kind]
+
+    def block(self, kind):
+        """All rows of one entity kind as a float32 tensor (zero-copy for float32 stores)."""
+        start = self.meta[kind]["offset"]
+        view = self.matrix[start:start + self.count(kind)]
+        if view.dtype != np.float32:
+            return torch.from_numpy(view.astype(np.float32))
+        with warnings.catch_warnings():
+            # The mmap is read-only on purpose; we never write through the tensor
+            warnings.simplefilter("ignore", UserWarning)
+            return torch.from_numpy(view)
+
+    def lookup(self, kind, entity_ids):
+        """Rows for the given entity ids as a float32 [n, dim] tensor."""
+        rows = [self._rows[kind][eid] for eid in entity_ids]
+        return torch.from_numpy(np.asarray(self.matrix[rows], dtype=np.float32))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the mmap text embedding store.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--out", default=STORE_PATH)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--backend", default=None, help="Encoder backend (see ml_engine/encoders.py)")
+    args = parser.parse_args()
+    build_embedding_store(args.data_dir, args.out, dtype=args.dtype, batch_size=args.batch_size, backend=args.backend)
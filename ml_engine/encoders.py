@@ -0,0 +1,153 @@
+"""
+Pluggable CPU backends for the MiniLM sentence encoder.
+
+Select with FOUNDMATCH_ENCODER_BACKEND:
+    torch       eager PyTorch fp32 (default, reference)
+    torch-int8  PyTorch dynamic int8 quantization of the Linear layers
+    onnx        ONNX export of the transformer, run with onnxruntime
+    onnx-int8   same ONNX graph with onnxruntime dynamic int8 quantization
+
+Every backend exposes SentenceTransformer's `encode(texts, convert_to_tensor=...)`,
+so the engines use them interchangeably. Check drift/latency with
+scripts/bench_encoders.py before switching production to a new backend.
+"""
+import os
+
+import numpy as np
+import torch
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+DEFAULT_BACKEND = os.getenv("FOUNDMATCH_ENCODER_BACKEND", "torch")
+ONNX_DIR = os.getenv("FOUNDMATCH_ONNX_DIR", os.path.join("data", "onnx"))
+
+
+def encoder_version(backend=None, model_name=MODEL_NAME):
+    """Tag for stored text vectors: backends drift slightly, so they are versioned apart."""
+    return f"{os.path.basename(os.path.normpath(model_name))}/{backend or DEFAULT_BACKEND}"
+
+
+def load_encoder(backend=None, model_name=MODEL_NAME):
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}', expected one of {BACKENDS}")
+
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    if backend == "torch-int8":
+        return torch.ao.quantization.quantize_dynamic(st_model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return OnnxEncoder(st_model, quantize=(backend == "onnx-int8"), model_name=model_name)
+
+
+class OnnxEncoder:
+    """
+    Tokenizer from the SentenceTransformer, transformer body in onnxruntime,
+    mean pooling (+ L2 normalize, as in all-MiniLM-L6-v2) in NumPy.
+    """
+
+    def __init__(self, st_model, quantize=False, onnx_dir=ONNX_DIR, model_name=MODEL_NAME):
+        import onnxruntime as ort
+
+        self.tokenizer = st_model.tokenizer
+        self.max_seq_length = st_model.max_seq_length
+        self.normalize = any(type(m).__name__ == "Normalize" for m in st_model)
+        self.dim = st_model.get_sentence_embedding_dimension()
+
+        path = export_onnx(st_model, onnx_dir, name=os.path.basename(os.path.normpath(model_name)))
+        if quantize:
+            path = quantize_onnx(path)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def _encode_batch(self, texts):
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True,
+            max_length=self.max_seq_length, return_tensors="np",
+        )
+        feed = {k: v.astype(np.int64) for k, v in tokens.items() if k in self.input_names}
+        hidden = self.session.run(None, feed)[0]
+
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        emb = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            emb = emb / np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+        return emb
+
+    def encode(self, texts, convert_to_tensor=False, batch_size=32, normalize_embeddings=False, **kwargs):
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        parts = [self._encode_batch(list(texts[i:i + batch_size])) for i in range(0, len(texts), batch_size)]
+        emb = np.concatenate(parts) if parts else np.zeros((0, self.dim), dtype=np.float32)
+        if normalize_embeddings:
+            emb = emb / np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+        emb = emb.astype(np.float32)
+
+        if single:
+            emb = emb[0]
+        return torch.from_numpy(emb) if convert_to_tensor else emb
+
+
+def export_onnx(st_model, onnx_dir=ONNX_DIR, name=MODEL_NAME):
+    """Exports the transformer body once; later calls reuse the file."""
+    path = os.path.join(onnx_dir, f"{name}.onnx")
+    if os.path.exists(path):
+        return path
+    os.makedirs(onnx_dir, exist_ok=True)
+
+    auto_model = st_model[0].auto_model.eval()
+    sample = st_model.tokenizer(["FoundMatch export sample"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic = {n: {0: "batch", 1: "seq"} for n in names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "seq"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            auto_model,
+            tuple(sample[n] for n in names),
+            path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic,
+            opset_version=18,
+        )
+    print(f"[Encoders] Exported ONNX graph to {path}")
+    return path
+
+
+def quantize_onnx(path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    out = path.replace(".onnx", ".int8.onnx")
+    if not os.path.exists(out):
+        quantize_dynamic(path, out, weight_type=QuantType.QInt8)
+        print(f"[Encoders] Quantized ONNX graph to {out}")
+    return out
+
+
+def cosine_drift(reference, candidate, texts, batch_size=64):
+    """
+    Per-text 1 - cos(reference, candidate) over `texts`.
+    Returns mean / p99 / max so a backend can be gated on a tolerance.
+    """
+    ref = torch.nn.functional.normalize(
+        torch.as_tensor(reference.encode(texts, batch_size=batch_size)), dim=1)
+    cand = torch.nn.functional.normalize(
+        torch.as_tensor(candidate.encode(texts, batch_size=batch_size)), dim=1)
+    drift = 1 - (ref * cand).sum(dim=1)
+    return {
+        "mean": float(drift.mean()),
+        "p99": float(torch.quantile(drift, 0.99)),
+        "max": float(drift.max()),
+    }
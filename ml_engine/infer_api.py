@@ -1,26 +1,60 @@
-import pandas as pd
 import os
 import sys
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Query
+from pydantic import BaseModel, Field
 from contextlib import asynccontextmanager
 
 # --- 1. IMPORT THE CORRECT MODEL CLASS ---
 # We add the current directory to sys.path to ensure we can find the module
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 try:
-    from ml_engine.production_model import FoundMatchProductionAI
+    from ml_engine.production_model import FoundMatchProductionAI, load_edge_index
+    from ml_engine.embedding_store import EmbeddingStore
+    from ml_engine.batching import BatcherStopped, MicroBatcher
+    from ml_engine.manifest import resolve_model_size
 except ImportError:
     # Fallback if running directly from root
-    from ml_engine.production_model import FoundMatchProductionAI
+    from ml_engine.production_model import FoundMatchProductionAI, load_edge_index
+    from ml_engine.embedding_store import EmbeddingStore
+    from ml_engine.batching import BatcherStopped, MicroBatcher
+    from ml_engine.manifest import resolve_model_size
 
 # --- 2. CONFIGURATION ---
 DATA_DIR = "data"
 MODEL_PATH = os.path.join(DATA_DIR, "foundmatch_graph.pth")
+INTERACTIONS_PATH = os.path.join(DATA_DIR, "processed_interactions.csv")
+EMBEDDING_STORE_PATH = os.path.join(DATA_DIR, "text_embeddings.npy")
 
 # Global AI variable
 ai_engine = None
 
+
+def _score_batch(items):
+    """Batch function for the micro-batcher: one encode + score pass for all pairs."""
+    try:
+        return ai_engine.predict_match_scores(
+            investor_texts=[p.investor_text for p in items],
+            startup_texts=[p.startup_text for p in items],
+            investor_ids=[p.investor_id for p in items],
+            startup_ids=[p.startup_id for p in items]
+        )
+    except (KeyError, ValueError):
+        # One bad pair must not fail its neighbours: retry them one by one
+        results = []
+        for p in items:
+            try:
+                results.append(ai_engine.predict_match_score(
+                    p.investor_text, p.startup_text, p.investor_id, p.startup_id
+                ))
+            except (KeyError, ValueError) as e:
+                results.append(e)
+        return results
+
+
+# Coalesces concurrent /predict_match calls (see ml_engine/batching.py)
+batcher = MicroBatcher(_score_batch)
+
 # --- 3. LIFESPAN MANAGER (Startup Logic) ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -28,35 +62,58 @@ async def lifespan(app: FastAPI):
     print("--- STARTING ML INFERENCE API ---")
     
     try:
-        # Load Data to get correct dimensions
+        # Size the model from the training manifest (CSV row count as fallback)
         investors_path = os.path.join(DATA_DIR, "processed_investors.csv")
         startups_path = os.path.join(DATA_DIR, "processed_startups.csv")
-        
-        if os.path.exists(investors_path) and os.path.exists(startups_path):
-            inv_df = pd.read_csv(investors_path)
-            stu_df = pd.read_csv(startups_path)
-            num_users = len(inv_df)
-            num_items = len(stu_df)
-            print(f"[Init] Data stats: {num_users} Investors, {num_items} Startups")
-        else:
-            print("[Init] WARNING: Data CSVs not found. Using default size 100.")
-            num_users = 100
-            num_items = 100
+        num_users, num_items, manifest = resolve_model_size(DATA_DIR, MODEL_PATH)
+        source = "manifest" if manifest else "CSV row count"
+        print(f"[Init] Data stats ({source}): {num_users} Investors, {num_items} Startups")
+        embedding_dim = manifest["embedding_dim"] if manifest else 64
 
         # Initialize the AI Brain
-        ai_engine = FoundMatchProductionAI(num_users, num_items)
+        ai_engine = FoundMatchProductionAI(num_users, num_items, embedding_dim=embedding_dim)
+        if manifest:
+            ai_engine.model_version = manifest["model_version"]
         
-        # Load the Trained Weights
+        # Load the Trained Weights (propagated once over the interaction graph)
         if os.path.exists(MODEL_PATH):
-            ai_engine.load_weights(MODEL_PATH)
+            edge_index = None
+            if os.path.exists(INTERACTIONS_PATH):
+                edge_index = load_edge_index(INTERACTIONS_PATH, num_users)
+            ai_engine.load_weights(MODEL_PATH, edge_index=edge_index)
             print("[Init] SUCCESS: AI Model weights loaded.")
         else:
             print("[Init] WARNING: Model weights file not found! Predictions will be random.")
+
+        # Precomputed pitch/focus vectors (python -m ml_engine.embedding_store)
+        store = EmbeddingStore.open_if_exists(EMBEDDING_STORE_PATH)
+        if store is not None:
+            ai_engine.attach_embedding_store(store)
+            print(f"[Init] SUCCESS: Embedding store mmap'd from {EMBEDDING_STORE_PATH}")
+
+        # Build the top-K recommendation (ANN) indexes over the known entities
+        if store is not None and store.count("investor") == num_users and store.count("startup") == num_items:
+            ai_engine.build_recommendation_index()
+            print("[Init] SUCCESS: Recommendation index built from embedding store.")
+        elif os.path.exists(investors_path) and os.path.exists(startups_path):
+            # No precomputed store: encode the texts now (slow, pandas loaded on demand)
+            import pandas as pd
+            inv_df = pd.read_csv(investors_path)
+            stu_df = pd.read_csv(startups_path)
+            ai_engine.build_recommendation_index(
+                investor_texts=inv_df["focus_industry"].fillna("General").astype(str).tolist(),
+                startup_texts=stu_df["One_Line_Pitch"].fillna("General").astype(str).tolist(),
+            )
+            print("[Init] SUCCESS: Recommendation index built.")
+        else:
+            print("[Init] WARNING: No entity data, /recommend endpoints disabled.")
             
     except Exception as e:
         print(f"[Init] CRITICAL ERROR: {e}")
-    
+
+    batcher.start()
     yield
+    await batcher.stop()
     print("--- SHUTTING DOWN ML API ---")
 
 # --- 4. CREATE APP ---
@@ -65,27 +122,113 @@ app = FastAPI(title="FoundMatch ML Engine", lifespan=lifespan)
 class PredictIn(BaseModel):
     investor_id: int
     startup_id: int
-    investor_text: str
-    startup_text: str
+    # Omit a text to score a known entity from the precomputed embedding store
+    investor_text: Optional[str] = None
+    startup_text: Optional[str] = None
+
+class PredictBatchIn(BaseModel):
+    pairs: List[PredictIn] = Field(..., max_length=5000)
+
+def recommendation_for(score):
+    return "High" if score > 75 else "Medium" if score > 50 else "Low"
 
 @app.get("/")
 def health_check():
-    return {"status": "online", "model": "FoundMatch-Hybrid-v1"}
+    return {
+        "status": "online",
+        "model": "FoundMatch-Hybrid-v1",
+        "model_version": ai_engine.model_version if ai_engine is not None else None,
+    }
+
+@app.get("/stats")
+def stats():
+    if ai_engine is None:
+        raise HTTPException(status_code=500, detail="Model not initialized")
+    return {"text_cache": ai_engine.text_cache.stats(), "batcher": batcher.stats()}
 
 @app.post("/predict_match")
-def predict(payload: PredictIn):
+async def predict(payload: PredictIn):
     if ai_engine is None:
         raise HTTPException(status_code=500, detail="Model not initialized")
     
-    # Run Prediction
-    score = ai_engine.predict_match_score(
-        investor_text=payload.investor_text,
-        startup_text=payload.startup_text,
-        investor_id=payload.investor_id,
-        startup_id=payload.startup_id
-    )
+    # Run Prediction (coalesced with concurrent requests into one batch)
+    try:
+        score = await batcher.submit(payload)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except BatcherStopped:
+        raise HTTPException(status_code=503, detail="Shutting down, retry later")
     
     return {
         "match_score": score,
-        "recommendation": "High" if score > 75 else "Medium" if score > 50 else "Low"
+        "recommendation": recommendation_for(score)
+    }
+
+@app.post("/predict_match_batch")
+def predict_batch(payload: PredictBatchIn):
+    if ai_engine is None:
+        raise HTTPException(status_code=500, detail="Model not initialized")
+
+    # One batched encode + one tensor pass for all pairs
+    pairs = payload.pairs
+    try:
+        scores = ai_engine.predict_match_scores(
+            investor_texts=[p.investor_text for p in pairs],
+            startup_texts=[p.startup_text for p in pairs],
+            investor_ids=[p.investor_id for p in pairs],
+            startup_ids=[p.startup_id for p in pairs]
+        )
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return {
+        "results": [
+            {"match_score": s, "recommendation": recommendation_for(s)}
+            for s in scores
+        ]
+    }
+
+
+def _require_index():
+    if ai_engine is None:
+        raise HTTPException(status_code=500, detail="Model not initialized")
+    if ai_engine.startup_index is None:
+        raise HTTPException(status_code=503, detail="Recommendation index not built")
+
+@app.get("/recommend/{investor_id}")
+def recommend_startups(
+    investor_id: int,
+    k: int = Query(10, ge=1, le=100),
+    nprobe: Optional[int] = Query(None, ge=1, description="Lists scanned per query (recall vs latency)"),
+):
+    _require_index()
+    if not 0 <= investor_id < ai_engine.num_users:
+        raise HTTPException(status_code=404, detail="Unknown investor_id")
+
+    results = ai_engine.recommend_startups(investor_id, k=k, nprobe=nprobe)
+    return {
+        "investor_id": investor_id,
+        "results": [
+            {"startup_id": sid, "match_score": s, "recommendation": recommendation_for(s)}
+            for sid, s in results
+        ]
+    }
+
+@app.get("/recommend_investors/{startup_id}")
+def recommend_investors(
+    startup_id: int,
+    k: int = Query(10, ge=1, le=100),
+    nprobe: Optional[int] = Query(None, ge=1, description="Lists scanned per query (recall vs latency)"),
+):
+    _require_index()
+    if not 0 <= startup_id < ai_engine.num_items:
+        raise HTTPException(status_code=404, detail="Unknown startup_id")
+
+    results = ai_engine.recommend_investors(startup_id, k=k, nprobe=nprobe)
+    return {
+        "startup_id": startup_id,
+        "results": [
+            {"investor_id": iid, "match_score": s, "recommendation": recommendation_for(s)}
+            for iid, s in results
+        ]
     }
@@ -0,0 +1,92 @@
+import csv
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+# Bump when the manifest layout changes
+MANIFEST_FORMAT = 1
+
+
+def manifest_path(model_path):
+    # data/foundmatch_graph.pth -> data/foundmatch_graph.manifest.json
+    return os.path.splitext(str(model_path))[0] + ".manifest.json"
+
+
+def weights_version(model_path):
+    """Content hash of the weights file, used as the model version tag."""
+    h = hashlib.sha1()
+    with open(model_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def _id_map(ids):
+    # Contiguous 0..n-1 ids (the normal case) collapse to a range
+    ids = [int(i) for i in ids]
+    start = ids[0] if ids else 0
+    if ids == list(range(start, start + len(ids))):
+        return {"start": start, "count": len(ids)}
+    return {"ids": ids, "count": len(ids)}
+
+
+def write_manifest(model_path, investor_ids, startup_ids, embedding_dim, num_interactions=None):
+    """
+    Written by the training scripts next to the weights. Serving sizes the
+    model from this file instead of parsing the full CSVs.
+    """
+    num_users = len(investor_ids)
+    num_items = len(startup_ids)
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "model_version": weights_version(model_path),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "weights": os.path.basename(str(model_path)),
+        "num_users": num_users,
+        "num_items": num_items,
+        "num_nodes": num_users + num_items,
+        "embedding_dim": int(embedding_dim),
+        "num_interactions": num_interactions,
+        # Graph node = investor row, or num_users + startup row
+        "id_maps": {
+            "investor": _id_map(investor_ids),
+            "startup": _id_map(startup_ids),
+            "startup_node_offset": num_users,
+        },
+    }
+    path = manifest_path(model_path)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"SAVED: Manifest written to '{path}'")
+    return manifest
+
+
+def read_manifest(model_path):
+    path = manifest_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def count_csv_rows(path):
+    """Row count without pandas (handles quoted newlines, skips the header)."""
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+def resolve_model_size(data_dir, model_path, default=100):
+    """
+    (num_users, num_items, manifest) for sizing the serving model:
+    manifest first, then a cheap CSV row count, then `default`.
+    """
+    manifest = read_manifest(model_path)
+    if manifest is not None:
+        return manifest["num_users"], manifest["num_items"], manifest
+
+    investors_path = os.path.join(str(data_dir), "processed_investors.csv")
+    startups_path = os.path.join(str(data_dir), "processed_startups.csv")
+    if os.path.exists(investors_path) and os.path.exists(startups_path):
+        return count_csv_rows(investors_path), count_csv_rows(startups_path), None
+    return default, default, None
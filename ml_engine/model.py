@@ -1,14 +1,17 @@
 import torch
 import torch.nn as nn
-from sentence_transformers import SentenceTransformer
 from torch_geometric.nn import LightGCN
 
+from ml_engine.embedding_cache import EmbeddingCache
+from ml_engine.encoders import load_encoder
+
 class FoundMatchAI:
-    def __init__(self, num_users, num_items, embedding_dim=64):
+    def __init__(self, num_users, num_items, embedding_dim=64, text_cache=None):
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
         # --- 1. NLP COMPONENT (Content) ---
-        self.nlp_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.nlp_model = load_encoder()  # backend from FOUNDMATCH_ENCODER_BACKEND
+        self.text_cache = text_cache if text_cache is not None else EmbeddingCache()
         
         # --- 2. GRAPH COMPONENT (Collaborative) ---
         # We explicitly calculate total nodes to avoid size mismatch errors
@@ -26,20 +29,48 @@ class FoundMatchAI:
         self.num_users = num_users
         self.num_items = num_items
 
+        # Propagated embeddings cached per edge_index (see get_graph_embeddings)
+        self._graph_cache_edges = None
+        self._graph_cache_version = None
+        self._graph_cache = None
+
     def generate_text_embeddings(self, text_list):
-        return self.nlp_model.encode(text_list, convert_to_tensor=True)
+        return self.text_cache.encode(self.nlp_model, text_list)
 
     def get_graph_embeddings(self, edge_index):
         return self.graph_model(edge_index)
 
+    def invalidate_graph_cache(self):
+        # Call after the weights change (e.g. a training step or a reload)
+        self._graph_cache_edges = None
+        self._graph_cache_version = None
+        self._graph_cache = None
+
+    def get_cached_graph_embeddings(self, edge_index):
+        """
+        Same result as get_graph_embeddings, but the full propagation only runs
+        when the graph changes (new tensor or in-place edit), not on every call.
+        """
+        stale = (
+            self._graph_cache is None
+            or self._graph_cache_edges is not edge_index
+            or self._graph_cache_version != edge_index._version
+        )
+        if stale:
+            with torch.no_grad():
+                self._graph_cache = self.get_graph_embeddings(edge_index).detach()
+            self._graph_cache_edges = edge_index
+            self._graph_cache_version = edge_index._version
+        return self._graph_cache
+
     def predict_match_score(self, investor_text, startup_text, investor_id, startup_id, edge_index):
         # A. Semantic Score
-        emb1 = self.nlp_model.encode(investor_text, convert_to_tensor=True)
-        emb2 = self.nlp_model.encode(startup_text, convert_to_tensor=True)
+        emb1 = self.generate_text_embeddings(investor_text)
+        emb2 = self.generate_text_embeddings(startup_text)
         semantic_score = torch.nn.functional.cosine_similarity(emb1, emb2, dim=0)
         
         # B. Graph Score
-        all_embeddings = self.get_graph_embeddings(edge_index)
+        all_embeddings = self.get_cached_graph_embeddings(edge_index)
         
         # Safety Check for IDs (Modulo protection)
         # If ID is too big, wrap it around instead of crashing
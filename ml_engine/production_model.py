@@ -1,12 +1,27 @@
+import os
+
+import numpy as np
 import torch
 import torch.nn as nn
-from torch_geometric.nn.conv import LGConv
-from sentence_transformers import SentenceTransformer
+
+from ml_engine.ann_index import IVFIndex
+from ml_engine.compact_embeddings import DEFAULT_PRECISION, MMAP_TABLES, CompactEmbeddingTable, edge_fingerprint
+from ml_engine.embedding_cache import EmbeddingCache
+from ml_engine.encoders import encoder_version, load_encoder
+
+# Hybrid weighting shared by pairwise scoring and the ANN space (70% Content, 30% Graph)
+SEMANTIC_WEIGHT = 0.7
+GRAPH_WEIGHT = 0.3
+# The ANN shortlist is this many times k before exact re-ranking
+RERANK_FACTOR = 4
 
 # --- 1. THE CUSTOM GRAPH MODEL (Must match train_final.py exactly) ---
 class MyCustomLightGCN(nn.Module):
     def __init__(self, num_nodes, embedding_dim=64):
         super().__init__()
+        # torch_geometric is slow to import; only pay for it when a model is built
+        from torch_geometric.nn.conv import LGConv
+
         # Explicitly create the embedding table
         self.embedding = nn.Embedding(num_nodes, embedding_dim)
         # LGConv is the standard neighbor propagation layer
@@ -24,14 +39,32 @@ class MyCustomLightGCN(nn.Module):
         # Helper for inference
         return self.forward(edge_index)
 
+
+def load_edge_index(interactions_path, num_users):
+    """
+    Builds the investor -> startup edge_index exactly like train_final.py does,
+    so serving propagates over the same graph the weights were trained on.
+    """
+    pairs = np.loadtxt(interactions_path, delimiter=",", skiprows=1, usecols=(0, 1), dtype=np.int64, ndmin=2)
+    src = torch.from_numpy(pairs[:, 0].copy())
+    dst = torch.from_numpy(pairs[:, 1].copy()) + num_users
+    return torch.stack([src, dst], dim=0)
+
 # --- 2. THE WRAPPER CLASS (Combines Graph + NLP) ---
 class FoundMatchProductionAI:
-    def __init__(self, num_users, num_items, embedding_dim=64):
+    def __init__(self, num_users, num_items, embedding_dim=64, text_cache=None, graph_precision=None, mmap_tables=None):
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
         # A. NLP Model (for content matching)
-        self.nlp_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.nlp_model = load_encoder()  # backend from FOUNDMATCH_ENCODER_BACKEND
+        # Tag for text vectors persisted outside the engine (e.g. per-profile embeddings)
+        self.text_model_version = encoder_version()
+        # Repeated theses / interests ("General" etc.) skip the transformer
+        self.text_cache = text_cache if text_cache is not None else EmbeddingCache()
         
+        # Tag used by callers to invalidate anything derived from this model
+        self.model_version = "unversioned"
+
         # B. Graph Model (for collaborative matching)
         self.total_nodes = num_users + num_items
         self.graph_model = MyCustomLightGCN(num_nodes=self.total_nodes, embedding_dim=embedding_dim)
@@ -40,51 +73,344 @@ class FoundMatchProductionAI:
         self.num_users = num_users
         self.num_items = num_items
 
-    def load_weights(self, path):
+        # C. Serving cache: the final (layer-averaged) LightGCN embeddings.
+        # Computed once per weights/graph version, so scoring is a plain lookup.
+        # Stored as fp32, fp16 or per-row int8 (FOUNDMATCH_GRAPH_PRECISION).
+        self.edge_index = None
+        self.graph_precision = graph_precision or DEFAULT_PRECISION
+        # Serve the table from an mmap'd file shared by all workers (FOUNDMATCH_MMAP_WEIGHTS)
+        self.mmap_tables = MMAP_TABLES if mmap_tables is None else mmap_tables
+        self.graph_table = None
+        self.weights_path = None
+        self._raw_loaded = True
+
+        # D. Optional precomputed text vectors for known entities (mmap'd)
+        self.embedding_store = None
+
+        # E. Recommendation indexes (see build_recommendation_index)
+        self.investor_text_emb = None
+        self.startup_text_emb = None
+        self.startup_index = None
+        self.investor_index = None
+
+    @property
+    def final_embeddings(self):
+        # Dense float32 view of the serving table (dequantized if compact)
+        return None if self.graph_table is None else self.graph_table.dense()
+
+    def load_weights(self, path, edge_index=None):
+        self.weights_path = path
+        if edge_index is not None:
+            self.edge_index = edge_index.to(self.device)
+
+        # Compact precisions (and mmap mode) keep a ready-made table next to the
+        # .pth, so a restart skips both the full fp32 load and the propagation.
+        if self._uses_table_file() and self._load_compact_table(path):
+            return
+
         # Load the trained weights safely
         try:
             state_dict = torch.load(path, map_location=self.device)
             self.graph_model.load_state_dict(state_dict)
             self.graph_model.eval() # Set to evaluation mode
+            self._raw_loaded = True
             print(f"SUCCESS: Loaded weights from {path}")
         except Exception as e:
             print(f"ERROR loading model weights: {e}")
+            return
+
+        self.rebuild_graph_embeddings()
+        if self._uses_table_file():
+            try:
+                self.graph_table.save(self._compact_table_path(path), **self._compact_table_meta(path))
+            except OSError as e:
+                print(f"WARNING: Could not save compact graph table: {e}")
+                return
+            if self.mmap_tables:
+                # Swap the private copy for the shared mapping right away
+                self._load_compact_table(path)
+
+    def _uses_table_file(self):
+        return self.graph_precision != "fp32" or self.mmap_tables
+
+    def _compact_table_path(self, path):
+        return f"{os.path.splitext(path)[0]}.{self.graph_precision}.pt"
+
+    def _compact_table_meta(self, path):
+        stat = os.stat(path)
+        return {
+            "source_size": stat.st_size,
+            "source_mtime": stat.st_mtime,
+            "edges": edge_fingerprint(self.edge_index),
+            "num_nodes": self.total_nodes,
+        }
+
+    def _load_compact_table(self, path):
+        table_path = self._compact_table_path(path)
+        if not os.path.exists(table_path):
+            return False
+        mmap = self.mmap_tables and self.device.type == "cpu"
+        table, meta = CompactEmbeddingTable.load(table_path, map_location=self.device, mmap=mmap)
+        if meta != self._compact_table_meta(path) or table.precision != self.graph_precision:
+            return False  # stale: weights or graph changed since it was written
+
+        self.graph_table = table
+        self._release_raw_weights()
+        print(f"SUCCESS: Loaded {self.graph_precision} graph table from {table_path}" + (" (mmap)" if mmap else ""))
+        if self.startup_text_emb is not None:
+            self._build_ann_indexes()
+        return True
+
+    def _release_raw_weights(self):
+        # The trainable fp32 table is only needed to re-propagate; free it
+        emb = self.graph_model.embedding
+        emb.weight.data = torch.empty((0, emb.embedding_dim), device=self.device)
+        self._raw_loaded = False
+
+    def _reload_raw_weights(self):
+        state_dict = torch.load(self.weights_path, map_location=self.device)
+        self.graph_model.embedding.weight.data = state_dict["embedding.weight"]
+        self._raw_loaded = True
+
+    def rebuild_graph_embeddings(self, edge_index=None):
+        """
+        Runs the 3-layer propagation once and freezes the result.
+        Call again with the new edge_index whenever the interaction graph changes.
+        """
+        if edge_index is not None:
+            self.edge_index = edge_index.to(self.device)
+        if not self._raw_loaded:
+            self._reload_raw_weights()
+
+        with torch.no_grad():
+            if self.edge_index is None:
+                # No interaction graph known: fall back to the raw table
+                print("WARNING: No interaction graph given, serving raw graph embeddings.")
+                final = self.graph_model.embedding.weight
+            else:
+                final = self.graph_model(self.edge_index)
+
+        self.graph_table = CompactEmbeddingTable.from_tensor(final, self.graph_precision)
+        if self._uses_table_file() and self.weights_path is not None:
+            self._release_raw_weights()
+
+        # The ANN space contains graph embeddings, so it goes stale with them
+        if self.startup_text_emb is not None:
+            self._build_ann_indexes()
+        return self.final_embeddings
+
+    def encode_texts(self, texts):
+        # Cached equivalent of nlp_model.encode(texts, convert_to_tensor=True)
+        return self.text_cache.encode(self.nlp_model, texts)
 
     def predict_match_score(self, investor_text, startup_text, investor_id, startup_id):
         """
         Calculates a hybrid score (NLP + Graph).
+        A text of None means "known entity": its vector comes from the embedding store.
         """
-        # 1. NLP Score (Semantic Similarity)
-        # We don't need gradients for inference
+        return self.predict_match_scores([investor_text], [startup_text], [investor_id], [startup_id])[0]
+
+    def attach_embedding_store(self, store):
+        """Serve known entities from a precomputed, mmap'd EmbeddingStore."""
+        self.embedding_store = store
+
+    def _pair_text_embeddings(self, texts, ids, kind):
+        # Normalized text vectors per pair. Texts are deduplicated and encoded in
+        # one batch; a None text is a known entity read from the embedding store.
+        texts = list(texts)
+        missing = [i for i, t in enumerate(texts) if t is None]
+        if missing:
+            store = self.embedding_store
+            if store is None:
+                raise ValueError(f"No text given for {kind} and no embedding store attached")
+            unknown = [ids[i] for i in missing if not store.has(kind, ids[i])]
+            if unknown:
+                raise KeyError(f"Unknown {kind} ids (not in embedding store): {unknown[:5]}")
+
+        unique_texts = list(dict.fromkeys(t for t in texts if t is not None))
+        position = {t: i for i, t in enumerate(unique_texts)}
+        out = None
+        if unique_texts:
+            encoded = torch.nn.functional.normalize(self.encode_texts(unique_texts), dim=1)
+            rows = torch.tensor([position.get(t, 0) for t in texts], device=encoded.device)
+            out = encoded[rows]
+        if missing:
+            stored = self.embedding_store.lookup(kind, [ids[i] for i in missing])
+            if out is None:
+                return stored
+            out[torch.tensor(missing, device=out.device)] = stored.to(out.device, out.dtype)
+        return out
+
+    def predict_match_scores(self, investor_texts, startup_texts, investor_ids, startup_ids):
+        """
+        Batched predict_match_score over N pairs (parallel sequences).
+        Unique texts are encoded in one batch; both scores are single tensor ops.
+        """
+        n = len(investor_texts)
+        if not (len(startup_texts) == len(investor_ids) == len(startup_ids) == n):
+            raise ValueError("predict_match_scores: all inputs must have the same length")
+        if n == 0:
+            return []
+
+        with torch.no_grad():
+            # 1. NLP Score (Semantic Similarity)
+            inv_text_emb = self._pair_text_embeddings(investor_texts, investor_ids, "investor")
+            stu_text_emb = self._pair_text_embeddings(startup_texts, startup_ids, "startup")
+            semantic = (inv_text_emb * stu_text_emb.to(inv_text_emb.device)).sum(dim=1)
+
+            # 2. Graph Score: out-of-range ids fall back to node 0 (as before).
+            # The dot product runs directly on the (possibly compact) table.
+            if self.graph_table is None:
+                self.rebuild_graph_embeddings()
+            table = self.graph_table
+            inv_ids = torch.as_tensor(investor_ids, dtype=torch.long, device=table.device)
+            stu_ids = torch.as_tensor(startup_ids, dtype=torch.long, device=table.device)
+            inv_ids = torch.where((inv_ids >= 0) & (inv_ids < self.num_users), inv_ids, torch.zeros_like(inv_ids))
+            stu_ids = torch.where((stu_ids >= 0) & (stu_ids < self.num_items), stu_ids, torch.zeros_like(stu_ids))
+            graph = torch.sigmoid(table.pair_dot(inv_ids, self.num_users + stu_ids))
+
+            # 3. Hybrid Weighting (70% Content, 30% Graph)
+            final = (SEMANTIC_WEIGHT * semantic.to(graph.device)) + (GRAPH_WEIGHT * graph)
+
+        return [round(s * 100, 2) for s in final.tolist()]
+
+    def score_candidates(self, query_text, query_id, candidate_texts, candidate_ids, query_kind="investor",
+                         query_emb=None, candidate_emb=None):
+        """
+        One query entity against N candidates of the other kind, e.g. one
+        founder's pitch vs. every investor on the /match page.
+
+        The query is encoded once and both scores are a single matrix-vector
+        product. Precomputed text vectors (query_emb [d], candidate_emb [N, d])
+        skip encoding. Returns a float tensor of hybrid scores on the 0-100 scale.
+        """
+        if query_kind not in ("investor", "startup"):
+            raise ValueError(f"Unknown query kind '{query_kind}'")
+        cand_kind = "startup" if query_kind == "investor" else "investor"
+        candidate_ids = list(candidate_ids)
+        n_cand = len(candidate_emb) if candidate_emb is not None else len(candidate_texts)
+        if n_cand != len(candidate_ids):
+            raise ValueError("score_candidates: texts and ids must have the same length")
+        if not candidate_ids:
+            return torch.empty(0)
+
         with torch.no_grad():
-            emb1 = self.nlp_model.encode(investor_text, convert_to_tensor=True)
-            emb2 = self.nlp_model.encode(startup_text, convert_to_tensor=True)
-            semantic_score = torch.nn.functional.cosine_similarity(emb1, emb2, dim=0).item()
-            
-            # 2. Graph Score (Latent Connection)
-            # For inference, we use the learned embeddings directly.
-            # We don't necessarily need the edge_index for a single lookup if we use the stored weights.
-            # However, LightGCN implies smoothing over the graph. 
-            # For simplicity and speed in production, we often look up the raw embedding 
-            # or use a cached "final" embedding matrix.
-            
-            # Let's use the embeddings directly from the table for fast lookup
-            # (In a highly dynamic graph, you'd re-run the convolution, but that's heavy for API)
-            all_emb = self.graph_model.embedding.weight
-            
-            # Safe ID lookup
-            safe_inv_id = investor_id if investor_id < self.num_users else 0
-            safe_startup_id = startup_id if startup_id < self.num_items else 0
-            
-            # Startup index in graph = num_users + startup_ID
-            u_emb = all_emb[safe_inv_id]
-            i_emb = all_emb[self.num_users + safe_startup_id]
-            
-            # Dot product + Sigmoid
-            graph_score = torch.sigmoid(torch.sum(u_emb * i_emb)).item()
-            
+            # 1. NLP Score: [N, d] @ [d]
+            if query_emb is None:
+                query_emb = self._pair_text_embeddings([query_text], [query_id], query_kind)[0]
+            else:
+                query_emb = torch.nn.functional.normalize(torch.as_tensor(query_emb, dtype=torch.float32), dim=0)
+            if candidate_emb is None:
+                cand_emb = self._pair_text_embeddings(candidate_texts, candidate_ids, cand_kind)
+            else:
+                cand_emb = torch.nn.functional.normalize(torch.as_tensor(candidate_emb, dtype=torch.float32), dim=1)
+            semantic = cand_emb @ query_emb.to(cand_emb.device, cand_emb.dtype)
+
+            # 2. Graph Score: candidate rows @ query row (same id fallback as predict_match_scores)
+            if self.graph_table is None:
+                self.rebuild_graph_embeddings()
+            table = self.graph_table
+            sizes = {"investor": self.num_users, "startup": self.num_items}
+            offsets = {"investor": 0, "startup": self.num_users}
+            q = query_id if 0 <= query_id < sizes[query_kind] else 0
+            ids = torch.as_tensor(candidate_ids, dtype=torch.long, device=table.device)
+            ids = torch.where((ids >= 0) & (ids < sizes[cand_kind]), ids, torch.zeros_like(ids))
+            query_graph = table.lookup(offsets[query_kind] + q)
+            graph = torch.sigmoid(table.lookup(offsets[cand_kind] + ids) @ query_graph)
+
             # 3. Hybrid Weighting (70% Content, 30% Graph)
-            # You can tweak this balance. Content is safer for new startups.
-            final_score = (0.7 * semantic_score) + (0.3 * graph_score)
-            
-            return round(final_score * 100, 2)
\ No newline at end of file
+            final = (SEMANTIC_WEIGHT * semantic.to(graph.device)) + (GRAPH_WEIGHT * graph)
+
+        return torch.round(final.double() * 10000) / 100
+
+    # --- TOP-K RECOMMENDATION ---
+    def build_recommendation_index(self, investor_texts=None, startup_texts=None, nlist=None, nprobe=None):
+        """
+        Encodes every investor focus / startup pitch (row i = node id i) and
+        builds one IVF index per direction over the hybrid embedding space.
+        Without texts, the vectors come from the attached embedding store.
+        """
+        if investor_texts is None or startup_texts is None:
+            store = self.embedding_store
+            if store is None:
+                raise ValueError("build_recommendation_index: no texts given and no embedding store attached")
+            if store.count("investor") != self.num_users or store.count("startup") != self.num_items:
+                raise ValueError("build_recommendation_index: embedding store size does not match the graph")
+            self.investor_text_emb = store.block("investor")
+            self.startup_text_emb = store.block("startup")
+            self._build_ann_indexes(nlist=nlist, nprobe=nprobe)
+            return
+
+        if len(investor_texts) != self.num_users or len(startup_texts) != self.num_items:
+            raise ValueError("build_recommendation_index: text counts must match the graph size")
+
+        with torch.no_grad():
+            # Bulk encode bypasses the LRU cache so it doesn't evict hot request texts
+            self.investor_text_emb = torch.nn.functional.normalize(
+                self.nlp_model.encode(list(investor_texts), convert_to_tensor=True, batch_size=128), dim=1
+            ).cpu()
+            self.startup_text_emb = torch.nn.functional.normalize(
+                self.nlp_model.encode(list(startup_texts), convert_to_tensor=True, batch_size=128), dim=1
+            ).cpu()
+        self._build_ann_indexes(nlist=nlist, nprobe=nprobe)
+
+    def _build_ann_indexes(self, nlist=None, nprobe=None):
+        # Item side = [text, graph]; query side = [0.7 * text, 0.3 * graph], so the
+        # inner product is 0.7 * cosine + 0.3 * graph dot (pre-sigmoid hybrid score).
+        if self.graph_table is None:
+            self.rebuild_graph_embeddings()
+        graph = self.final_embeddings.cpu()
+        inv_graph = graph[:self.num_users]
+        stu_graph = graph[self.num_users:self.num_users + self.num_items]
+
+        keep = {}
+        if self.startup_index is not None:
+            keep = {"nlist": self.startup_index.nlist, "nprobe": self.startup_index.nprobe}
+        if nlist is not None:
+            keep["nlist"] = nlist
+        if nprobe is not None:
+            keep["nprobe"] = nprobe
+
+        self.startup_index = IVFIndex(torch.cat([self.startup_text_emb, stu_graph], dim=1), **keep)
+        self.investor_index = IVFIndex(torch.cat([self.investor_text_emb, inv_graph], dim=1), **keep)
+
+    def _query_vector(self, text_emb, graph_emb):
+        return torch.cat([SEMANTIC_WEIGHT * text_emb, GRAPH_WEIGHT * graph_emb])
+
+    def _graph_rows(self, node_ids):
+        return self.graph_table.lookup(torch.as_tensor(node_ids, device=self.graph_table.device)).cpu()
+
+    def _rerank(self, query_text, query_graph, cand_ids, cand_text_emb, cand_graph_rows, k):
+        # Exact hybrid score (with the sigmoid) over the ANN shortlist
+        semantic = cand_text_emb[cand_ids] @ query_text
+        graph = torch.sigmoid(cand_graph_rows @ query_graph)
+        final = (SEMANTIC_WEIGHT * semantic) + (GRAPH_WEIGHT * graph)
+        top = torch.topk(final, min(k, final.numel()))
+        return [
+            (int(cand_ids[i]), round(s * 100, 2))
+            for i, s in zip(top.indices.tolist(), top.values.tolist())
+        ]
+
+    def recommend_startups(self, investor_id, k=10, nprobe=None):
+        """Top-k startups for an investor as [(startup_id, score)], best first."""
+        if self.startup_index is None:
+            raise RuntimeError("Recommendation index not built")
+        q_text = self.investor_text_emb[investor_id]
+        q_graph = self._graph_rows(investor_id)
+        _, cand = self.startup_index.search(
+            self._query_vector(q_text, q_graph), k * RERANK_FACTOR, nprobe=nprobe
+        )
+        cand_graph = self._graph_rows(self.num_users + cand)
+        return self._rerank(q_text, q_graph, cand, self.startup_text_emb, cand_graph, k)
+
+    def recommend_investors(self, startup_id, k=10, nprobe=None):
+        """Top-k investors for a startup as [(investor_id, score)], best first."""
+        if self.investor_index is None:
+            raise RuntimeError("Recommendation index not built")
+        q_text = self.startup_text_emb[startup_id]
+        q_graph = self._graph_rows(self.num_users + startup_id)
+        _, cand = self.investor_index.search(
+            self._query_vector(q_text, q_graph), k * RERANK_FACTOR, nprobe=nprobe
+        )
+        cand_graph = self._graph_rows(cand)
+        return self._rerank(q_text, q_graph, cand, self.investor_text_emb, cand_graph, k)
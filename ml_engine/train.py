@@ -3,6 +3,7 @@ import torch.nn as nn # Added this import
 import pandas as pd
 import os
 from ml_engine.model import FoundMatchAI
+from ml_engine.manifest import write_manifest
 from torch_geometric.utils import structured_negative_sampling
 
 def train_engine():
@@ -95,6 +96,13 @@ def train_engine():
     save_path = "data/foundmatch_graph.pth"
     torch.save(ai_system.graph_model.state_dict(), save_path)
     print(f"Model saved to {save_path}")
+    write_manifest(
+        save_path,
+        investor_ids=investors['investor_id'].tolist(),
+        startup_ids=startups['Startup_ID'].tolist(),
+        embedding_dim=ai_system.graph_model.embedding.weight.shape[1],
+        num_interactions=len(interactions),
+    )
 
 if __name__ == "__main__":
     train_engine()
\ No newline at end of file
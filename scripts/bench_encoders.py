@@ -0,0 +1,83 @@
+# scripts/bench_encoders.py
+# Accuracy-parity + latency benchmark for the encoder backends in ml_engine/encoders.py.
+#
+#   python scripts/bench_encoders.py --backends torch torch-int8 onnx onnx-int8 --max-drift 0.01
+#
+# Drift is 1 - cos(backend, eager fp32) per pitch in data/processed_startups.csv.
+# The fastest backend whose p99 drift stays under --max-drift is recommended.
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import pandas as pd
+import torch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ml_engine.encoders import BACKENDS, MODEL_NAME, cosine_drift, load_encoder
+
+
+def time_single(encoder, texts, rounds):
+    # One request = one text, the /predict_match shape
+    lat = []
+    for t in texts[:rounds]:
+        start = time.perf_counter()
+        encoder.encode(t)
+        lat.append((time.perf_counter() - start) * 1000)
+    lat.sort()
+    return statistics.median(lat), lat[int(0.99 * (len(lat) - 1))]
+
+
+def time_batch(encoder, texts, batch_size):
+    start = time.perf_counter()
+    encoder.encode(texts, batch_size=batch_size)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--data", default=os.path.join("data", "processed_startups.csv"))
+    parser.add_argument("--limit", type=int, default=2000, help="Pitches used for drift/throughput")
+    parser.add_argument("--single-rounds", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--max-drift", type=float, default=0.01, help="Max allowed p99 cosine drift")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    texts = pd.read_csv(args.data)["One_Line_Pitch"].fillna("General").astype(str).tolist()[:args.limit]
+    print(f"Corpus: {len(texts)} pitches, torch threads={torch.get_num_threads()}")
+
+    reference = load_encoder("torch", args.model)
+    rows = []
+    for backend in args.backends:
+        encoder = reference if backend == "torch" else load_encoder(backend, args.model)
+        encoder.encode(texts[:8])  # warmup
+
+        drift = cosine_drift(reference, encoder, texts, batch_size=args.batch_size)
+        p50, p99 = time_single(encoder, texts, args.single_rounds)
+        throughput = time_batch(encoder, texts, args.batch_size)
+        rows.append((backend, drift, p50, p99, throughput))
+
+    print(f"\n{'backend':<12}{'drift mean':>12}{'drift p99':>12}{'drift max':>12}"
+          f"{'p50 ms':>10}{'p99 ms':>10}{'texts/s':>10}")
+    for backend, drift, p50, p99, throughput in rows:
+        print(f"{backend:<12}{drift['mean']:>12.2e}{drift['p99']:>12.2e}{drift['max']:>12.2e}"
+              f"{p50:>10.2f}{p99:>10.2f}{throughput:>10.1f}")
+
+    ok = [r for r in rows if r[1]["p99"] <= args.max_drift]
+    if ok:
+        best = min(ok, key=lambda r: r[3])
+        print(f"\nFastest within tolerance (p99 drift <= {args.max_drift}): {best[0]}")
+        print(f"Deploy with FOUNDMATCH_ENCODER_BACKEND={best[0]}")
+    else:
+        print("\nNo backend within tolerance; keep FOUNDMATCH_ENCODER_BACKEND=torch")
+
+
+if __name__ == "__main__":
+    main()
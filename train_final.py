@@ -4,6 +4,7 @@ from torch_geometric.nn.conv import LGConv
 from torch_geometric.utils import structured_negative_sampling
 import pandas as pd
 import os
+from ml_engine.manifest import write_manifest
 
 # --- 1. DEFINE MANUAL MODEL (Bypass Library Defaults) ---
 class MyCustomLightGCN(nn.Module):
@@ -116,5 +117,14 @@ def run_final_training():
     torch.save(ai_model.state_dict(), save_path) # Saves weights of our custom class
     print(f"SAVED: Weights saved to '{save_path}'")
 
+    # G. Manifest (lets serving size the model without reading the CSVs)
+    write_manifest(
+        save_path,
+        investor_ids=investors['investor_id'].tolist(),
+        startup_ids=startups['Startup_ID'].tolist(),
+        embedding_dim=ai_model.embedding.embedding_dim,
+        num_interactions=len(interactions),
+    )
+
 if __name__ == "__main__":
     run_final_training()
\ No newline at end of file
@@ -4,6 +4,7 @@ from torch_geometric.nn import LightGCN
 from torch_geometric.utils import structured_negative_sampling
 import pandas as pd
 import os
+from ml_engine.manifest import write_manifest
 
 # --- 1. DEFINE THE AI MODEL (Directly in this file) ---
 # This ensures no "ghost" imports from other files
@@ -113,6 +114,13 @@ def run_safe_training():
     save_path = "data/foundmatch_graph.pth"
     torch.save(ai.graph_model.state_dict(), save_path)
     print(f"SAVED: Model weights saved to '{save_path}'")
+    write_manifest(
+        save_path,
+        investor_ids=investors['investor_id'].tolist(),
+        startup_ids=startups['Startup_ID'].tolist(),
+        embedding_dim=ai.graph_model.embedding.weight.shape[1],
+        num_interactions=len(interactions),
+    )
 
 if __name__ == "__main__":
     run_safe_training()
\ No newline at end of file